@@ -1,5 +1,5 @@
 import os
-from StimStudy.prompt import get_script_and_slides_prompt, get_slide_prompt
+from StimStudy.prompt import get_script_and_slides_prompt, get_slide_prompt, get_theme_prompt, get_styled_slide_prompt
 from dotenv import load_dotenv
 from google import genai
 from pydantic import BaseModel
@@ -56,6 +56,25 @@ def create_slide(script, visual_description, previous_slides):
     
     return response.text
 
+def create_theme(slides):
+    # Shared style guide so slides can be generated independently
+    response = client.models.generate_content(
+        model="gemini-2.0-flash",
+        contents=get_theme_prompt(slides),
+    )
+
+    return response.text
+
+
+def create_slide_with_style(script, visual_description, style_context):
+    # Like create_slide, but anchored on a fixed style context instead of the previous slide
+    response = client.models.generate_content(
+        model="gemini-2.5-pro-exp-03-25",
+        contents=get_styled_slide_prompt(script, visual_description, style_context),
+    )
+
+    return response.text
+
 def create_video(output_file):
     import json
     import os
@@ -0,0 +1,220 @@
+import os
+import re
+import json
+import time
+import fcntl
+import threading
+import contextlib
+from StimStudy.checkpoint import MANIFEST_FILE
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".index.lock"
+# <timestamp>_<random suffix>_<slug>; projects created before the suffix have none
+PROJECT_PREFIX = re.compile(r"^\d{8}_\d{6}_(?:[0-9a-f]{8}_)?")
+MAX_SLUG_LENGTH = 100
+
+# Artifacts every project directory is created with, relative to the project
+DEFAULT_ARTIFACTS = {
+    "slides": "slides",
+    "audio": "audio_clips",
+    "videos": "videos",
+    "output_json": "output.json",
+    "manifest": MANIFEST_FILE,
+}
+
+
+def normalize_title(title):
+    """Lower-case a title or topic and join its words with underscores"""
+    return re.sub(r"\s+", "_", str(title).strip().lower())
+
+
+def project_slug(topic):
+    """Directory-safe form of a topic for project IDs ("What is DNA?" becomes what_is_dna)"""
+    return re.sub(r"[^\w-]+", "_", str(topic).strip().lower()).strip("_")[:MAX_SLUG_LENGTH]
+
+
+class AssetsIndex:
+    """
+    Persistent map from normalized titles and topics to ASSETS projects
+
+    The index lives in ASSETS/index.json and is updated as projects are
+    created, so finding the project for a study plan part is a dictionary
+    lookup rather than a listdir and isdir scan of every project. When
+    several projects share a title the most recently registered one wins.
+    Other processes' registrations are picked up by re-reading the file
+    when its mtime changes; updates hold a lock file in assets_dir across
+    read, modify and replace so concurrent processes do not drop each
+    other's entries. Project directories created without register() are
+    found by rescanning assets_dir when a lookup misses.
+    """
+    def __init__(self, assets_dir="ASSETS"):
+        self.assets_dir = assets_dir
+        self.index_path = os.path.join(assets_dir, INDEX_FILE)
+        self.projects = {}  # project id -> record
+        self.titles = {}  # normalized title -> project id
+        self.loaded_mtime = None
+        self.scanned_mtime = None  # assets_dir mtime at the last directory scan
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Read the index, building it from the ASSETS directory once if it does not exist"""
+        with self._locked():
+            if not self._refresh() and not os.path.exists(self.index_path):
+                self._rebuild()
+        return self
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold this instance's lock and the index lock shared with other processes"""
+        os.makedirs(self.assets_dir, exist_ok=True)
+        with self.lock, open(os.path.join(self.assets_dir, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Re-read the index file if it changed on disk; call with the lock held"""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.loaded_mtime:
+            return True
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {self.index_path}: {e}")
+            return False
+        self.projects = index.get("projects", {})
+        self.titles = index.get("titles", {})
+        self.loaded_mtime = mtime
+        return True
+
+    def _write(self):
+        """Replace the index file; call with _locked() held"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"projects": self.projects, "titles": self.titles}, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+        self.loaded_mtime = os.stat(self.index_path).st_mtime_ns
+
+    def _rebuild(self):
+        """Index every existing project directory; call with _locked() held"""
+        self.projects = {}
+        self.titles = {}
+        self._scan()
+        self._write()
+        print(f"📇 Indexed {len(self.projects)} projects in {self.assets_dir}")
+
+    def _scan(self):
+        """
+        Add project directories missing from the index by their name minus the timestamp prefix
+
+        Returns:
+            int: Number of projects added
+        """
+        self.scanned_mtime = os.stat(self.assets_dir).st_mtime_ns
+        added = 0
+        for entry in sorted(os.scandir(self.assets_dir), key=lambda e: e.name):
+            if entry.is_dir() and entry.name not in self.projects:
+                title_key = normalize_title(PROJECT_PREFIX.sub("", entry.name))
+                self._add(entry.name, entry.path, title_key, topic=None,
+                          created_at=entry.stat().st_mtime)
+                added += 1
+        return added
+
+    def _add(self, project_id, project_dir, title_key, topic, created_at, artifacts=None):
+        self.projects[project_id] = {
+            "project_id": project_id,
+            "project_dir": project_dir,
+            "title": title_key,
+            "topic": topic,
+            "created_at": created_at,
+            "artifacts": dict(artifacts or DEFAULT_ARTIFACTS),
+        }
+        self.titles[title_key] = project_id
+        # Also reachable by the directory name itself, as the old substring scan allowed
+        self.titles.setdefault(normalize_title(project_id), project_id)
+
+    def register(self, project_dir, topic, artifacts=None):
+        """
+        Record a newly created project
+
+        Args:
+            project_dir (str): Path of the project directory inside assets_dir
+            topic (str): The topic or title the project was generated for
+            artifacts (dict, optional): Artifact name -> path relative to the project
+
+        Returns:
+            dict: The project's index record
+        """
+        project_id = os.path.basename(os.path.normpath(project_dir))
+        with self._locked():
+            self._refresh()
+            self._add(project_id, project_dir, normalize_title(topic), topic, time.time(), artifacts)
+            self._write()
+            return dict(self.projects[project_id])
+
+    def update_artifacts(self, project_dir, **artifacts):
+        """Add or replace artifact paths (relative to the project) for a registered project"""
+        project_id = os.path.basename(os.path.normpath(project_dir))
+        with self._locked():
+            self._refresh()
+            if project_id not in self.projects:
+                raise KeyError(f"Project not in index: {project_id}")
+            self.projects[project_id]["artifacts"].update(artifacts)
+            self._write()
+
+    def lookup(self, title):
+        """
+        Find the project for a title or topic
+
+        A miss rescans assets_dir for directories added without register(),
+        unless nothing was added to it since the last scan.
+
+        Returns:
+            dict: The project's record, or None if no project has that title
+        """
+        title_key = normalize_title(title)
+        with self.lock:
+            self._refresh()
+            project_id = self.titles.get(title_key)
+            if project_id is not None:
+                return dict(self.projects[project_id])
+            if not self._changed_since_scan():
+                return None
+
+        with self._locked():
+            self._refresh()
+            if self._changed_since_scan() and self._scan():
+                self._write()
+            project_id = self.titles.get(title_key)
+            if project_id is None:
+                return None
+            return dict(self.projects[project_id])
+
+    def _changed_since_scan(self):
+        try:
+            return os.stat(self.assets_dir).st_mtime_ns != self.scanned_mtime
+        except FileNotFoundError:
+            return False
+
+    def artifact_path(self, record, name):
+        """Path of one of a project's artifacts, e.g. artifact_path(record, "videos")"""
+        return os.path.join(record["project_dir"], record["artifacts"][name])
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_assets_index(assets_dir="ASSETS"):
+    """Return the process-wide AssetsIndex for an assets directory"""
+    key = os.path.abspath(assets_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = AssetsIndex(assets_dir).load()
+        return _indexes[key]
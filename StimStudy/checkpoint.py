@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+import threading
+
+MANIFEST_FILE = "manifest.json"
+
+
+def sha256_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sha256_json(value):
+    return sha256_text(json.dumps(value, sort_keys=True, ensure_ascii=False))
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProjectCheckpoint:
+    """
+    Per-project manifest of generated artifacts, their inputs and content hashes
+
+    Every artifact (output.json, slides/slide_N.html, audio_clips/slide_N.mp3,
+    videos/slide_N.mp4, ...) is recorded with a hash of the inputs that
+    produced it and a sha256 of the file itself. On a rerun an artifact is
+    fresh when its inputs are unchanged and the file on disk is still the one
+    recorded, so only missing or stale work is redone. Size and mtime are
+    checked first so unchanged files are not re-hashed.
+    """
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.path = os.path.join(project_dir, MANIFEST_FILE)
+        self.lock = threading.Lock()
+        self.artifacts = {}
+        self.skipped = 0
+        try:
+            with open(self.path, "r") as f:
+                self._load_document(json.load(f))
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+
+    def _load_document(self, document):
+        self.artifacts = document.get("artifacts", {})
+
+    def _document(self):
+        return {"artifacts": self.artifacts}
+
+    @staticmethod
+    def exists(project_dir):
+        return os.path.isfile(os.path.join(project_dir, MANIFEST_FILE))
+
+    def name(self, path):
+        """Manifest key for a file in the project, e.g. slides/slide_1.html"""
+        return os.path.relpath(path, self.project_dir)
+
+    def _save(self):
+        """Atomically rewrite manifest.json; call with the lock held"""
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._document(), f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def is_fresh(self, name, inputs):
+        """
+        Whether artifact `name` (relative to the project) was produced from `inputs` and is intact
+
+        Returns:
+            dict: The artifact's manifest entry if fresh, otherwise None
+        """
+        with self.lock:
+            entry = self.artifacts.get(name)
+        if entry is None or entry["inputs"] != sha256_json(inputs):
+            return None
+
+        path = os.path.join(self.project_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"] and sha256_file(path) != entry["sha256"]:
+            return None
+
+        with self.lock:
+            self.skipped += 1
+        return entry
+
+    def _entry(self, name, inputs, **extra):
+        path = os.path.join(self.project_dir, name)
+        stat = os.stat(path)
+        return dict(
+            extra,
+            inputs=sha256_json(inputs),
+            sha256=sha256_file(path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+        )
+
+    def record(self, name, inputs, **extra):
+        """Hash artifact `name` and store it with its inputs (and any extra fields, e.g. a duration)"""
+        entry = self._entry(name, inputs, **extra)
+        with self.lock:
+            self.artifacts[name] = entry
+            self._save()
+        return entry
+
+    def sha256(self, name):
+        """Recorded content hash of an artifact, or None"""
+        with self.lock:
+            entry = self.artifacts.get(name)
+        return entry["sha256"] if entry else None
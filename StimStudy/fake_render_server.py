@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Node HTML-to-video render server.
+
+Implements POST /convert and GET /videos/video_<jobId>.mp4 like the real
+server, with configurable render speed, injected 5xx errors and hung
+requests. With a capacity set, renders slow down in proportion to the
+number in flight, and requests beyond max_in_flight get a 503, like a
+saturated renderer. In "path" mode it writes a placeholder file to outputPath; in
+"download" mode it answers with a jobId so clients use the download
+fallback. GET /stats reports requests, connections, peak concurrency,
+errors and hangs.
+
+    python -m StimStudy.fake_render_server --port 3000 --seconds-per-second 0.2 --error-rate 0.05
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLACEHOLDER_VIDEO = b"\x00\x00\x00\x18ftypmp42" + bytes(64 * 1024)
+
+
+class FakeRenderState:
+    """Configuration and counters shared by all request handlers"""
+    def __init__(self, latency=0.05, seconds_per_second=0.1, error_rate=0.0, hang_rate=0.0,
+                 hang_seconds=30.0, mode="path", capacity=None, max_in_flight=None):
+        self.latency = latency
+        self.seconds_per_second = seconds_per_second
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.mode = mode
+        self.capacity = capacity
+        self.max_in_flight = max_in_flight
+        self.lock = threading.Lock()
+        self.jobs = set()
+        self.requests = 0
+        self.errors = 0
+        self.hangs = 0
+        self.downloads = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "hangs": self.hangs,
+                "downloads": self.downloads,
+                "connections": self.connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+class FakeRenderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.state.stats())
+            return
+
+        job_id = self.path.rsplit("/video_", 1)[-1].removesuffix(".mp4")
+        if not self.path.startswith("/videos/") or job_id not in self.state.jobs:
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        with self.state.lock:
+            self.state.downloads += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(PLACEHOLDER_VIDEO)))
+        self.end_headers()
+        self.wfile.write(PLACEHOLDER_VIDEO)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/convert":
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        state = self.state
+        payload = json.loads(body or b"{}")
+        with state.lock:
+            state.requests += 1
+            state.in_flight += 1
+            state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+            in_flight = state.in_flight
+        try:
+            if state.max_in_flight and in_flight > state.max_in_flight:
+                with state.lock:
+                    state.errors += 1
+                self.send_json(503, {"success": False, "error": "Render server overloaded"})
+                return
+
+            roll = random.random()
+            if roll < state.hang_rate:
+                with state.lock:
+                    state.hangs += 1
+                time.sleep(state.hang_seconds)
+            elif roll < state.hang_rate + state.error_rate:
+                with state.lock:
+                    state.errors += 1
+                time.sleep(state.latency)
+                self.send_json(random.choice((500, 503)), {"success": False, "error": "Injected failure"})
+                return
+
+            slowdown = max(1.0, in_flight / state.capacity) if state.capacity else 1.0
+            time.sleep(state.latency + state.seconds_per_second * float(payload.get("duration", 5)) * slowdown)
+
+            job_id = uuid.uuid4().hex
+            if state.mode == "download":
+                with state.lock:
+                    state.jobs.add(job_id)
+                self.send_json(200, {"success": False, "jobId": job_id})
+                return
+
+            output_path = payload.get("outputPath")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "wb") as f:
+                f.write(PLACEHOLDER_VIDEO)
+            self.send_json(200, {"success": True, "jobId": job_id, "videoPath": output_path})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+
+def start_fake_render_server(port=0, **options):
+    """
+    Start the fake render server on a background thread
+
+    Returns:
+        tuple: (server, state); POST to http://localhost:{server.server_port}/convert
+    """
+    state = FakeRenderState(**options)
+    handler = type("BoundFakeRenderHandler", (FakeRenderHandler,), {"state": state})
+    server = ThreadingHTTPServer(("localhost", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake HTML-to-video render server")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fixed seconds per request")
+    parser.add_argument("--seconds-per-second", type=float, default=0.1,
+                        help="Render seconds per second of video")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered with 500/503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--mode", choices=("path", "download"), default="path")
+    parser.add_argument("--capacity", type=int, default=None,
+                        help="Renders in flight before each one slows down")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Renders in flight before requests get a 503")
+    args = parser.parse_args()
+
+    server, state = start_fake_render_server(
+        port=args.port,
+        latency=args.latency,
+        seconds_per_second=args.seconds_per_second,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        mode=args.mode,
+        capacity=args.capacity,
+        max_in_flight=args.max_in_flight,
+    )
+    print(f"Fake render server listening on http://localhost:{server.server_port}/convert")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(json.dumps(state.stats()))
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Fish Audio TTS endpoint.
+
+Serves POST /v1/tts like the real API: it streams back silent MP3 frames
+whose length is proportional to the request text. Latency and error
+responses (429/5xx) can be injected. GET /stats reports how many requests
+and TCP connections were seen and the peak number of concurrent requests,
+which is how keep-alive reuse and the client's concurrency cap are checked.
+
+    python -m StimStudy.fake_tts_server --port 8765 --error-rate 0.1
+    FISHAUDIO_BASE_URL=http://localhost:8765 FISHAUDIO_API_KEY=fake python master.py
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, mono, no padding: 417 bytes, 1152 samples
+SILENT_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes(413)
+FRAME_SECONDS = 1152 / 44100
+
+
+class FakeTTSState:
+    """Configuration and counters shared by all request handlers"""
+    def __init__(self, latency=0.2, jitter=0.0, error_rate=0.0, error_statuses=(429, 500, 503),
+                 seconds_per_char=0.06, chunk_frames=16, chunk_interval=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.seconds_per_char = seconds_per_char
+        self.chunk_frames = chunk_frames
+        self.chunk_interval = chunk_interval
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "connections": self.connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+def request_text(body):
+    """Extract the text from a msgpack TTSRequest body (falls back to the body size)"""
+    try:
+        import ormsgpack
+        return ormsgpack.unpackb(body).get("text", "")
+    except Exception:
+        return "x" * len(body)
+
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.state.stats())
+        else:
+            self.send_json(404, {"status": 404, "message": "Not Found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/v1/tts":
+            self.send_json(404, {"status": 404, "message": "Not Found"})
+            return
+
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            state.in_flight += 1
+            state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+        try:
+            time.sleep(max(0.0, state.latency + random.uniform(-state.jitter, state.jitter)))
+
+            if random.random() < state.error_rate:
+                with state.lock:
+                    state.errors += 1
+                status = random.choice(state.error_statuses)
+                self.send_json(status, {"status": status, "message": "Injected failure"})
+                return
+
+            seconds = max(FRAME_SECONDS, len(request_text(body)) * state.seconds_per_char)
+            frames = int(seconds / FRAME_SECONDS)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(frames * len(SILENT_FRAME)))
+            self.end_headers()
+            for start in range(0, frames, state.chunk_frames):
+                count = min(state.chunk_frames, frames - start)
+                self.wfile.write(SILENT_FRAME * count)
+                if state.chunk_interval:
+                    time.sleep(state.chunk_interval)
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+
+def start_fake_tts_server(port=0, **options):
+    """
+    Start the fake server on a background thread
+
+    Returns:
+        tuple: (server, state); the base URL is http://localhost:{server.server_port}
+    """
+    state = FakeTTSState(**options)
+    handler = type("BoundFakeTTSHandler", (FakeTTSHandler,), {"state": state})
+    server = ThreadingHTTPServer(("localhost", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Fish Audio TTS server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/5xx")
+    parser.add_argument("--seconds-per-char", type=float, default=0.06, help="Audio seconds per text character")
+    parser.add_argument("--chunk-interval", type=float, default=0.0, help="Delay between streamed chunks")
+    args = parser.parse_args()
+
+    server, state = start_fake_tts_server(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seconds_per_char=args.seconds_per_char,
+        chunk_interval=args.chunk_interval,
+    )
+    print(f"Fake TTS server listening on http://localhost:{server.server_port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(json.dumps(state.stats()))
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
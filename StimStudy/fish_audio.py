@@ -1,13 +1,26 @@
 from dotenv import load_dotenv
 import os
 import json
-from fish_audio_sdk import Session, TTSRequest
+from fish_audio_sdk import TTSRequest
 from mutagen.mp3 import MP3
 from io import BytesIO
+from StimStudy.tts_cache import TTSCache
+from StimStudy.mp3_duration import MP3DurationCounter
+from StimStudy.tts_client import get_tts_client
 
 # Load environment variables from the .env file
 load_dotenv()
 
+# Parameters that change the synthesized audio; part of every cache key
+TTS_PARAMS = {
+    "backend": "speech-1.5",  # TTSClient.stream default
+    "format": "mp3",
+    "mp3_bitrate": 128,
+}
+
+# Shared by every topic and worker thread in this process
+tts_cache = TTSCache()
+
 def generate_voice_audio(text: str, reference_id: str | None = None) -> bytes:
     """
     Converts text to speech using the Fish Audio API and returns the audio as bytes.
@@ -20,14 +33,8 @@ def generate_voice_audio(text: str, reference_id: str | None = None) -> bytes:
     Returns:
         bytes: The complete audio stream data.
     """
-    # Retrieve the API key from the environment variable
-    API_KEY = os.environ.get("FISHAUDIO_API_KEY")
-    if not API_KEY:
-        raise ValueError("FISHAUDIO_API_KEY not found in environment variables. "
-                         "Ensure you have a .env file with FISHAUDIO_API_KEY set.")
-
-    # Initialize a session with the Fish Audio API using your API key.
-    session = Session(API_KEY)
+    # Shared pooled session with rate limiting and retries (reads FISHAUDIO_API_KEY)
+    client = get_tts_client()
     
     # Create the TTS request.
     # If reference_id is provided, it will be used to select the model.
@@ -35,12 +42,62 @@ def generate_voice_audio(text: str, reference_id: str | None = None) -> bytes:
     if reference_id:
         request_payload.reference_id = reference_id
 
-    # Stream the audio chunks and collect them into a single bytes object.
-    audio_bytes = b""
-    for chunk in session.tts(request_payload):
-        audio_bytes += chunk
+    # Stream the audio chunks and join them once at the end.
+    chunks = []
+    for chunk in client.stream(request_payload):
+        chunks.append(chunk)
+
+    return b"".join(chunks)
+
+def stream_voice_audio_to_file(text: str, output_file: str, reference_id: str | None = None) -> float:
+    """
+    Streams text-to-speech audio straight into output_file and measures it on the fly.
+    
+    Each chunk is written as soon as it arrives and its MP3 frame headers are
+    counted, so memory stays constant and the file is never read back.
+    
+    Parameters:
+        text (str): The text to be converted into speech.
+        output_file (str): Where to write the MP3.
+        reference_id (str, optional): The voice model ID.
+    
+    Returns:
+        float: Duration of the audio in seconds.
+    """
+    client = get_tts_client()
+
+    request_payload = TTSRequest(text=text)
+    if reference_id:
+        request_payload.reference_id = reference_id
+
+    counter = MP3DurationCounter()
+    with open(output_file, "wb") as f:
+        for chunk in client.stream(request_payload):
+            f.write(chunk)
+            counter.feed(chunk)
+
+    return counter.duration
+
+def synthesize_to_file(text: str, output_file: str, reference_id: str | None = None) -> float:
+    """
+    Synthesize text into output_file, reusing cached audio when possible.
+
+    Parameters:
+        text (str): The text to be converted into speech.
+        output_file (str): Where to write the MP3.
+        reference_id (str, optional): The voice model ID.
+
+    Returns:
+        float: Duration of the audio in seconds.
+    """
+    key = tts_cache.make_key(text, reference_id, TTS_PARAMS)
+    duration_seconds = tts_cache.fetch(key, output_file)
+    if duration_seconds is not None:
+        return duration_seconds
 
-    return audio_bytes
+    duration_seconds = stream_voice_audio_to_file(text, output_file, reference_id=reference_id)
+    tts_cache.put(key, output_file, duration_seconds)
+    return duration_seconds
 
 def main():
     # Define the reference ID for the voice model
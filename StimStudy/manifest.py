@@ -0,0 +1,128 @@
+import os
+from dataclasses import asdict, dataclass, fields
+from StimStudy.checkpoint import ProjectCheckpoint
+
+
+@dataclass(slots=True)
+class SlideRecord:
+    """
+    Everything known about one slide of a project
+
+    html, audio and video are paths relative to the project directory and
+    stay None until the artifact exists; error holds the last failure.
+    """
+    number: int
+    script: str = ""
+    visual_description: str = ""
+    html: str | None = None
+    audio: str | None = None
+    duration_seconds: float | None = None
+    video: str | None = None
+    error: str | None = None
+
+    def entry(self):
+        """The slide as an output.json entry"""
+        return {"script": self.script, "visual_description": self.visual_description}
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field.name: data[field.name] for field in fields(cls) if field.name in data})
+
+
+class ProjectManifest(ProjectCheckpoint):
+    """
+    Typed state of one project, kept in its manifest.json
+
+    Holds the topic and a SlideRecord per slide (script, HTML, narration,
+    duration and render) next to the checkpointed artifact hashes. It is
+    loaded once per project; stages look slides up by number instead of
+    re-reading output.json and audio_durations.json or globbing slides/ and
+    videos/. Every update is one atomic rewrite of manifest.json.
+    """
+    def __init__(self, project_dir):
+        self.topic = None
+        self.slides = {}
+        super().__init__(project_dir)
+
+    def _load_document(self, document):
+        super()._load_document(document)
+        self.topic = document.get("topic")
+        self.slides = {
+            record.number: record for record in map(SlideRecord.from_dict, document.get("slides", []))
+        }
+
+    def _document(self):
+        return dict(
+            super()._document(),
+            topic=self.topic,
+            slides=[record.to_dict() for record in self.ordered_slides()],
+        )
+
+    def full_path(self, name):
+        """Absolute path of a project-relative artifact path, or None"""
+        return os.path.join(self.project_dir, name) if name else None
+
+    def slide(self, number):
+        """SlideRecord for a 1-based slide number, or None"""
+        return self.slides.get(number)
+
+    def ordered_slides(self):
+        return [self.slides[number] for number in sorted(self.slides)]
+
+    def script_entries(self):
+        """The slides as output.json entries, in order"""
+        return [record.entry() for record in self.ordered_slides()]
+
+    def set_script(self, topic, slides_data, artifact=None, inputs=None):
+        """
+        Replace the topic and slide scripts, keeping what is known about unchanged slides
+
+        Args:
+            topic (str): The project's topic
+            slides_data (list): Entries from output.json
+            artifact (str, optional): Project-relative file to record with `inputs` in the same write
+            inputs: Inputs `artifact` was produced from
+        """
+        entry = self._entry(artifact, inputs) if artifact else None
+        with self.lock:
+            self.topic = topic
+            slides = {}
+            for number, slide in enumerate(slides_data, start=1):
+                new_record = SlideRecord(number, slide["script"], slide["visual_description"])
+                record = self.slides.get(number)
+                # A slide whose script changed keeps none of its old HTML, audio or render
+                slides[number] = record if record is not None and record.entry() == new_record.entry() else new_record
+            self.slides = slides
+            if entry:
+                self.artifacts[artifact] = entry
+            self._save()
+
+    def update_slide(self, number, artifact=None, inputs=None, **fields):
+        """
+        Set fields of a slide, and record `artifact` as produced from `inputs`, in one write
+
+        Raises:
+            AttributeError: If a field is not one of SlideRecord's
+        """
+        entry = self._entry(artifact, inputs) if artifact else None
+        with self.lock:
+            record = self.slides.get(number)
+            if record is None:
+                record = self.slides[number] = SlideRecord(number)
+            for field, value in fields.items():
+                setattr(record, field, value)
+            if entry:
+                self.artifacts[artifact] = entry
+            self._save()
+        return record
+
+
+def load_project_manifest(project_dir):
+    """The project's ProjectManifest, or None when it has no manifest.json or no slides in it"""
+    if not ProjectManifest.exists(project_dir):
+        return None
+    manifest = ProjectManifest(project_dir)
+    return manifest if manifest.slides else None
@@ -5,14 +5,21 @@ import shutil
 import argparse
 import uuid
 import concurrent.futures
+import itertools
 import time
-import sys
 import re
 import threading
 from datetime import datetime
-from StimStudy.agent import create_script_and_slides, create_slide
-from StimStudy.fish_audio import generate_voice_audio
-from StimStudy.render_html import process_html_file
+from StimStudy.agent import create_script_and_slides, create_slide, create_slide_with_style, create_theme
+from StimStudy.fish_audio import synthesize_to_file, tts_cache, TTS_PARAMS
+from StimStudy.render_html import process_html_file, get_slide_number
+from StimStudy.render_scheduler import render_scheduler
+from StimStudy.assets_index import get_assets_index, project_slug
+from StimStudy.checkpoint import sha256_file, sha256_text
+from StimStudy.manifest import ProjectManifest
+from StimStudy.media_format import SLIDE_FORMAT
+from StimStudy.progress import ProgressSink, TerminalView, TqdmHandler, get_dispatcher
+from StimStudy.tracing import span
 from dotenv import load_dotenv
 from tqdm import tqdm
 
@@ -24,199 +31,316 @@ from tqdm import tqdm
 # Load environment variables
 load_dotenv()
 
-# Global semaphore to limit rendering concurrency
-# This ensures only 4 videos are sent to the rendering engine at once
-render_semaphore = threading.Semaphore(4)
+# How slide HTML is generated:
+#   sequential - each slide sees the previous slide's HTML (best continuity, slowest)
+#   parallel   - the first slide is generated, then the rest concurrently in its style
+#   themed     - a shared theme is generated, then every slide concurrently
+SLIDE_MODES = ("sequential", "parallel", "themed")
+
+# Render concurrency is shared by all topics through render_scheduler, which
+# adapts it to the render server's latency and error rate
 
 class LogWindow:
-    """Class to manage a scrolling log window with limited number of visible logs"""
+    """
+    Per-job logger that keeps the original add_log/set_status interface
+
+    Messages are published to the shared progress dispatcher instead of being
+    drawn here, so worker threads never wait on the terminal. Without a topic
+    the terminal view draws them as a scrolling window; with a topic they are
+    printed as prefixed lines.
+    """
     def __init__(self, max_logs=10, progress_bar=None, topic=None):
-        self.logs = []
         self.max_logs = max_logs
-        self.progress_bar = progress_bar
-        self.status_message = ""
-        self.topic = f"[{topic}] " if topic else ""
-        self.lock = threading.Lock()  # Add lock for thread safety
+        self.topic = topic
+        self.sink = ProgressSink(job=topic)
         
     def add_log(self, message):
         """Add a log message to the window"""
-        with self.lock:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            log_entry = f"[{timestamp}] {self.topic}{message}"
-            self.logs.append(log_entry)
-            
-            # Keep only the last max_logs entries
-            if len(self.logs) > self.max_logs:
-                self.logs = self.logs[-self.max_logs:]
-            
-            # Update the display (only if not multi-topic mode)
-            if not self.topic:
-                self.update_display()
-            else:
-                # Just print the log when in multi-topic mode
-                print(log_entry)
+        self.sink.log(message)
         
     def set_status(self, message):
-        """Set the status message shown above the progress bar"""
-        with self.lock:
-            self.status_message = message
-            # Update the display (only if not multi-topic mode)
-            if not self.topic:
-                self.update_display()
-        
-    def update_display(self):
-        """Update the terminal display with current logs and progress bar"""
-        # Clear the terminal (compatible with different platforms)
-        if os.name == 'nt':  # For Windows
-            os.system('cls')
-        else:  # For Linux/Mac
-            os.system('clear')
-        
-        # Print header
-        print("\n🎬 VIDEO ASSET GENERATOR 🎬")
-        print("=" * 50)
-        
-        # Print log window
-        print("\n📋 LOG WINDOW:")
-        print("-" * 50)
-        for log in self.logs:
-            print(log)
+        """Set the status message shown above the progress bars"""
+        self.sink.status(message)
         
-        # Fill any remaining log lines with empty space
-        remaining = self.max_logs - len(self.logs)
-        for _ in range(remaining):
-            print()
-            
-        # Print footer
-        print("-" * 50)
-        
-        # Print status message
-        if self.status_message:
-            print(f"\nStatus: {self.status_message}")
-        
-        # If we have a progress bar, tqdm will handle its display
-        if self.progress_bar:
-            # We don't need to do anything here, as tqdm manages its own display
-            pass
-        else:
-            # Just ensure there's space for a progress bar
-            print("\n\n")
+    def progress(self, stage, current, total):
+        """Report progress for a stage; drawn as a tqdm bar by the dispatcher"""
+        self.sink.progress(stage, current, total)
+
+# Terminal output for every topic is drawn by the dispatcher's consumer thread
+get_dispatcher().add_handler(TerminalView(max_logs=10))
+get_dispatcher().add_handler(TqdmHandler())
 
 # Create a global log window instance
 log_window = LogWindow()
 
-def create_project_directory(topic):
+def create_project_directory(topic, log=None):
     """
     Create a project directory structure for a specific video topic
     Returns the path to the project directory
+
+    Raises:
+        FileExistsError: If the project directory already exists
     """
-    # Create a project ID with timestamp and slug of the topic
+    log = log or log_window
+    # Create a project ID with timestamp, a random suffix and slug of the topic, unique even for
+    # topics that start alike and are created in the same second
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    topic_slug = topic.lower().replace(" ", "_")[:10]  # Limit length and make URL-friendly
-    project_id = f"{timestamp}_{topic_slug}"
+    topic_slug = project_slug(topic)
+    project_id = f"{timestamp}_{uuid.uuid4().hex[:8]}_{topic_slug}"
     
     # Create base assets directory if it doesn't exist
     assets_dir = "ASSETS"
-    if not os.path.exists(assets_dir):
-        os.makedirs(assets_dir)
+    os.makedirs(assets_dir, exist_ok=True)
         
-    # Create project directory
+    # Create project directory; an existing one belongs to another run and is never reused
     project_dir = os.path.join(assets_dir, project_id)
-    os.makedirs(project_dir, exist_ok=True)
+    os.makedirs(project_dir)
     
     # Create subdirectories
-    os.makedirs(os.path.join(project_dir, "slides"), exist_ok=True)
-    os.makedirs(os.path.join(project_dir, "audio_clips"), exist_ok=True)
-    os.makedirs(os.path.join(project_dir, "videos"), exist_ok=True)
+    os.makedirs(os.path.join(project_dir, "slides"))
+    os.makedirs(os.path.join(project_dir, "audio_clips"))
+    os.makedirs(os.path.join(project_dir, "videos"))
     
-    log_window.add_log(f"Created project directory: {project_dir}")
+    # Make the project findable by topic without scanning ASSETS
+    get_assets_index(assets_dir).register(project_dir, topic)
+    
+    log.add_log(f"Created project directory: {project_dir}")
     
     return project_dir
 
-def generate_content(topic, project_dir):
-    """Generate script and slides content for the given topic"""
-    log_window.add_log(f"Generating script and slides for topic: {topic}")
+def find_resumable_project(topic, log=None):
+    """
+    Find the latest project for a topic that has a checkpoint manifest
     
-    # Get script and slides content
-    log_window.set_status("Generating content with AI...")
-    response = create_script_and_slides(topic)
+    Returns:
+        str: The project directory, or None if the topic has no resumable project
+    """
+    log = log or log_window
+    record = get_assets_index().lookup(topic)
+    if record is None or not ProjectManifest.exists(record["project_dir"]):
+        return None
+    log.add_log(f"Resuming project directory: {record['project_dir']}")
+    return record["project_dir"]
+
+def save_slide_html(slides_dir, index, slide_html):
+    """Strip markdown code fences from generated HTML and save it as slide_N.html"""
+    slide_html = re.sub(r'^```html\s*|\s*```$', '', slide_html.strip())
+    slide_filename = os.path.join(slides_dir, f"slide_{index+1}.html")
+    with open(slide_filename, 'w') as f:
+        f.write(slide_html)
+    return slide_filename, slide_html
+
+def generate_theme(slides_data, slides_dir, manifest=None, log=None):
+    """Generate the shared theme for themed mode, kept in slides/theme.txt so a resumed job can reuse it"""
+    log = log or log_window
+    theme_file = os.path.join(slides_dir, "theme.txt")
+    inputs = {"slides": slides_data, "size": [SLIDE_FORMAT.width, SLIDE_FORMAT.height]}
+    if manifest and manifest.is_fresh(manifest.name(theme_file), inputs):
+        log.add_log("Reusing shared slide theme")
+        with open(theme_file, 'r') as f:
+            return f.read()
+    
+    log.add_log("Generating shared slide theme...")
+    with span("create_theme", job=log.topic):
+        theme = create_theme(json.dumps(slides_data))
+    with open(theme_file, 'w') as f:
+        f.write(theme)
+    if manifest:
+        manifest.record(manifest.name(theme_file), inputs)
+    return theme
+
+def generate_script(topic, project_dir, manifest=None, log=None):
+    """
+    Write output.json for a topic, or reuse the checkpointed one if it was made for the same topic
+    
+    The slide scripts are also stored in the project manifest, which later
+    stages read them from.
     
-    # Save output.json in the project directory
+    Returns:
+        tuple: (output_file, slides_data)
+    """
+    log = log or log_window
     output_file = os.path.join(project_dir, "output.json")
+    inputs = {"topic": topic}
+    if manifest and manifest.is_fresh(manifest.name(output_file), inputs):
+        log.add_log("Reusing script and slides from output.json")
+        if manifest.slides:
+            return output_file, manifest.script_entries()
+        # Manifests written before slides were tracked only have the artifact
+        with open(output_file, 'r') as f:
+            slides_data = json.load(f)
+        manifest.set_script(topic, slides_data)
+        return output_file, slides_data
+    
+    log.add_log(f"Generating script and slides for topic: {topic}")
+    log.set_status("Generating content with AI...")
+    with span("create_script_and_slides", job=log.topic):
+        response = create_script_and_slides(topic)
+    
     with open(output_file, 'w') as f:
         f.write(response)
+    slides_data = json.loads(response)
+    if manifest:
+        manifest.set_script(topic, slides_data, artifact=manifest.name(output_file), inputs=inputs)
+    return output_file, slides_data
+
+def generate_slide_html(slides_data, slides_dir, slide_mode="sequential", max_workers=4, on_slide_ready=None,
+                        manifest=None, log=None):
+    """
+    Generate the HTML for every slide
     
-    try:
-        # Load the content for slides generation
-        slides_data = json.loads(response)
-        
+    Args:
+        slides_data (list): Entries from output.json
+        slides_dir (str): Directory to write slide_N.html files to
+        slide_mode (str): One of SLIDE_MODES
+        max_workers (int): Concurrent slide generations in parallel/themed modes
+        on_slide_ready (callable, optional): Called as on_slide_ready(index, slide_filename)
+                                             as soon as each slide is written
+        manifest (ProjectManifest, optional): Record each slide's HTML, and reuse slides
+                                              whose script, mode and style context are unchanged
+    
+    Returns:
+        int: Number of slides created
+    """
+    log = log or log_window
+    if slide_mode not in SLIDE_MODES:
+        raise ValueError(f"Unknown slide mode: {slide_mode} (expected one of {', '.join(SLIDE_MODES)})")
+    
+    def reuse(index, inputs):
+        """The slide's HTML from an earlier run if it was made from the same inputs, otherwise None"""
+        slide_filename = os.path.join(slides_dir, f"slide_{index+1}.html")
+        if not manifest or not manifest.is_fresh(manifest.name(slide_filename), inputs):
+            return None
+        with open(slide_filename, 'r') as f:
+            slide_html = f.read()
+        if manifest.slide(index + 1).html is None:
+            manifest.update_slide(index + 1, html=manifest.name(slide_filename))
+        log.add_log(f"Reusing slide {index+1}/{len(slides_data)}")
+        if on_slide_ready:
+            on_slide_ready(index, slide_filename)
+        return slide_html
+    
+    def finish(index, slide_html, inputs):
+        slide_filename, slide_html = save_slide_html(slides_dir, index, slide_html)
+        if manifest:
+            name = manifest.name(slide_filename)
+            manifest.update_slide(index + 1, artifact=name, inputs=inputs, html=name)
+        log.add_log(f"Created slide {index+1}/{len(slides_data)}")
+        if on_slide_ready:
+            on_slide_ready(index, slide_filename)
+        return slide_html
+    
+    def make_slide(index, slide, context, create):
+        # A slide is stale when its entry in output.json, the HTML it was styled on or the slide size changed
+        inputs = {"slide": slide, "slide_mode": slide_mode, "context": sha256_text(context),
+                  "size": [SLIDE_FORMAT.width, SLIDE_FORMAT.height]}
+        slide_html = reuse(index, inputs)
+        if slide_html is None:
+            with span("create_slide", job=log.topic, slide=index + 1):
+                slide_html = create()
+            slide_html = finish(index, slide_html, inputs)
+        return slide_html
+    
+    successful_slides = 0
+    
+    if slide_mode == "sequential":
         # Process slides iteratively, passing previous slide content
-        slides_dir = os.path.join(project_dir, "slides")
         previous_slide_html = ""
-        
-        # Track successful slides
-        successful_slides = 0
-        
-        # Create progress bar for slides
-        log_window.set_status("Creating HTML slides...")
-        with tqdm(total=len(slides_data), desc="HTML Slides", file=sys.stdout) as slide_progress:
-            log_window.progress_bar = slide_progress
-            
-            for index, slide in enumerate(slides_data):
+        for index, slide in enumerate(slides_data):
+            try:
+                previous_slide_html = make_slide(
+                    index, slide, previous_slide_html,
+                    lambda: create_slide(slide["script"], slide["visual_description"], previous_slide_html),
+                )
+                successful_slides += 1
+            except Exception as e:
+                log.add_log(f"Error creating slide {index+1}: {str(e)}")
+                # Continue with next slide
+        return successful_slides
+    
+    # Fix the shared style context up front, then generate the remaining slides concurrently
+    pending = list(enumerate(slides_data))
+    if slide_mode == "parallel":
+        index, slide = pending.pop(0)
+        try:
+            style_context = make_slide(
+                index, slide, "", lambda: create_slide(slide["script"], slide["visual_description"], "")
+            )
+            successful_slides += 1
+        except Exception as e:
+            log.add_log(f"Error creating slide {index+1}: {str(e)}")
+            style_context = ""
+    else:
+        style_context = generate_theme(slides_data, slides_dir, manifest=manifest, log=log)
+    
+    def build(index, slide):
+        make_slide(
+            index, slide, style_context,
+            lambda: create_slide_with_style(slide["script"], slide["visual_description"], style_context),
+        )
+    
+    if pending:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_index = {executor.submit(build, index, slide): index for index, slide in pending}
+            for future in concurrent.futures.as_completed(future_to_index):
                 try:
-                    # Extract script and visual description
-                    script = slide["script"]
-                    visual_description = slide["visual_description"]
-                    
-                    # Generate HTML for the slide, passing previous slide content
-                    slide_html = create_slide(script, visual_description, previous_slide_html)
-                    
-                    # Strip markdown code formatting (```html and ```)
-                    import re
-                    slide_html = re.sub(r'^```html\s*|\s*```$', '', slide_html.strip())
-                    
-                    # Save the HTML to a file
-                    slide_filename = os.path.join(slides_dir, f"slide_{index+1}.html")
-                    with open(slide_filename, 'w') as f:
-                        f.write(slide_html)
-                    
-                    # Store this slide's HTML to pass to the next slide
-                    previous_slide_html = slide_html
-                    
-                    log_window.add_log(f"Created slide {index+1}/{len(slides_data)}")
+                    future.result()
                     successful_slides += 1
-                    slide_progress.update(1)
                 except Exception as e:
-                    log_window.add_log(f"Error creating slide {index+1}: {str(e)}")
-                    # Continue with next slide
-            
-            log_window.progress_bar = None
+                    log.add_log(f"Error creating slide {future_to_index[future]+1}: {str(e)}")
+    
+    return successful_slides
+
+def generate_content(topic, project_dir, slide_mode="sequential", max_workers=4, manifest=None, log=None):
+    """Generate script and slides content for the given topic"""
+    log = log or log_window
+    
+    # Get script and slides content, saved as output.json in the project directory
+    output_file, slides_data = generate_script(topic, project_dir, manifest=manifest, log=log)
+    
+    try:
+        slides_dir = os.path.join(project_dir, "slides")
+        
+        # Report slide progress as each slide is written
+        log.set_status(f"Creating HTML slides ({slide_mode})...")
+        slides_done = itertools.count(1)
+        successful_slides = generate_slide_html(
+            slides_data,
+            slides_dir,
+            slide_mode=slide_mode,
+            max_workers=max_workers,
+            on_slide_ready=lambda index, slide_filename: log.progress("HTML Slides", next(slides_done), len(slides_data)),
+            manifest=manifest,
+            log=log,
+        )
         
         if successful_slides == 0:
             raise Exception("Failed to create any slides")
             
         return output_file, successful_slides
     except Exception as e:
-        log_window.add_log(f"Error generating slides: {str(e)}")
+        log.add_log(f"Error generating slides: {str(e)}")
         raise
 
-def process_audio_for_slide(args):
+def process_audio_for_slide(args, manifest=None, job=None):
     """Process a single slide's audio (for concurrent processing)"""
     index, script_text, reference_id, audio_dir = args
     
     try:
-        # Generate audio for this script
-        audio_data = generate_voice_audio(script_text, reference_id=reference_id)
-        
-        # Save the audio to a file
         output_file = os.path.join(audio_dir, f"slide_{index+1}.mp3")
-        with open(output_file, "wb") as f:
-            f.write(audio_data)
-        
-        # Calculate audio duration using mutagen
-        from mutagen.mp3 import MP3
-        mp3_file = MP3(output_file)
-        duration_seconds = mp3_file.info.length
+        inputs = {"script": script_text, "voice": reference_id, "tts": TTS_PARAMS}
+        record = manifest.slide(index + 1) if manifest else None
+        if (record and record.duration_seconds is not None
+                and manifest.is_fresh(manifest.name(output_file), inputs)):
+            duration_seconds = record.duration_seconds
+        else:
+            # Generate audio for this script (cache hits skip the API call and the MP3 probe)
+            with span("synthesize_to_file", job=job, slide=index + 1):
+                duration_seconds = synthesize_to_file(script_text, output_file, reference_id=reference_id)
+            if manifest:
+                name = manifest.name(output_file)
+                manifest.update_slide(index + 1, artifact=name, inputs=inputs, audio=name,
+                                      duration_seconds=duration_seconds, error=None)
         
         # Create a record for this audio file
         audio_info = {
@@ -227,6 +351,9 @@ def process_audio_for_slide(args):
         
         return audio_info
     except Exception as e:
+        if manifest:
+            # The old clip may have been partly overwritten, so it no longer describes this slide
+            manifest.update_slide(index + 1, audio=None, duration_seconds=None, error=str(e))
         # Return a default duration to prevent blocking the process
         return {
             "slide_number": index + 1,
@@ -235,198 +362,361 @@ def process_audio_for_slide(args):
             "error": str(e)
         }
 
-def generate_audio(output_file, project_dir, voice_actor_id, max_workers=4):
-    """Generate audio files for the scripts in output.json concurrently"""
-    log_window.add_log("Generating audio files concurrently...")
+def generate_audio(manifest, voice_actor_id, max_workers=4, log=None):
+    """
+    Generate audio files for the slide scripts in the project manifest concurrently
+    
+    Every slide's audio path and duration is recorded in the manifest as it finishes.
+    
+    Returns:
+        list: Audio info dicts (slide_number, filename, duration_seconds) in slide order
+    """
+    log = log or log_window
+    log.add_log("Generating audio files concurrently...")
     
     # Define the reference ID for the voice model
     reference_id = voice_actor_id  # Default model from fish_audio.py
     
     # Define output directory for audio
-    audio_dir = os.path.join(project_dir, "audio_clips")
+    audio_dir = os.path.join(manifest.project_dir, "audio_clips")
     
-    # Read the output.json file
-    with open(output_file, "r") as f:
-        scripts_data = json.load(f)
-    
-    log_window.add_log(f"Found {len(scripts_data)} script entries in output.json")
+    slides = manifest.ordered_slides()
+    log.add_log(f"Found {len(slides)} script entries in the project manifest")
     
     # Prepare arguments for concurrent processing
-    audio_args = []
-    for index, entry in enumerate(scripts_data):
-        script_text = entry["script"]
-        audio_args.append((index, script_text, reference_id, audio_dir))
+    audio_args = [(record.number - 1, record.script, reference_id, audio_dir) for record in slides]
     
     # Process audio concurrently with progress bar
-    log_window.set_status("Generating audio...")
+    log.set_status("Generating audio...")
     audio_durations = []
     
-    with tqdm(total=len(audio_args), desc="Audio Generation", file=sys.stdout) as audio_progress:
-        log_window.progress_bar = audio_progress
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_slide = {executor.submit(process_audio_for_slide, args): args[0] for args in audio_args}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Submit all tasks
+        future_to_slide = {executor.submit(process_audio_for_slide, args, manifest, log.topic): args[0] for args in audio_args}
+        
+        # Process completed tasks
+        for done, future in enumerate(concurrent.futures.as_completed(future_to_slide), start=1):
+            slide_index = future_to_slide[future]
+            try:
+                audio_info = future.result()
+                audio_durations.append(audio_info)
+                log.add_log(f"Generated audio for slide {slide_index+1} ({audio_info['duration_seconds']:.2f}s)")
+            except Exception as e:
+                log.add_log(f"Error processing slide {slide_index+1}: {str(e)}")
+                # Add default audio info to maintain order
+                audio_durations.append({
+                    "slide_number": slide_index + 1,
+                    "filename": f"slide_{slide_index+1}.mp3",
+                    "duration_seconds": 5.0,
+                    "error": str(e)
+                })
             
-            # Process completed tasks
-            for future in concurrent.futures.as_completed(future_to_slide):
-                slide_index = future_to_slide[future]
-                try:
-                    audio_info = future.result()
-                    audio_durations.append(audio_info)
-                    log_window.add_log(f"Generated audio for slide {slide_index+1} ({audio_info['duration_seconds']:.2f}s)")
-                except Exception as e:
-                    log_window.add_log(f"Error processing slide {slide_index+1}: {str(e)}")
-                    # Add default audio info to maintain order
-                    audio_durations.append({
-                        "slide_number": slide_index + 1,
-                        "filename": f"slide_{slide_index+1}.mp3",
-                        "duration_seconds": 5.0,
-                        "error": str(e)
-                    })
-                
-                # Update progress bar
-                audio_progress.update(1)
-        
-        log_window.progress_bar = None
+            log.progress("Audio Generation", done, len(audio_args))
     
     # Sort audio durations by slide number to ensure correct order
     audio_durations.sort(key=lambda x: x["slide_number"])
     
-    # Write the duration information to a JSON file
-    durations_file = os.path.join(audio_dir, "audio_durations.json")
-    with open(durations_file, "w") as f:
-        json.dump(audio_durations, f, indent=2)
-    
-    log_window.add_log(f"Saved audio durations to {durations_file}")
+    cache_stats = tts_cache.stats()
+    log.add_log(
+        f"TTS cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate'] * 100:.0f}% hit rate)"
+    )
     
-    return durations_file
+    return audio_durations
 
-def process_video_for_slide(args):
-    """Process a single slide's video (for concurrent processing)"""
-    html_file, audio_durations, videos_dir = args
+def process_video_for_slide(html_file, duration, videos_dir, topic=None, priority=0, log=None, manifest=None):
+    """Render a single slide's video (for concurrent processing)"""
+    log = log or log_window
     try:
-        # Acquire the semaphore to limit concurrent rendering operations
-        with render_semaphore:
-            log_window.add_log(f"Rendering video for {os.path.basename(html_file)}")
-            success = process_html_file(html_file, audio_durations, videos_dir)
+        slide_number = get_slide_number(html_file)
+        video_file = os.path.join(videos_dir, os.path.splitext(os.path.basename(html_file))[0] + ".mp4")
+        if manifest:
+            name = manifest.name(video_file)
+            inputs = {"html": sha256_file(html_file), "duration": duration, "format": SLIDE_FORMAT.render_options()}
+            if manifest.is_fresh(name, inputs):
+                log.add_log(f"Reusing video for {os.path.basename(html_file)}")
+                if manifest.slide(slide_number).video is None:
+                    manifest.update_slide(slide_number, video=name)
+                return os.path.basename(html_file)
+        # Wait for a slot from the shared, topic-fair render scheduler
+        with render_scheduler.slot(topic, priority=priority, cost=duration) as ticket:
+            log.add_log(f"Rendering video for {os.path.basename(html_file)}")
+            with span("process_html_file", job=topic, slide=slide_number) as trace:
+                success = process_html_file(html_file, output_videos_dir=videos_dir, duration=duration)
+                if not success:
+                    trace.fail("render failed")
             if success:
+                if manifest:
+                    manifest.update_slide(slide_number, artifact=name, inputs=inputs, video=name, error=None)
                 return os.path.basename(html_file)
             else:
+                ticket.fail()
+                if manifest:
+                    manifest.update_slide(slide_number, video=None, error="render failed")
                 return f"Failed to process {os.path.basename(html_file)}"
     except Exception as e:
         return f"Error: {str(e)}"
 
-def render_videos(project_dir, durations_file, max_workers=4):
-    """Render videos from HTML slides using audio durations concurrently"""
-    log_window.add_log("Rendering videos from HTML slides concurrently...")
-    
-    # Load audio durations
-    with open(durations_file, 'r') as file:
-        audio_durations = json.load(file)
+def render_videos(manifest, max_workers=4, topic=None, priority=0, log=None):
+    """
+    Render videos from the HTML slides in the project manifest, using their audio durations, concurrently
     
-    # Get paths
-    slides_dir = os.path.join(project_dir, "slides")
-    videos_dir = os.path.join(project_dir, "videos")
+    Returns:
+        list: Paths of the rendered videos, in slide order
+    """
+    log = log or log_window
+    log.add_log("Rendering videos from HTML slides concurrently...")
     
-    # Get all HTML files from slides directory
-    import glob
-    html_files = glob.glob(os.path.join(slides_dir, "*.html"))
+    videos_dir = os.path.join(manifest.project_dir, "videos")
+    slides = [record for record in manifest.ordered_slides() if record.html]
     
-    if not html_files:
-        log_window.add_log(f"No HTML files found in {slides_dir} directory.")
+    if not slides:
+        log.add_log("No HTML slides recorded in the project manifest.")
         return []
         
-    log_window.add_log(f"Found {len(html_files)} HTML files to process.")
-    
-    # Prepare arguments for concurrent processing
-    video_args = [(html_file, audio_durations, videos_dir) for html_file in html_files]
+    log.add_log(f"Found {len(slides)} HTML files to process.")
     
     # Process videos concurrently with progress bar
-    log_window.set_status("Rendering videos...")
-    successful_videos = []
-    
-    with tqdm(total=len(video_args), desc="Video Rendering", file=sys.stdout) as video_progress:
-        log_window.progress_bar = video_progress
+    log.set_status("Rendering videos...")
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Submit all tasks
+        future_to_html = {
+            executor.submit(
+                process_video_for_slide, manifest.full_path(record.html),
+                record.duration_seconds if record.duration_seconds is not None else 5.0,
+                videos_dir, topic, priority, log, manifest,
+            ): record.html
+            for record in slides
+        }
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_html = {executor.submit(process_video_for_slide, args): args[0] for args in video_args}
+        # Process completed tasks
+        for done, future in enumerate(concurrent.futures.as_completed(future_to_html), start=1):
+            html_file = future_to_html[future]
+            try:
+                result = future.result()
+                log.add_log(f"Rendered video for {result}")
+            except Exception as e:
+                log.add_log(f"Error processing video for {html_file}: {str(e)}")
             
-            # Process completed tasks
-            for future in concurrent.futures.as_completed(future_to_html):
-                html_file = future_to_html[future]
-                try:
-                    result = future.result()
-                    if not result.startswith("Failed") and not result.startswith("Error"):
-                        successful_videos.append(os.path.join(videos_dir, os.path.splitext(result)[0] + ".mp4"))
-                    log_window.add_log(f"Rendered video for {result}")
-                except Exception as e:
-                    log_window.add_log(f"Error processing video for {html_file}: {str(e)}")
-                
-                # Update progress bar
-                video_progress.update(1)
-        
-        log_window.progress_bar = None
+            log.progress("Video Rendering", done, len(slides))
     
     # Return the list of created video files
-    return glob.glob(os.path.join(videos_dir, "*.mp4"))
+    return [manifest.full_path(record.video) for record in manifest.ordered_slides() if record.video]
 
-def process_topic(topic, voice_actor_id, max_workers=4):
-    """Process a single topic to generate a video"""
-    # Create a topic-specific log window
-    topic_log = LogWindow(max_logs=10, topic=topic)
+class StageTimer:
+    """Thread-safe record of when each pipeline stage was active"""
+    def __init__(self):
+        self.spans = {}
+        self.lock = threading.Lock()
+        
+    def record(self, stage, start, end):
+        """Record one unit of work for a stage"""
+        with self.lock:
+            first, last = self.spans.get(stage, (start, end))
+            self.spans[stage] = (min(first, start), max(last, end))
+            
+    def elapsed(self, stage):
+        """Seconds between the first start and the last end of a stage"""
+        with self.lock:
+            if stage not in self.spans:
+                return 0.0
+            start, end = self.spans[stage]
+            return end - start
+
+def render_slide_when_ready(html_file, audio_future, videos_dir, timer, topic=None, priority=0, manifest=None,
+                            log=None):
+    """Render a slide as soon as its narration (and so its duration) is available"""
+    log = log or log_window
+    audio_info = audio_future.result()
+    start_time = time.time()
+    result = process_video_for_slide(html_file, audio_info["duration_seconds"], videos_dir, topic, priority, log,
+                                     manifest)
+    timer.record("video_rendering", start_time, time.time())
+    return result
+
+def run_topic_pipeline(topic, project_dir, voice_actor_id, max_workers=4, slide_mode="sequential", priority=0,
+                       manifest=None, log=None):
+    """
+    Generate a topic as a per-slide dependency graph instead of three barriers.
+    
+    Audio only needs the scripts from output.json, so every slide's TTS starts
+    as soon as the script is generated and overlaps HTML generation (in any
+    of the SLIDE_MODES). Each slide is sent to the render server once both
+    its HTML and its audio duration exist. With a manifest, every slide's
+    artifacts are recorded in it and those whose inputs are unchanged are
+    reused rather than regenerated.
+    
+    Returns:
+        dict: output_file, num_slides, video_files and per-stage times
+    """
+    log = log or log_window
+    timer = StageTimer()
+    slides_dir = os.path.join(project_dir, "slides")
+    audio_dir = os.path.join(project_dir, "audio_clips")
+    videos_dir = os.path.join(project_dir, "videos")
+    
+    content_start = time.time()
+    output_file, slides_data = generate_script(topic, project_dir, manifest=manifest, log=log)
+    
+    audio_done = itertools.count(1)
+    renders_done = itertools.count(1)
+    
+    def timed_audio(args):
+        start_time = time.time()
+        audio_info = process_audio_for_slide(args, manifest, topic)
+        timer.record("audio_generation", start_time, time.time())
+        log.add_log(f"Generated audio for slide {audio_info['slide_number']} ({audio_info['duration_seconds']:.2f}s)")
+        log.progress("Audio Generation", next(audio_done), len(slides_data))
+        return audio_info
+    
+    render_futures = {}
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as audio_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as render_pool:
+        # Every slide's TTS can start right away
+        audio_futures = [
+            audio_pool.submit(timed_audio, (index, slide["script"], voice_actor_id, audio_dir))
+            for index, slide in enumerate(slides_data)
+        ]
+        
+        # Renders are queued as slides appear
+        def queue_render(index, slide_filename):
+            render_futures[index] = render_pool.submit(
+                render_slide_when_ready, slide_filename, audio_futures[index], videos_dir, timer,
+                topic, priority, manifest, log
+            )
+            render_futures[index].add_done_callback(
+                lambda future: log.progress("Video Rendering", next(renders_done), len(slides_data))
+            )
+        
+        log.set_status(f"Creating HTML slides ({slide_mode}), audio and renders...")
+        successful_slides = generate_slide_html(
+            slides_data,
+            slides_dir,
+            slide_mode=slide_mode,
+            max_workers=max_workers,
+            on_slide_ready=queue_render,
+            manifest=manifest,
+            log=log,
+        )
+        timer.record("content_generation", content_start, time.time())
+        
+        for future in audio_futures:
+            future.result()
+        
+        video_files = []
+        for index, future in sorted(render_futures.items()):
+            result = future.result()
+            if result.startswith("Failed") or result.startswith("Error"):
+                log.add_log(f"Rendering failed for slide {index+1}: {result}")
+            else:
+                video_files.append(os.path.join(videos_dir, f"slide_{index+1}.mp4"))
+                log.add_log(f"Rendered video for {result}")
+    
+    if successful_slides == 0:
+        raise Exception("Failed to create any slides")
+    
+    return {
+        "output_file": output_file,
+        "num_slides": successful_slides,
+        "video_files": video_files,
+        "processing_time": {
+            "content_generation": timer.elapsed("content_generation"),
+            "audio_generation": timer.elapsed("audio_generation"),
+            "video_rendering": timer.elapsed("video_rendering"),
+        },
+    }
+
+def process_topic(topic, voice_actor_id, max_workers=4, pipelined=True, slide_mode="sequential", priority=0,
+                  resume=False):
+    """
+    Process a single topic to generate a video
     
-    # Use the topic-specific log window for this thread
-    global log_window
-    log_window = topic_log
+    With resume=True the topic's latest checkpointed project is reused and
+    only artifacts that are missing or whose inputs changed are regenerated.
+    """
+    # Topic-specific logger, passed down explicitly so concurrent topics never share one
+    log = LogWindow(max_logs=10, topic=topic)
     
-    # Create project directory
-    project_dir = create_project_directory(topic)
-    log_window.add_log(f"Starting video generation for topic: {topic}")
+    # Reuse the last project for this topic, or create a new project directory
+    project_dir = find_resumable_project(topic, log=log) if resume else None
+    if project_dir is None:
+        project_dir = create_project_directory(topic, log=log)
+    manifest = ProjectManifest(project_dir)
+    log.add_log(f"Starting video generation for topic: {topic}")
     
     result = {
         "topic": topic,
         "project_dir": project_dir,
+        "manifest_file": manifest.path,
         "status": "failed",
         "error": None
     }
     
     try:
+        if pipelined:
+            log.add_log(f"=== Pipelined generation (per-slide, {max_workers} workers per stage) ===")
+            start_time = time.time()
+            pipeline_result = run_topic_pipeline(
+                topic, project_dir, voice_actor_id, max_workers=max_workers, slide_mode=slide_mode,
+                priority=priority, manifest=manifest, log=log
+            )
+            total_time = time.time() - start_time
+            
+            result["output_json"] = pipeline_result["output_file"]
+            result["num_slides"] = pipeline_result["num_slides"]
+            result["video_files"] = pipeline_result["video_files"]
+            result["num_videos"] = len(pipeline_result["video_files"])
+            result["processing_time"] = dict(pipeline_result["processing_time"], total=total_time)
+            
+            for stage, seconds in pipeline_result["processing_time"].items():
+                log.add_log(f"{stage.replace('_', ' ').capitalize()} active for {seconds:.2f} seconds")
+            log.set_status(f"✅ Project completed successfully in {total_time:.2f}s!")
+            log.add_log(f"Project completed successfully!")
+            log.add_log(f"All assets are available in: {project_dir}")
+            log.add_log(f"Reused {manifest.skipped} checkpointed artifacts")
+            log.add_log(f"Total processing time: {total_time:.2f} seconds")
+            
+            result["status"] = "success"
+            result["reused_artifacts"] = manifest.skipped
+            return result
+        
         # Step 1: Generate content (scripts and slides) - SEQUENTIAL
-        log_window.add_log("=== Step 1: Generating content (scripts and slides) ===")
+        log.add_log("=== Step 1: Generating content (scripts and slides) ===")
         start_time = time.time()
-        output_file, num_slides = generate_content(topic, project_dir)
+        output_file, num_slides = generate_content(
+            topic, project_dir, slide_mode=slide_mode, max_workers=max_workers, manifest=manifest, log=log
+        )
         end_time = time.time()
         step1_time = end_time - start_time
         
         result["output_json"] = output_file
         result["num_slides"] = num_slides
-        log_window.add_log(f"Generated {num_slides} slides and saved to {output_file}")
-        log_window.add_log(f"Content generation completed in {step1_time:.2f} seconds")
+        log.add_log(f"Generated {num_slides} slides and saved to {output_file}")
+        log.add_log(f"Content generation completed in {step1_time:.2f} seconds")
         
         # Step 2: Generate audio - CONCURRENT
-        log_window.add_log(f"=== Step 2: Generating audio (concurrent with {max_workers} workers) ===")
+        log.add_log(f"=== Step 2: Generating audio (concurrent with {max_workers} workers) ===")
         start_time = time.time()
-        durations_file = generate_audio(output_file, project_dir, voice_actor_id, max_workers=max_workers)
+        generate_audio(manifest, voice_actor_id, max_workers=max_workers, log=log)
         end_time = time.time()
         step2_time = end_time - start_time
         
-        result["durations_file"] = durations_file
-        log_window.add_log(f"Generated audio files and durations")
-        log_window.add_log(f"Audio generation completed in {step2_time:.2f} seconds")
+        log.add_log(f"Generated audio files and durations")
+        log.add_log(f"Audio generation completed in {step2_time:.2f} seconds")
         
         # Step 3: Render videos - CONCURRENT
-        log_window.add_log(f"=== Step 3: Rendering videos (concurrent with {max_workers} workers) ===")
+        log.add_log(f"=== Step 3: Rendering videos (concurrent with {max_workers} workers) ===")
         start_time = time.time()
-        video_files = render_videos(project_dir, durations_file, max_workers=max_workers)
+        video_files = render_videos(manifest, max_workers=max_workers, topic=topic, priority=priority, log=log)
         end_time = time.time()
         step3_time = end_time - start_time
         
         result["video_files"] = video_files
         result["num_videos"] = len(video_files)
-        log_window.add_log(f"Rendered {len(video_files)} video files")
-        log_window.add_log(f"Video rendering completed in {step3_time:.2f} seconds")
+        log.add_log(f"Rendered {len(video_files)} video files")
+        log.add_log(f"Video rendering completed in {step3_time:.2f} seconds")
         
         # Calculate total time
         total_time = step1_time + step2_time + step3_time
@@ -437,26 +727,29 @@ def process_topic(topic, voice_actor_id, max_workers=4):
             "total": total_time
         }
         
-        log_window.set_status(f"✅ Project completed successfully in {total_time:.2f}s!")
-        log_window.add_log(f"Project completed successfully!")
-        log_window.add_log(f"All assets are available in: {project_dir}")
-        log_window.add_log(f"Total processing time: {total_time:.2f} seconds")
+        log.set_status(f"✅ Project completed successfully in {total_time:.2f}s!")
+        log.add_log(f"Project completed successfully!")
+        log.add_log(f"All assets are available in: {project_dir}")
+        log.add_log(f"Reused {manifest.skipped} checkpointed artifacts")
+        log.add_log(f"Total processing time: {total_time:.2f} seconds")
         
         result["status"] = "success"
+        result["reused_artifacts"] = manifest.skipped
         return result
         
     except Exception as e:
-        log_window.set_status(f"❌ Error: {str(e)}")
-        log_window.add_log(f"Error in processing: {str(e)}")
+        log.set_status(f"❌ Error: {str(e)}")
+        log.add_log(f"Error in processing: {str(e)}")
         import traceback
-        log_window.add_log("See full traceback in console")
+        log.add_log("See full traceback in console")
         traceback.print_exc()
         
         result["status"] = "failed"
         result["error"] = str(e)
         return result
 
-def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics=None):
+def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics=None, pipelined=True,
+                    slide_mode="sequential", priorities=None, resume=False):
     """
     Main function to generate videos for multiple topics concurrently.
     This is the function other scripts should call for batch processing.
@@ -466,6 +759,13 @@ def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics
         max_workers (int): Maximum number of concurrent workers for audio and video processing per topic
         max_concurrent_topics (int, optional): Maximum number of topics to process concurrently
                                                Defaults to None (uses CPU count)
+        pipelined (bool): Overlap content, audio and rendering per slide (default)
+                          instead of running the three stages back to back
+        slide_mode (str): How slide HTML is generated, one of SLIDE_MODES.
+                          "parallel"/"themed" trade some visual continuity for latency
+        priorities (dict, optional): Render priority per topic; higher renders first (default 0)
+        resume (bool): Continue each topic's latest checkpointed project, redoing only
+                       missing or stale artifacts, instead of starting a new one
     
     Returns:
         list: List of results for each topic
@@ -483,7 +783,9 @@ def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics
     print(f"Topics: {', '.join(topics)}")
     print(f"Max workers per topic: {max_workers}")
     print(f"Max concurrent topics: {max_concurrent_topics}")
-    print(f"Rendering engine limit: 4 videos at a time")
+    print(f"Slide generation mode: {slide_mode}")
+    print(f"Rendering engine limit: adaptive, {render_scheduler.min_limit}-{render_scheduler.max_limit} "
+          f"videos at a time (currently {render_scheduler.current_limit})")
     print("=" * 70)
     
     results = []
@@ -491,7 +793,11 @@ def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics
     
     # Process topics concurrently
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_topics) as executor:
-        future_to_topic = {executor.submit(process_topic, topic, voice_actor_id, max_workers): topic for topic in topics}
+        future_to_topic = {
+            executor.submit(process_topic, topic, voice_actor_id, max_workers, pipelined, slide_mode,
+                            (priorities or {}).get(topic, 0), resume): topic
+            for topic in topics
+        }
         
         # Show overall progress bar
         with tqdm(total=len(topics), desc="Overall Progress", unit="topic") as progress:
@@ -514,6 +820,9 @@ def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics
     end_time = time.time()
     total_time = end_time - start_time
     
+    # Let the terminal view catch up before printing the summary
+    get_dispatcher().flush(timeout=5)
+    
     # Print summary
     print("\n" + "=" * 70)
     print("🎬 BATCH PROCESSING COMPLETE 🎬")
@@ -528,6 +837,12 @@ def generate_videos(topics, voice_actor_id, max_workers=4, max_concurrent_topics
     print(f"Failed: {failed}")
     print(f"Total processing time: {total_time:.2f} seconds")
     
+    render_stats = render_scheduler.stats()
+    print(f"Render concurrency: {render_stats['limit']} (error rate {render_stats['error_rate'] * 100:.1f}%)")
+    print(f"Render queue: peak depth {render_stats['peak_queue_depth']}, "
+          f"wait mean {render_stats['wait_mean']:.2f}s / p95 {render_stats['wait_p95']:.2f}s / "
+          f"max {render_stats['wait_max']:.2f}s")
+    
     # List successful projects
     if successful > 0:
         print("\nSuccessful projects:")
@@ -548,10 +863,6 @@ def generate_video(topic, max_workers=4):
     Returns:
         dict: Information about the generated video
     """
-    # Initialize the log window
-    global log_window
-    log_window = LogWindow(max_logs=10)
-    
     return process_topic(topic, max_workers)
 
 def main():
@@ -586,6 +897,17 @@ def main():
         print("Invalid input. Using default value.")
         max_concurrent_topics = None
     
+    # Get slide generation mode (optional)
+    mode_input = input(f"\nEnter slide generation mode ({'/'.join(SLIDE_MODES)}) [default: sequential]: ").strip().lower()
+    slide_mode = mode_input if mode_input else "sequential"
+    if slide_mode not in SLIDE_MODES:
+        print("Invalid input. Using sequential slide generation.")
+        slide_mode = "sequential"
+    
+    # Continue earlier projects for these topics (optional)
+    resume_input = input("\nResume earlier projects for these topics? (y/n) [default: n]: ").lower().strip()
+    resume = resume_input in ("y", "yes")
+    
     print("\n" + "-" * 60)
     print(f"Processing {len(topics)} topics:")
     for i, topic in enumerate(topics):
@@ -602,7 +924,9 @@ def main():
     results = generate_videos(
         topics=topics, 
         max_workers=max_workers,
-        max_concurrent_topics=max_concurrent_topics
+        max_concurrent_topics=max_concurrent_topics,
+        slide_mode=slide_mode,
+        resume=resume
     )
     
     # Print summary statistics
@@ -0,0 +1,42 @@
+import os
+
+
+class VideoFormat:
+    """
+    Geometry and codec of a video stream
+
+    SLIDE_FORMAT is the canonical format of the slide panel: the render
+    server is asked for it, and a profile that composites at its width (the
+    archive profile at the default 1920) can stack slides on the character
+    track without scaling or frame-rate conversion.
+    """
+    def __init__(self, width, height, fps, codec="h264", pix_fmt="yuv420p"):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.codec = codec
+        self.pix_fmt = pix_fmt
+
+    def render_options(self):
+        """Extra fields for a render server /convert request"""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "frameRate": self.fps,
+            "codec": self.codec,
+            "pixelFormat": self.pix_fmt,
+        }
+
+    def __repr__(self):
+        return f"VideoFormat({self.width}x{self.height}@{self.fps} {self.codec}/{self.pix_fmt})"
+
+
+def slide_height(width):
+    """Height of a 16:9 slide at the given width, rounded to an even number like ffmpeg's scale=W:-2"""
+    return int(round(width * 9 / 16 / 2)) * 2
+
+
+# Slides are designed for a 1920x1080 screen; a smaller SLIDE_WIDTH (e.g. for a
+# quicker benchmark run) changes what is generated, not just how fast
+SLIDE_WIDTH = int(os.getenv("SLIDE_WIDTH", "1920"))
+SLIDE_FORMAT = VideoFormat(SLIDE_WIDTH, slide_height(SLIDE_WIDTH), fps=30)
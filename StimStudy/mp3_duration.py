@@ -0,0 +1,143 @@
+"""
+Incremental MP3 duration counting from frame headers.
+
+Bytes are fed as they arrive from the TTS stream; only the current partial
+header is buffered, so the duration is known the moment the last chunk is
+written without reopening the file.
+"""
+
+# Bitrates in kbps indexed by [version group][layer][bitrate index]
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates indexed by version bits (0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1)
+_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+# Layer bits to layer number
+_LAYERS = {1: 3, 2: 2, 3: 1}
+
+
+def parse_frame_header(header):
+    """
+    Parse a 4-byte MPEG audio frame header
+
+    Returns:
+        tuple | None: (frame_length, samples, sample_rate, version_bits, mono)
+                      or None if the bytes are not a valid header
+    """
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    mono = ((header[3] >> 6) & 0x03) == 3
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    layer = _LAYERS[layer_bits]
+    version_group = 1 if version_bits == 3 else 2
+    bitrate = _BITRATES[(version_group, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2:
+        samples = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    elif version_group == 1:
+        samples = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+
+    return frame_length, samples, sample_rate, version_bits, mono
+
+
+class MP3DurationCounter:
+    """Accumulates the duration of an MP3 stream one chunk at a time"""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.skip = 0  # bytes of the current frame or tag still to be skipped
+        self.seconds = 0.0
+        self.frames = 0
+        self.bytes_seen = 0
+        self.checked_first_frame = False
+
+    @property
+    def duration(self):
+        return self.seconds
+
+    def feed(self, chunk):
+        """Consume the next chunk of the stream"""
+        self.bytes_seen += len(chunk)
+        if self.skip >= len(chunk):
+            self.skip -= len(chunk)
+            return
+        buffer = self.buffer
+        buffer += memoryview(chunk)[self.skip:]
+        self.skip = 0
+
+        pos = 0
+        end = len(buffer)
+        while pos + 4 <= end:
+            # ID3v2 tag (usually only at the very start of the stream)
+            if buffer[pos:pos + 3] == b"ID3":
+                if pos + 10 > end:
+                    break
+                size = ((buffer[pos + 6] & 0x7F) << 21 | (buffer[pos + 7] & 0x7F) << 14
+                        | (buffer[pos + 8] & 0x7F) << 7 | (buffer[pos + 9] & 0x7F))
+                tag_length = 10 + size + (10 if buffer[pos + 5] & 0x10 else 0)
+                if pos + tag_length > end:
+                    self.skip = pos + tag_length - end
+                    pos = end
+                    break
+                pos += tag_length
+                continue
+
+            header = parse_frame_header(buffer[pos:pos + 4])
+            if header is None:
+                # Resync on the next possible frame start
+                next_sync = buffer.find(b"\xff", pos + 1)
+                pos = next_sync if next_sync != -1 else end
+                continue
+
+            frame_length, samples, sample_rate, version_bits, mono = header
+
+            if not self.checked_first_frame:
+                # A Xing/Info/VBRI header frame carries no audio
+                side_info = (17 if mono else 32) if version_bits == 3 else (9 if mono else 17)
+                tag_end = pos + 4 + side_info + 4
+                if max(tag_end, pos + 40) > end:
+                    break
+                self.checked_first_frame = True
+                tag = bytes(buffer[pos + 4 + side_info:tag_end])
+                if tag in (b"Xing", b"Info") or buffer[pos + 36:pos + 40] == b"VBRI":
+                    samples = 0
+
+            if samples:
+                self.frames += 1
+                self.seconds += samples / sample_rate
+
+            if pos + frame_length > end:
+                self.skip = pos + frame_length - end
+                pos = end
+                break
+            pos += frame_length
+
+        del buffer[:pos]
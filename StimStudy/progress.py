@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from tqdm import tqdm
+
+# Event types published by a ProgressSink
+LOG = "log"
+STATUS = "status"
+PROGRESS = "progress"
+SPAN = "span"  # Timed calls, see tracing.py
+
+
+class ProgressDispatcher:
+    """
+    Single consumer for progress events from every job in the process
+
+    Worker threads only append to a queue.SimpleQueue, which never blocks on
+    terminal, socket or file I/O. One daemon thread drains the queue in
+    batches and hands each event to every handler; handlers that define
+    flush() are flushed once per batch, so a burst of log lines costs one
+    redraw instead of one per line.
+    """
+    def __init__(self, handlers=None):
+        self.events = queue.SimpleQueue()
+        self.handlers = list(handlers or [])
+        self.handlers_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="progress-dispatcher", daemon=True)
+        self.thread.start()
+
+    def add_handler(self, handler):
+        """Register an object with handle(event) and optionally flush()"""
+        with self.handlers_lock:
+            if handler not in self.handlers:
+                self.handlers.append(handler)
+        return handler
+
+    def remove_handler(self, handler):
+        with self.handlers_lock:
+            if handler in self.handlers:
+                self.handlers.remove(handler)
+
+    def publish(self, event):
+        self.events.put(event)
+
+    def flush(self, timeout=None):
+        """Block until every event published so far has been handled"""
+        done = threading.Event()
+        self.events.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.events.get()]
+            while True:
+                try:
+                    batch.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.handlers_lock:
+                handlers = list(self.handlers)
+            barriers = []
+            for event in batch:
+                if isinstance(event, threading.Event):
+                    barriers.append(event)
+                    continue
+                for handler in handlers:
+                    try:
+                        handler.handle(event)
+                    except Exception as e:
+                        print(f"Progress handler {type(handler).__name__} failed: {e}", file=sys.stderr)
+            for handler in handlers:
+                if hasattr(handler, "flush"):
+                    try:
+                        handler.flush()
+                    except Exception as e:
+                        print(f"Progress handler {type(handler).__name__} failed: {e}", file=sys.stderr)
+            for barrier in barriers:
+                barrier.set()
+
+
+class ProgressSink:
+    """Publishes structured progress events for one job"""
+    def __init__(self, job=None, dispatcher=None):
+        self.job = job
+        self.dispatcher = dispatcher or get_dispatcher()
+
+    def _publish(self, kind, **fields):
+        event = {"job": self.job, "type": kind, "time": time.time()}
+        event.update(fields)
+        self.dispatcher.publish(event)
+
+    def log(self, message):
+        self._publish(LOG, message=message)
+
+    def status(self, message):
+        self._publish(STATUS, message=message)
+
+    def progress(self, stage, current, total, message=None):
+        """Report that current of total units of a stage are done"""
+        percent = (current / total) * 100 if total else 100.0
+        self._publish(PROGRESS, stage=stage, current=current, total=total, percent=percent, message=message)
+
+
+class TerminalView:
+    """
+    Scrolling log window for a single job, plain log lines for many jobs
+
+    Events without a job are drawn into a fixed-size window that is redrawn
+    with ANSI escapes (at most once per batch, and no more often than
+    min_interval); events tagged with a job are printed as prefixed lines
+    so concurrent topics stay readable.
+    """
+    def __init__(self, max_logs=10, stream=None, min_interval=0.0):
+        self.logs = deque(maxlen=max_logs)
+        self.max_logs = max_logs
+        self.stream = stream or sys.stdout
+        self.min_interval = min_interval
+        self.status_message = ""
+        self.dirty = False
+        self.last_draw = 0.0
+
+    def handle(self, event):
+        if event["type"] not in (LOG, STATUS):
+            return
+        if event["job"] is not None:
+            if event["type"] == LOG:
+                timestamp = datetime.fromtimestamp(event["time"]).strftime("%H:%M:%S")
+                print(f"[{timestamp}] [{event['job']}] {event['message']}", file=self.stream)
+            return
+
+        if event["type"] == LOG:
+            timestamp = datetime.fromtimestamp(event["time"]).strftime("%H:%M:%S")
+            self.logs.append(f"[{timestamp}] {event['message']}")
+        else:
+            self.status_message = event["message"]
+        self.dirty = True
+
+    def flush(self):
+        if not self.dirty or time.monotonic() - self.last_draw < self.min_interval:
+            return
+        self.dirty = False
+        self.last_draw = time.monotonic()
+
+        lines = ["\033[H\033[2J", "\n🎬 VIDEO ASSET GENERATOR 🎬", "=" * 50, "\n📋 LOG WINDOW:", "-" * 50]
+        lines.extend(self.logs)
+        lines.extend([""] * (self.max_logs - len(self.logs)))
+        lines.append("-" * 50)
+        if self.status_message:
+            lines.append(f"\nStatus: {self.status_message}")
+        self.stream.write("\n".join(lines) + "\n\n\n")
+        self.stream.flush()
+
+
+class TqdmHandler:
+    """Draws one tqdm bar per (job, stage) from progress events"""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.bars = {}
+
+    def handle(self, event):
+        if event["type"] != PROGRESS:
+            return
+        key = (event["job"], event["stage"])
+        bar = self.bars.get(key)
+        if bar is None:
+            desc = f"[{event['job']}] {event['stage']}" if event["job"] else event["stage"]
+            bar = self.bars[key] = tqdm(total=event["total"], desc=desc, file=self.stream)
+        bar.total = event["total"]
+        bar.n = event["current"]
+        bar.refresh()
+        if event["current"] >= event["total"]:
+            bar.close()
+            del self.bars[key]
+
+
+class SocketIOHandler:
+    """Forwards progress events to Socket.IO clients as progress_update messages"""
+    def __init__(self, socketio, event_name="progress_update"):
+        self.socketio = socketio
+        self.event_name = event_name
+
+    def handle(self, event):
+        if event["type"] != PROGRESS:
+            return
+        self.socketio.emit(self.event_name, {
+            "progress": event.get("percent"),
+            "message": event.get("message"),
+            "job_id": event["job"],
+        })
+
+
+class JSONLogHandler:
+    """Appends every event to a JSON-lines file"""
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def handle(self, event):
+        self.file.write(json.dumps(event) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Return the process-wide dispatcher, logging to PROGRESS_JSON_LOG if set"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = ProgressDispatcher()
+            json_log = os.environ.get("PROGRESS_JSON_LOG")
+            if json_log:
+                _dispatcher.add_handler(JSONLogHandler(json_log))
+        return _dispatcher
@@ -1,3 +1,8 @@
+from StimStudy.media_format import SLIDE_FORMAT
+
+# Slides are designed at the size they are rendered and composited at, so nothing is scaled afterwards
+SLIDE_SIZE = f"{SLIDE_FORMAT.width} pixel width and {SLIDE_FORMAT.height} pixel height"
+
 
 
 def get_script_and_slides_prompt(prompt, guidlines):
@@ -16,9 +21,27 @@ def get_script_and_slides_prompt(prompt, guidlines):
 
 def get_slide_prompt(script, visual_description, previous_slides):
     return f"""
-    Create an animated HTML slide. return only valid HTML, such that if your whole response is pasted into a file, it is valid HTML. The final slide will be displayed on a 1920 pixel width and 1080 pixel height screen.
+    Create an animated HTML slide. return only valid HTML, such that if your whole response is pasted into a file, it is valid HTML. The final slide will be displayed on a {SLIDE_SIZE} screen.
 
     Script: <script>{script}</script> (this will be read aloud alongside HTML slide while itis displayed)
     Visual Description: <visual_description>{visual_description}</visual_description> (generate the HTML for the slide based on this description)
     Previous slides: <previous_slides>{previous_slides}</previous_slides> (the HTML for the previous slide that is shown just before this one. If there is no code provided, this is the first slide.)
+"""
+
+def get_theme_prompt(slides):
+    return f"""
+    You are designing the visual theme for a short series of animated HTML slides. The slides will be generated separately and must look like one coherent video.
+
+    Slides: <slides>{slides}</slides> (the script and visual description of every slide)
+
+    Return a concise style guide: the color palette as hex values, font families and sizes, background treatment, layout conventions and animation style. Include a single <style> block of shared CSS classes that every slide should use. The final slides are displayed on a {SLIDE_SIZE} screen.
+"""
+
+def get_styled_slide_prompt(script, visual_description, style_context):
+    return f"""
+    Create an animated HTML slide. return only valid HTML, such that if your whole response is pasted into a file, it is valid HTML. The final slide will be displayed on a {SLIDE_SIZE} screen.
+
+    Script: <script>{script}</script> (this will be read aloud alongside HTML slide while itis displayed)
+    Visual Description: <visual_description>{visual_description}</visual_description> (generate the HTML for the slide based on this description)
+    Style reference: <style_reference>{style_context}</style_reference> (the shared theme or the HTML of another slide in the same video. Match its colors, fonts, layout and animation style so the slides look like one video, but do not copy its content.)
 """
\ No newline at end of file
@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_API_URL = "http://localhost:3000/convert"
+RETRY_STATUSES = (502, 503, 504)
+
+
+class RenderError(Exception):
+    """Raised when the render server cannot produce a video"""
+
+
+class RenderClient:
+    """
+    Pooled HTTP client for the HTML-to-video render server
+
+    One requests.Session with a sized connection pool is shared by every
+    render thread. Every call has a connect timeout and a read timeout that
+    scales with the clip duration, so a hung server frees its render slot.
+    Connection errors and 502/503/504 responses are retried a bounded number
+    of times with backoff. A conversion's attempts share one read-timeout
+    budget and a read timeout is never retried, so a slow render holds its
+    render slot for at most that long before it counts as a failure.
+    """
+    def __init__(self, api_url=DEFAULT_API_URL, pool_size=8, max_retries=2, backoff_factor=0.5,
+                 connect_timeout=5.0, read_timeout=30.0, read_timeout_per_second=10.0,
+                 download_timeout=60.0):
+        self.api_url = api_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.read_timeout_per_second = read_timeout_per_second
+        self.download_timeout = download_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        # Only connection errors are retried here for POST; convert() retries
+        # bad-gateway statuses itself, within the conversion's time budget
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def convert(self, html_content, duration, output_path, frame_rate=30, video_format=None):
+        """
+        Render HTML to a video at output_path
+
+        Falls back to a streamed download when the server did not write the
+        file to outputPath itself but returned a jobId. With a video_format
+        (see media_format.py) the server is asked for that geometry and codec.
+
+        Returns:
+            dict: The server's JSON response
+
+        Raises:
+            RenderError: If the server fails or no video ends up at output_path
+        """
+        payload = {
+            "html": html_content,
+            "duration": duration,
+            "frameRate": frame_rate,
+            "outputPath": os.path.abspath(output_path),
+        }
+        if video_format is not None:
+            payload.update(video_format.render_options())
+        deadline = time.monotonic() + self.read_timeout + self.read_timeout_per_second * duration
+
+        # Conversions write to a caller-chosen outputPath, so retrying a POST is safe
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff_factor * 2 ** (attempt - 1))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=(self.connect_timeout, remaining))
+            except requests.RequestException as e:
+                raise RenderError(f"Render request failed: {e}") from e
+            if response.status_code not in RETRY_STATUSES:
+                break
+
+        if response.status_code != 200:
+            raise RenderError(f"Render server returned {response.status_code}: {response.text[:500]}")
+
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise RenderError(f"Render server returned invalid JSON: {response.text[:500]}") from e
+        if result.get("success") and os.path.exists(output_path):
+            return result
+
+        if "jobId" in result:
+            self.download(result["jobId"], output_path)
+            return result
+
+        raise RenderError(f"Render server did not produce a video: {result}")
+
+    def download(self, job_id, output_path):
+        """Stream a rendered video from the server into output_path"""
+        video_url = urljoin(self.api_url, f"/videos/video_{job_id}.mp4")
+        tmp_path = f"{output_path}.{threading.get_ident()}.part"
+        try:
+            with self.session.get(video_url, stream=True,
+                                  timeout=(self.connect_timeout, self.download_timeout)) as response:
+                if response.status_code != 200:
+                    raise RenderError(f"Failed to download video: {response.status_code}")
+                with open(tmp_path, "wb") as video_file:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        if chunk:
+                            video_file.write(chunk)
+            os.replace(tmp_path, output_path)
+        except requests.RequestException as e:
+            raise RenderError(f"Failed to download video: {e}") from e
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return output_path
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_render_client():
+    """Return the shared RenderClient, configured from the environment on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RenderClient(
+                api_url=os.environ.get("RENDER_API_URL", DEFAULT_API_URL),
+                pool_size=int(os.environ.get("RENDER_POOL_SIZE", "8")),
+                max_retries=int(os.environ.get("RENDER_MAX_RETRIES", "2")),
+                connect_timeout=float(os.environ.get("RENDER_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.environ.get("RENDER_READ_TIMEOUT", "30")),
+                read_timeout_per_second=float(os.environ.get("RENDER_READ_TIMEOUT_PER_SECOND", "10")),
+            )
+        return _client
@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
-import requests
 import os
 import json
 import glob
 import uuid
+from StimStudy.render_client import get_render_client, RenderError
+from StimStudy.media_format import SLIDE_FORMAT
 
-# Configuration
-API_URL = "http://localhost:3000/convert"
+# Configuration (the render server URL comes from RENDER_API_URL, see render_client.py)
 SLIDES_DIR = "slides"
 VIDEOS_DIR = "videos"
 AUDIO_DURATIONS_FILE = "audio_clips/audio_durations.json"
@@ -75,7 +75,9 @@ def main():
     
     print("All videos generated successfully!")
 
-def process_html_file(html_file_path, audio_durations, output_videos_dir=None):
+def process_html_file(html_file_path, audio_durations=None, output_videos_dir=None, duration=None):
+    # duration comes from the project manifest when known, otherwise from audio_durations
+
     # Use the provided output directory or fall back to the default
     videos_dir = output_videos_dir if output_videos_dir else VIDEOS_DIR
     
@@ -93,7 +95,8 @@ def process_html_file(html_file_path, audio_durations, output_videos_dir=None):
     slide_number = get_slide_number(html_file_path)
     
     # Get duration for this slide
-    duration = get_duration_for_slide(slide_number, audio_durations)
+    if duration is None:
+        duration = get_duration_for_slide(slide_number, audio_durations or [])
     
     print(f"Processing: {html_file_path} (Slide {slide_number}, Duration: {duration}s)")
     
@@ -105,60 +108,15 @@ def process_html_file(html_file_path, audio_durations, output_videos_dir=None):
         print(f"Error reading HTML file {html_file_path}: {e}")
         return
     
-    # Get absolute path for output video
-    abs_output_video = os.path.abspath(output_video)
-    
-    # Prepare request payload
-    payload = {
-        "html": html_content,
-        "duration": duration,  # Use the duration from audio file
-        "frameRate": 30,
-        "outputPath": abs_output_video  # Use absolute path for the output video
-    }
-    
     try:
-        # Make request to the API server
-        response = requests.post(
-            API_URL, 
-            json=payload, 
-            headers={"Content-Type": "application/json"}
-        )
-        
-        # Check response status
-        if response.status_code == 200:
-            # Parse the JSON response
-            result = response.json()
-            
-            if result.get("success"):
-                print(f"Video successfully generated and saved to: {result.get('videoPath')}")
-                return True
-            else:
-                print(f"Error in API response: {result}")
-                
-                # If the API didn't save to the specified path, but provides a URL, download it
-                if not os.path.exists(output_video) and "jobId" in result:
-                    video_url = f"http://localhost:3000/videos/video_{result.get('jobId')}.mp4"
-                    print(f"Downloading video from: {video_url}")
-                    
-                    # Download the video
-                    video_response = requests.get(video_url, stream=True)
-                    if video_response.status_code == 200:
-                        with open(output_video, 'wb') as video_file:
-                            for chunk in video_response.iter_content(chunk_size=8192):
-                                if chunk:
-                                    video_file.write(chunk)
-                        print(f"Video downloaded and saved to: {output_video}")
-                        return True
-                    else:
-                        print(f"Failed to download video: {video_response.status_code}")
-                        return False
-        else:
-            print(f"Error response received: {response.status_code}")
-            print(response.text)
-            return False
-    
-    except Exception as e:
-        print(f"Error making request: {e}")
+        # Pooled client with timeouts, bounded retries and a streamed download fallback;
+        # slides are requested in the canonical format so compositing can skip scaling them
+        result = get_render_client().convert(html_content, duration, output_video,
+                                             frame_rate=SLIDE_FORMAT.fps, video_format=SLIDE_FORMAT)
+        print(f"Video successfully generated and saved to: {result.get('videoPath', output_video)}")
+        return True
+    except RenderError as e:
+        print(f"Error rendering {html_file_path}: {e}")
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+import os
+import time
+import threading
+import contextlib
+from collections import OrderedDict, deque
+from StimStudy.tracing import metrics
+
+render_queue_wait = metrics.histogram(
+    "stimstudy_render_queue_wait_seconds", "Time renders waited for a render scheduler slot"
+)
+
+
+class RenderTicket:
+    """One caller waiting for, then holding, a render slot"""
+    def __init__(self, topic, priority, cost):
+        self.topic = topic
+        self.priority = priority
+        self.cost = max(cost, 0.1)
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.failed = False
+
+    def fail(self):
+        """Mark this render as failed so the scheduler backs off"""
+        self.failed = True
+
+
+class RenderScheduler:
+    """
+    Process-wide admission control for the render server
+
+    Concurrency is tuned with AIMD from what /convert actually does: every
+    successful render adds roughly one slot per window while its latency per
+    second of video stays within latency_tolerance of the best seen, and a
+    failure or a slowdown cuts the limit by decrease_factor. Only renders
+    that started after the last cut can trigger another one, so a burst of
+    errors from one overloaded moment backs off once, not N times.
+
+    Waiting callers are served by priority (higher first), then round-robin
+    across topics, so one large topic cannot starve the others.
+    """
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=16, latency_tolerance=2.0,
+                 decrease_factor=0.7, smoothing=0.2, wait_samples=1000):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial_limit, min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+
+        self.condition = threading.Condition()
+        # priority -> OrderedDict(topic -> deque of tickets); topic order is the round-robin order
+        self.queues = {}
+        self.granted = set()
+        self.in_flight = 0
+        self.last_decrease = 0.0
+
+        self.baseline = None
+        self.smoothed = None
+        self.waits = deque(maxlen=wait_samples)
+        self.completed = 0
+        self.errors = 0
+        self.increases = 0
+        self.decreases = 0
+        self.peak_queue_depth = 0
+
+    @property
+    def current_limit(self):
+        return max(self.min_limit, int(self.limit))
+
+    def queue_depth(self):
+        with self.condition:
+            return self._queue_depth()
+
+    def _queue_depth(self):
+        return sum(len(tickets) for topics in self.queues.values() for tickets in topics.values())
+
+    def _dispatch(self):
+        """Grant free slots to waiters; call with the condition held"""
+        granted_any = False
+        while self.in_flight < self.current_limit and self.queues:
+            priority = max(self.queues)
+            topics = self.queues[priority]
+            topic, tickets = next(iter(topics.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                topics.move_to_end(topic)
+            else:
+                del topics[topic]
+            if not topics:
+                del self.queues[priority]
+
+            self.granted.add(ticket)
+            self.in_flight += 1
+            granted_any = True
+        if granted_any:
+            self.condition.notify_all()
+
+    def acquire(self, topic=None, priority=0, cost=1.0):
+        """
+        Block until a render slot is granted
+
+        Args:
+            topic (str): Fairness group, usually the topic being generated
+            priority (int): Higher priorities are served first
+            cost (float): Seconds of video to render, used to normalize latency
+
+        Returns:
+            RenderTicket: Pass to release() when the render finishes
+        """
+        ticket = RenderTicket(topic, priority, cost)
+        with self.condition:
+            self.queues.setdefault(priority, OrderedDict()).setdefault(topic, deque()).append(ticket)
+            self.peak_queue_depth = max(self.peak_queue_depth, self._queue_depth())
+            self._dispatch()
+            while ticket not in self.granted:
+                self.condition.wait()
+            self.granted.discard(ticket)
+            ticket.started_at = time.monotonic()
+            self.waits.append(ticket.started_at - ticket.enqueued_at)
+        render_queue_wait.observe(ticket.started_at - ticket.enqueued_at)
+        return ticket
+
+    def release(self, ticket):
+        """Return a slot and feed the render's outcome into the concurrency limit"""
+        finished_at = time.monotonic()
+        with self.condition:
+            self.in_flight -= 1
+            self.completed += 1
+            latency = (finished_at - ticket.started_at) / ticket.cost
+
+            if ticket.failed:
+                self.errors += 1
+                self._decrease(ticket)
+            else:
+                self.smoothed = latency if self.smoothed is None else (
+                    (1 - self.smoothing) * self.smoothed + self.smoothing * latency
+                )
+                # Let the baseline drift up slowly so a permanently slower server is relearned
+                self.baseline = latency if self.baseline is None else min(latency, self.baseline * 1.01)
+                if self.smoothed > self.baseline * self.latency_tolerance:
+                    self._decrease(ticket)
+                elif self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                    self.increases += 1
+
+            self._dispatch()
+
+    def _decrease(self, ticket):
+        if ticket.started_at < self.last_decrease:
+            return
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        self.last_decrease = time.monotonic()
+        self.decreases += 1
+
+    @contextlib.contextmanager
+    def slot(self, topic=None, priority=0, cost=1.0):
+        """
+        Hold a render slot for the duration of a with block
+
+        An exception inside the block, or ticket.fail(), counts as a failed render.
+        """
+        ticket = self.acquire(topic, priority, cost)
+        try:
+            yield ticket
+        except BaseException:
+            ticket.fail()
+            raise
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        """Snapshot of the limit, queue and wait times for sizing the render fleet"""
+        with self.condition:
+            waits = sorted(self.waits)
+            queued_by_topic = {}
+            for topics in self.queues.values():
+                for topic, tickets in topics.items():
+                    queued_by_topic[topic] = queued_by_topic.get(topic, 0) + len(tickets)
+            return {
+                "limit": self.current_limit,
+                "in_flight": self.in_flight,
+                "queue_depth": self._queue_depth(),
+                "peak_queue_depth": self.peak_queue_depth,
+                "queued_by_topic": queued_by_topic,
+                "completed": self.completed,
+                "errors": self.errors,
+                "error_rate": self.errors / self.completed if self.completed else 0.0,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "latency_per_second": self.smoothed,
+                "baseline_latency_per_second": self.baseline,
+                "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+                "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+
+
+# Shared by every topic rendered in this process
+render_scheduler = RenderScheduler(
+    initial_limit=int(os.environ.get("RENDER_CONCURRENCY", "4")),
+    min_limit=int(os.environ.get("RENDER_MIN_CONCURRENCY", "1")),
+    max_limit=int(os.environ.get("RENDER_MAX_CONCURRENCY", "16")),
+)
+
+metrics.gauge(
+    "stimstudy_render_concurrency_limit", "Renders the scheduler currently allows at once"
+).set_function(lambda: render_scheduler.current_limit)
+metrics.gauge(
+    "stimstudy_render_in_flight", "Renders holding a scheduler slot"
+).set_function(lambda: render_scheduler.in_flight)
+metrics.gauge(
+    "stimstudy_render_queue_depth", "Renders waiting for a scheduler slot"
+).set_function(render_scheduler.queue_depth)
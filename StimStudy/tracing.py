@@ -0,0 +1,261 @@
+"""
+Tracing spans and Prometheus metrics for the generation pipeline.
+
+    with span("create_slide", job=topic, slide=3):
+        create_slide(...)
+
+Every span observes its duration in the stimstudy_stage_duration_seconds
+histogram (labelled by stage and status) and is counted in the
+stimstudy_stage_in_flight gauge while it runs. Job and slide IDs would make
+the metrics unbounded, so they are only attached to the span itself, which
+is published as a "span" event on the progress dispatcher; with
+PROGRESS_JSON_LOG set every call is written to the JSON log. metrics.render()
+returns the Prometheus text format served by app.py at /metrics.
+
+Spans recorded in worker processes would land in that process's own
+registry, so workers run under collect_spans() and hand the captured spans
+back to the parent, which records them with record_span().
+"""
+
+import math
+import time
+import bisect
+import threading
+import contextlib
+from StimStudy.progress import SPAN, get_dispatcher
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers a cached TTS hit through a long moviepy encode
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, label pairs, value) for the exposition format"""
+        with self.lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield "", list(zip(self.labelnames, key)), value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.function = None
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = float(value)
+
+    def set_function(self, function):
+        """Read an unlabelled gauge from function() at scrape time, e.g. a queue depth"""
+        self.function = function
+
+    def samples(self):
+        if self.function is not None:
+            yield "", [], self.function()
+            return
+        yield from super().samples()
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self):
+        with self.lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self.values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", pairs + [("le", _format_value(bound))], cumulative
+            yield "_sum", pairs, total
+            yield "_count", pairs, cumulative
+
+
+class MetricsRegistry:
+    """Named metrics for one process, rendered in the Prometheus text format"""
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, cls, name, help, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self):
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, pairs, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(pairs)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every module in this process
+metrics = MetricsRegistry()
+
+stage_duration = metrics.histogram(
+    "stimstudy_stage_duration_seconds", "Duration of traced pipeline calls", ("stage", "status")
+)
+stage_in_flight = metrics.gauge(
+    "stimstudy_stage_in_flight", "Traced pipeline calls currently running", ("stage",)
+)
+
+
+class Span:
+    """One traced call; fail() marks it as an error without raising"""
+    def __init__(self, stage, job, attributes):
+        self.stage = stage
+        self.job = job
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+        self.start_time = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def fail(self, error=None):
+        self.status = "error"
+        self.error = str(error) if error is not None else None
+
+
+@contextlib.contextmanager
+def span(stage, job=None, **attributes):
+    """
+    Trace one call to a pipeline stage
+
+    Args:
+        stage (str): Stage name, used as the metrics label
+        job (str, optional): The job or topic the call belongs to
+        **attributes: Extra IDs recorded on the span, e.g. slide=3
+
+    Yields:
+        Span: Call fail() on it to record a failure that is not raised
+    """
+    trace = Span(stage, job, attributes)
+    stage_in_flight.inc(stage=stage)
+    try:
+        yield trace
+    except Exception as e:
+        trace.fail(e)
+        raise
+    finally:
+        trace.duration = time.perf_counter() - trace.started
+        stage_in_flight.dec(stage=stage)
+        record_span(stage, trace.duration, job=job, status=trace.status, error=trace.error,
+                    start_time=trace.start_time, **attributes)
+
+
+_collector = threading.local()
+
+
+@contextlib.contextmanager
+def collect_spans():
+    """
+    Capture the spans finished on this thread instead of recording them
+
+    Yields:
+        list: Keyword arguments for record_span(), one dict per span, filled in as spans finish
+    """
+    previous = getattr(_collector, "spans", None)
+    _collector.spans = spans = []
+    try:
+        yield spans
+    finally:
+        _collector.spans = previous
+
+
+def record_span(stage, duration, job=None, status="ok", error=None, start_time=None, **attributes):
+    """Record a call that was timed elsewhere, e.g. in a worker process, as if it had been traced here"""
+    start_time = start_time or time.time() - duration
+    collected = getattr(_collector, "spans", None)
+    if collected is not None:
+        collected.append(dict(attributes, stage=stage, duration=duration, job=job, status=status, error=error,
+                              start_time=start_time))
+        return
+    stage_duration.observe(duration, stage=stage, status=status)
+    event = dict(attributes, job=job, type=SPAN, time=start_time, stage=stage,
+                 duration=duration, status=status, error=error)
+    get_dispatcher().publish(event)
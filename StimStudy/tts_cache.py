@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+DEFAULT_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 ** 2)))
+INDEX_FILE = "index.json"
+
+
+class TTSCache:
+    """
+    Content-addressed on-disk cache of synthesized audio
+
+    Clips are stored as <sha256>.mp3 where the hash covers the text, the
+    voice and every TTS parameter that changes the output. The measured
+    duration is kept in the index so a hit needs neither the network nor an
+    MP3 probe. Total size is bounded with least-recently-used eviction.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> {"size": int, "duration_seconds": float, "last_access": float}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, reference_id, params):
+        """Hash the text, voice and TTS parameters into a cache key"""
+        payload = json.dumps(
+            {"text": text, "reference_id": reference_id, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _load_index(self):
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        for key, entry in sorted(index.items(), key=lambda item: item[1].get("last_access", 0)):
+            if os.path.exists(self.path_for(key)):
+                self.entries[key] = entry
+                self.total_bytes += entry["size"]
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, index_path)
+
+    def fetch(self, key, output_file):
+        """
+        Copy a cached clip to output_file
+
+        The copy is made under the lock so a concurrent put() cannot evict
+        the clip halfway; a clip removed by another process counts as a miss.
+        The new access time is written to the index so the LRU order
+        survives a restart.
+
+        Returns:
+            float | None: The stored duration on a hit, None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                # Copy rather than link so later writes to output_file cannot corrupt the cache
+                shutil.copyfile(self.path_for(key), output_file)
+            except FileNotFoundError:
+                if os.path.exists(self.path_for(key)):
+                    raise
+                del self.entries[key]
+                self.total_bytes -= entry["size"]
+                self.misses += 1
+                self._save_index()
+                return None
+            self.entries.move_to_end(key)
+            entry["last_access"] = time.time()
+            self.hits += 1
+            self._save_index()
+            return entry["duration_seconds"]
+
+    def put(self, key, source_file, duration_seconds):
+        """Store a freshly synthesized clip and its duration"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self.path_for(key)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_file, tmp_path)
+        os.replace(tmp_path, cache_path)
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous:
+                self.total_bytes -= previous["size"]
+            size = os.path.getsize(cache_path)
+            self.entries[key] = {
+                "size": size,
+                "duration_seconds": duration_seconds,
+                "last_access": time.time(),
+            }
+            self.total_bytes += size
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        """Remove least recently used clips until the cache fits its budget"""
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry["size"]
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """Return hit/miss counters, hit rate and the current size of the cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
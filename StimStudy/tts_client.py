@@ -0,0 +1,127 @@
+import os
+import time
+import random
+import threading
+import httpx
+from fish_audio_sdk import Session
+from fish_audio_sdk.exceptions import HttpCodeErr
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class TTSClient:
+    """
+    Process-wide Fish Audio client
+
+    One Session (and so one pooled keep-alive HTTP client) is shared by every
+    topic and worker thread. Requests are capped by a global concurrency
+    limit and a token-bucket rate limit, and 429/5xx responses or connection
+    errors are retried with jittered exponential backoff. Retries only happen
+    before the first audio byte is handed to the caller.
+    """
+    def __init__(self, api_key, base_url="https://api.fish.audio", max_concurrency=8,
+                 rate_per_second=5.0, burst=5, max_retries=4, backoff_base=0.5,
+                 backoff_max=8.0, connect_timeout=10.0, read_timeout=60.0):
+        self.session = Session(api_key, base_url=base_url)
+        # The SDK builds its client without timeouts or pool sizing; replace it
+        # with one sized to our concurrency cap
+        self.session._sync_client = httpx.Client(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=max_concurrency),
+        )
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def stream(self, request_payload, backend="speech-1.5"):
+        """Yield audio chunks for a TTSRequest"""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            with self.semaphore:
+                with self.lock:
+                    self.requests += 1
+                try:
+                    chunks = self.session.tts(request_payload, backend=backend)
+                    first = next(chunks, b"")
+                except HttpCodeErr as e:
+                    if e.status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                        raise
+                    error = e
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise
+                    error = e
+                else:
+                    if first:
+                        yield first
+                    yield from chunks
+                    return
+
+            with self.lock:
+                self.retries += 1
+            delay = self.backoff(attempt)
+            print(f"TTS request failed ({error}), retrying in {delay:.2f}s "
+                  f"(attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.requests, "retries": self.retries}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_tts_client():
+    """Return the shared TTSClient, creating it from the environment on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.environ.get("FISHAUDIO_API_KEY")
+            if not api_key:
+                raise ValueError("FISHAUDIO_API_KEY not found in environment variables. "
+                                 "Ensure you have a .env file with FISHAUDIO_API_KEY set.")
+            _client = TTSClient(
+                api_key,
+                base_url=os.environ.get("FISHAUDIO_BASE_URL", "https://api.fish.audio"),
+                max_concurrency=int(os.environ.get("TTS_MAX_CONCURRENCY", "8")),
+                rate_per_second=float(os.environ.get("TTS_RATE_PER_SECOND", "5")),
+                burst=int(os.environ.get("TTS_BURST", "5")),
+                max_retries=int(os.environ.get("TTS_MAX_RETRIES", "4")),
+            )
+        return _client
@@ -2,9 +2,11 @@ import json
 import os
 import time
 import uuid
+import itertools
+from urllib.parse import quote
 from StimStudy.master import generate_videos
 import chat
-from flask import Flask, jsonify, send_file, request
+from flask import Flask, Response, jsonify, send_file, request, stream_with_context
 from google import genai
 from dotenv import load_dotenv
 import prompts
@@ -12,14 +14,79 @@ from flask import request
 from flask_cors import CORS
 from flask_socketio import SocketIO
 
-from video import generate_and_combine_videos
+from sprites import get_sprite_library
+from jobs import JobManager, QueueFullError, QUEUED, RUNNING
+from prompt_cache import PromptCache
+from StimStudy.progress import ProgressSink, SocketIOHandler, get_dispatcher
+from StimStudy.assets_index import get_assets_index
+from StimStudy.tracing import CONTENT_TYPE, metrics, span
+from delivery import PLAYLIST_NAME, hls_dir_for, mimetype_for
+from encode_pool import encode_parts
+from encode_profiles import PROFILES as ENCODE_PROFILES
+from werkzeug.security import safe_join
 
 load_dotenv()
 
 app = Flask(__name__)
-client = genai.Client(api_key=os.getenv('APIKEY'))
+if os.getenv("FAKE_MODEL"):
+    # Local token emitter for development and benchmarks, see fake_model.py
+    from fake_model import FakeGenAIClient
+    client = FakeGenAIClient.from_env()
+else:
+    client = genai.Client(api_key=os.getenv('APIKEY'))
 socketio = SocketIO(app)
 
+assets_index = None
+job_manager = None
+
+
+def start_services():
+    """
+    Start the process-wide services behind the routes
+
+    encode_pool's workers are spawned, and when the app is run as
+    `python app.py` each worker re-imports this file as __mp_main__; the
+    guard below keeps them from starting a second set of these.
+    """
+    global assets_index, job_manager
+
+    # Progress events are emitted from the dispatcher thread, never from render workers
+    get_dispatcher().add_handler(SocketIOHandler(socketio))
+
+    # Decode and pre-scale the character sprites once, shared by every request
+    get_sprite_library("sprites").load()
+
+    # Load (or build once) the ASSETS project index so lookups never scan the directory
+    assets_index = get_assets_index("ASSETS")
+
+    # Video rendering runs here instead of inside the HTTP request
+    job_manager = JobManager(
+        max_workers=int(os.getenv("JOB_WORKERS", "2")),
+        max_pending=int(os.getenv("JOB_QUEUE_LIMIT", "16")),
+    )
+    metrics.gauge("stimstudy_jobs_queued", "Jobs waiting for a job worker").set_function(
+        lambda: job_manager.count(QUEUED)
+    )
+    metrics.gauge("stimstudy_jobs_running", "Jobs currently running").set_function(
+        lambda: job_manager.count(RUNNING)
+    )
+
+
+if __name__ != "__mp_main__":
+    start_services()
+
+# Generated parts (demo/<series id>/...) and their HLS renditions are served from here
+VIDEO_ROOT = os.getenv("VIDEO_ROOT", "demo")
+VIDEO_CACHE_MAX_AGE = int(os.getenv("VIDEO_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Study plan responses for repeated prompts are served from memory
+STUDY_PLAN_MODEL = "gemini-2.0-flash"
+prompt_cache = PromptCache(
+    ttl=int(os.getenv("PROMPT_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "256")),
+    wait_timeout=float(os.getenv("PROMPT_CACHE_WAIT_TIMEOUT", "120")),
+)
+
 
 CORS(
     app,
@@ -52,13 +119,20 @@ CORS(
             "expose_headers": ["Content-Type"],
             "supports_credentials": True,
         },
-        r"/videos/*": {
+        r"/jobs/*": {
             "origins": ["http://localhost:8080"],
             "methods": ["GET"],
             "allow_headers": ["Content-Type"],
             "expose_headers": ["Content-Type"],
             "supports_credentials": True,
         },
+        r"/videos/*": {
+            "origins": ["http://localhost:8080"],
+            "methods": ["GET"],
+            "allow_headers": ["Content-Type", "Range"],
+            "expose_headers": ["Content-Type", "Content-Length", "Content-Range", "Accept-Ranges", "ETag"],
+            "supports_credentials": True,
+        },
     },
 )
 
@@ -77,18 +151,77 @@ def handle_message(data):
     # Echo the message back to the client
     socketio.emit("message_response", f"Server received: {data}")
 
-def send_progress_update(progress, message):
+def send_progress_update(progress, message, job_id=None):
     """Utility function to send progress updates to connected clients"""
-    socketio.emit("progress_update", {
-        "progress": progress,
-        "message": message
-    })
+    ProgressSink(job=job_id).progress("video", progress, 100, message)
 
 @app.route('/')
 def hello_world():
     return 'Hello, World! This is a Flask application running in a Docker container.'
 
 
+def generate_study_plan_text(prompt):
+    """Run a study plan prompt through the model, deduplicated by prompt_cache"""
+    def call_model():
+        with span("study_plan_generate_content"):
+            response = client.models.generate_content(
+                model=STUDY_PLAN_MODEL,
+                contents=prompt,
+            )
+        return response.text
+
+    return prompt_cache.get_or_compute(STUDY_PLAN_MODEL, prompt, call_model)
+
+
+def stream_study_plan_text(prompt):
+    """Yield a study plan response as it is generated; cache hits arrive as one chunk"""
+    cached = prompt_cache.get(STUDY_PLAN_MODEL, prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    with span("study_plan_generate_content_stream"):
+        for chunk in client.models.generate_content_stream(
+            model=STUDY_PLAN_MODEL,
+            contents=prompt,
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+def sse_event(data, event=None):
+    """Format one Server-Sent Event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def stream_text_response(chunks, on_complete=None):
+    """
+    Stream text chunks to the client as Server-Sent Events
+
+    Each chunk is sent as {"delta": ...}; the full text follows in a "done"
+    event, or an "error" event if the model fails partway through.
+    """
+    def generate():
+        parts = []
+        try:
+            for text in chunks:
+                parts.append(text)
+                yield sse_event({"delta": text})
+            full_text = "".join(parts)
+            if on_complete:
+                on_complete(full_text)
+            yield sse_event({"text": full_text}, event="done")
+        except Exception as e:
+            yield sse_event({"error": str(e)}, event="error")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/createStudyPlan", methods=["POST"])
 def createStudyPlan():
 
@@ -97,12 +230,21 @@ def createStudyPlan():
 
     prompt = prompts.createStudyPlanPrompt(userPrompt)
 
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=prompt,
-    )
+    return generate_study_plan_text(prompt)
+
+
+@app.route("/createStudyPlan/stream", methods=["POST"])
+def createStudyPlanStream():
+    """Same as /createStudyPlan, streamed token by token as Server-Sent Events"""
+    data = request.get_json()
+    userPrompt = data.get("prompt", "")
 
-    return response.text
+    prompt = prompts.createStudyPlanPrompt(userPrompt)
+
+    return stream_text_response(
+        stream_study_plan_text(prompt),
+        on_complete=lambda text: prompt_cache.put(STUDY_PLAN_MODEL, prompt, text),
+    )
 
 
 @app.route("/refineStudyPlan", methods=["POST"])
@@ -115,11 +257,22 @@ def refineStudyPlan():
     print(json.dumps(studyPlan))
     prompt = prompts.refineStudyPlanPrompt(studyPlan, refinement)
     print(prompt)
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=prompt,
+    return generate_study_plan_text(prompt)
+
+
+@app.route("/refineStudyPlan/stream", methods=["POST"])
+def refineStudyPlanStream():
+    """Same as /refineStudyPlan, streamed token by token as Server-Sent Events"""
+    data = request.get_json()
+    studyPlan = data.get("studyPlan", "")
+    refinement = data.get("refinement", "")
+
+    prompt = prompts.refineStudyPlanPrompt(studyPlan, refinement)
+
+    return stream_text_response(
+        stream_study_plan_text(prompt),
+        on_complete=lambda text: prompt_cache.put(STUDY_PLAN_MODEL, prompt, text),
     )
-    return response.text
 
 
 @app.route("/chat/message", methods=["POST"])
@@ -137,10 +290,32 @@ def send_message():
         return jsonify({"response": response_text})
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
+    except chat.SessionConflictError as e:
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/chat/message/stream", methods=["POST"])
+def send_message_stream():
+    """Send a message to an existing chat session and stream the reply as Server-Sent Events"""
+    data = request.get_json()
+    session_id = data.get("session_id")
+    message = data.get("message")
+
+    if not session_id or not message:
+        return jsonify({"error": "Missing session_id or message"}), 400
+
+    try:
+        chunks = chat.stream_chat_message(session_id, message)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except chat.SessionConflictError as e:
+        return jsonify({"error": str(e)}), 409
+
+    return stream_text_response(chunks)
+
+
 @app.route("/chat/start", methods=["POST"])
 def start_chat():
     """Start a new chat session with optional study plan context"""
@@ -156,34 +331,27 @@ def start_chat():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/generateStudyPlanVideos", methods=["POST"])
-def generateStudyPlanVideos():
-    # Send request with function declarations
-    data = request.get_json()
-    studyPlan = data.get("studyPlan", "")
-    voiceActor = data.get("voiceActor", "")
-    background = data.get("background", "")
-
-    voiceActorToId = {
-        "peter": "a84d19016bc34098b3c89d78f9299e33",
-        "spongebob": "54e3a85ac9594ffa83264b8a494b901b",
-        "biden": "9b42223616644104a4534968cd612053",
-    }
-
-    voiceActorId = voiceActorToId.get(voiceActor, "")
+VOICE_ACTOR_TO_ID = {
+    "peter": "a84d19016bc34098b3c89d78f9299e33",
+    "spongebob": "54e3a85ac9594ffa83264b8a494b901b",
+    "biden": "9b42223616644104a4534968cd612053",
+}
 
-    if not studyPlan:
-        return "Invalid study plan provided."
 
-    if not voiceActorId:
-        return "Invalid voice actor selected."
+def render_study_plan_videos(job_id, studyPlan, voiceActor, background, progress, encode_profile=None,
+                             latency_budget=None):
+    """
+    Render every part of a study plan (runs on the job executor)
 
-    send_progress_update(0, "Starting video generation...")
+    Parts are encoded in parallel, so each one gets the whole latency_budget
+    (seconds) when choosing its encode profile. The job's result is the
+    /videos URLs of the parts (and their HLS playlists) in part order.
+    """
+    def report(percent, message):
+        progress(percent, message)
+        send_progress_update(percent, message, job_id=job_id)
 
-    for i in range(len(studyPlan)):
-        # studyPlan[i] = json.dumps(studyPlan[i])
-        progress = (i / len(studyPlan)) * 100
-        send_progress_update(progress, f"Processing video {i+1} of {len(studyPlan)}...")
+    report(0, "Starting video generation...")
 
     studyPlan = [
         {"title": "cruzhacks_overview_-_part_1"},
@@ -201,72 +369,138 @@ def generateStudyPlanVideos():
 
     # print(studyPlan)
     seriesId = uuid.uuid4()
+    final_output_path = os.path.join(VIDEO_ROOT, str(seriesId))
+
+    # Resolve every part before encoding, so a missing project fails the job up front
+    parts = []
     for i in range(len(studyPlan)):
         # studyPlan[i] = json.loads(studyPlan[i])
         videoName = studyPlan[i]["title"].replace(' ', '_').lower()
         print("videoName", videoName)
 
-        # Query the ASSETS directory for a matching folder name
-        assets_dir = "ASSETS"
-        matching_dirs = [
-            dir_name for dir_name in os.listdir(assets_dir)
-            if os.path.isdir(os.path.join(assets_dir, dir_name)) and videoName in dir_name
-        ]
-
-        if not matching_dirs:
-            return jsonify({
-                "error": f"No matching directory found for video name: {videoName}"
-            }), 404
-
-        folder_name = matching_dirs[0]
-        # Use the first matching directory
-        video_folder = os.path.join(assets_dir, matching_dirs[0])
-
-        if not matching_dirs:
-            return f"No matching directory found for video name: {videoName}"
-
-        # Use the first matching directory
-        audio_folder = f"ASSETS/{folder_name}/audio_clips"
-        slide_folder = f"ASSETS/{folder_name}/videos"
-        sprite_dir = "sprites"
-        background_folder = "backgroundVideos"
-        output_folder = "output"
-
-        final_output_path = f"demo/{seriesId}"
-        index = i
-        selected_character = voiceActor
-        selected_background = background
-        generate_and_combine_videos(audio_folder=audio_folder,
-                                    selected_character=selected_character,
-                                    sprite_dir=sprite_dir,
-                                    selected_background=selected_background,
-                                    background_folder=background_folder,
-                                    output_folder=output_folder,
-                                    slide_folder=slide_folder,
-                                    final_output_path=final_output_path,
-                                    index=index,
-                                    title=videoName)
-    send_progress_update(100, "Video generation complete!")
-
-    generated_file_paths = []
-    if os.path.exists(final_output_path):
-        generated_file_paths = [
-            os.path.join(final_output_path, file_name)
-            for file_name in os.listdir(final_output_path)
-            if os.path.isfile(os.path.join(final_output_path, file_name))
-        ]
-    return generated_file_paths
-
-
-@app.route("/videos/<video_name>", methods=["GET"])
-def serve_video(video_name):
-    videos = {
-        "dynamicProgrammingFibonacci.mp4": "/Users/coltonkirsten/Desktop/Projects/STIMSTUDYFRONT/stimstudy_frontend/demo/dynamicProgrammingFibonacci.mp4",
-        "makingFriends.mp4": "/Users/coltonkirsten/Desktop/Projects/STIMSTUDYFRONT/stimstudy_frontend/demo/makingFriends.mp4",
-    }
+        # Look the project up in the ASSETS index
+        project = assets_index.lookup(videoName)
+
+        if project is None:
+            raise FileNotFoundError(f"No matching directory found for video name: {videoName}")
+
+        parts.append({
+            "project_dir": project["project_dir"],
+            "audio_folder": assets_index.artifact_path(project, "audio"),
+            "selected_character": voiceActor,
+            "sprite_dir": "sprites",
+            "selected_background": background,
+            "background_folder": "backgroundVideos",
+            "slide_folder": assets_index.artifact_path(project, "videos"),
+            "final_output_path": final_output_path,
+            "index": i,
+            "title": videoName,
+            "job_id": job_id,
+            "profile": encode_profile,
+            "latency_budget": latency_budget,
+        })
+
+    # Parts are encoded concurrently in the shared process pool (see encode_pool.py)
+    report(0, f"Encoding {len(parts)} videos...")
+    encoded = itertools.count(1)
+
+    def part_done(result):
+        done = next(encoded)
+        report((done / len(parts)) * 100, f"Encoded {done} of {len(parts)} videos")
+
+    results = encode_parts(parts, on_done=part_done)
+    report(100, "Video generation complete!")
+
+    # In part order, each MP4 followed by its HLS playlist when one was packaged
+    generated_urls = []
+    for result in results:
+        if not result["path"]:
+            continue
+        generated_urls.append(video_url(result["path"]))
+        playlist = os.path.join(hls_dir_for(result["path"]), PLAYLIST_NAME)
+        if os.path.isfile(playlist):
+            generated_urls.append(video_url(playlist))
+    return generated_urls
+
 
-    if video_name in videos:
-        return send_file(videos[video_name], mimetype="video/mp4")
+@app.route("/generateStudyPlanVideos", methods=["POST"])
+def generateStudyPlanVideos():
+    """Queue rendering of a study plan and return the job ID immediately"""
+    data = request.get_json()
+    studyPlan = data.get("studyPlan", "")
+    voiceActor = data.get("voiceActor", "")
+    background = data.get("background", "")
+    encodeProfile = data.get("encodeProfile")
+    latencyBudget = data.get("latencyBudget")
+
+    voiceActorId = VOICE_ACTOR_TO_ID.get(voiceActor, "")
+
+    if not studyPlan:
+        return jsonify({"error": "Invalid study plan provided."}), 400
+
+    if not voiceActorId:
+        return jsonify({"error": "Invalid voice actor selected."}), 400
+
+    if encodeProfile is not None and encodeProfile not in ENCODE_PROFILES:
+        return jsonify({"error": f"Invalid encode profile, expected one of {', '.join(ENCODE_PROFILES)}."}), 400
+
+    if latencyBudget is not None and (not isinstance(latencyBudget, (int, float)) or latencyBudget <= 0):
+        return jsonify({"error": "latencyBudget must be a positive number of seconds."}), 400
+
+    try:
+        job = job_manager.submit(
+            "generateStudyPlanVideos", render_study_plan_videos, studyPlan, voiceActor, background,
+            encode_profile=encodeProfile, latency_budget=latencyBudget,
+        )
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}",
+    }), 202
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Stage latency histograms, in-flight calls and queue depths in the Prometheus text format"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Return the status, progress and result of a submitted job"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify(job)
+
+
+def video_url(path):
+    """URL that serve_video serves a file under VIDEO_ROOT at"""
+    relative = os.path.relpath(path, VIDEO_ROOT).replace(os.sep, "/")
+    return f"/videos/{quote(relative)}"
+
+
+@app.route("/videos/<path:video_name>", methods=["GET"])
+def serve_video(video_name):
+    """
+    Serve a generated video, HLS playlist or segment from VIDEO_ROOT
+
+    Supports Range requests (206 partial content), ETag / If-None-Match and
+    Cache-Control; generated files never change once written.
+    """
+    video_path = safe_join(VIDEO_ROOT, video_name)
+
+    if video_path and os.path.isfile(video_path):
+        return send_file(
+            video_path,
+            mimetype=mimetype_for(video_path),
+            conditional=True,
+            etag=True,
+            max_age=VIDEO_CACHE_MAX_AGE,
+        )
     else:
         return jsonify({"error": "Video not found"}), 404
 
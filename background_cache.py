@@ -0,0 +1,316 @@
+import os
+import math
+import time
+import fcntl
+import threading
+import contextlib
+import subprocess
+from collections import OrderedDict
+from compositor import DEFAULT_WIDTH, DEFAULT_FPS, ffmpeg_binary
+
+# Pre-cut segments are rounded up to this many seconds so clips of similar
+# length share one cached file; consumers trim to the exact duration.
+DURATION_BUCKET_SECONDS = 5
+DEFAULT_MAX_BYTES = int(os.getenv("BACKGROUND_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Budget for the mezzanine transcodes of one background folder (one per background and width)
+MEZZANINE_MAX_BYTES = int(os.getenv("BACKGROUND_MEZZANINE_MAX_BYTES", str(4 * 1024 ** 3)))
+CACHE_DIR_NAME = ".cache"
+# Segments used this recently may be about to be read by another process
+IN_USE_SECONDS = float(os.getenv("BACKGROUND_CACHE_IN_USE_SECONDS", "600"))
+LOCK_FILE_NAME = ".lock"
+
+
+def _run_ffmpeg(args, output_path):
+    """Run ffmpeg into a temporary file and atomically move it into place"""
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+    command = [ffmpeg_binary(), "-y", "-loglevel", "error", *args, tmp_path]
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        stderr = process.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to write {output_path}: {stderr[-2000:]}")
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def mezzanine_path(background_path, width=DEFAULT_WIDTH):
+    """Path of the mezzanine transcode for a background at the given width"""
+    folder, file_name = os.path.split(os.path.abspath(background_path))
+    name = os.path.splitext(file_name)[0]
+    return os.path.join(folder, CACHE_DIR_NAME, f"{name}_{width}w.mp4")
+
+
+_ingest_locks = {}
+_ingest_locks_guard = threading.Lock()
+
+
+@contextlib.contextmanager
+def _dir_locked(directory):
+    """Hold a directory's lock file, shared with other processes using the same cache"""
+    with open(os.path.join(directory, LOCK_FILE_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def evict_mezzanines(cache_dir, max_bytes=MEZZANINE_MAX_BYTES, keep=None, in_use_seconds=IN_USE_SECONDS):
+    """
+    Delete least recently used mezzanines until a folder's cache fits its budget
+
+    Args:
+        cache_dir (str): The background folder's .cache directory
+        max_bytes (int): Budget for the mezzanines in cache_dir
+        keep (str, optional): Mezzanine that must not be deleted, e.g. the one just written
+        in_use_seconds (float): Mezzanines used this recently are kept too
+
+    Returns:
+        int: Number of mezzanines deleted
+    """
+    with _dir_locked(cache_dir):
+        mezzanines = []
+        for entry in os.scandir(cache_dir):
+            if not entry.is_file() or not entry.name.endswith(".mp4") or entry.name.endswith(".tmp.mp4"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            mezzanines.append((stat.st_atime, entry.path, stat.st_size))
+        mezzanines.sort()
+
+        total_bytes = sum(size for *_, size in mezzanines)
+        in_use_since = time.time() - in_use_seconds
+        deleted = 0
+        for used, path, size in mezzanines:
+            if total_bytes <= max_bytes or used >= in_use_since:
+                break
+            if keep and os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            deleted += 1
+        return deleted
+
+
+def ingest_background(background_path, width=DEFAULT_WIDTH, fps=DEFAULT_FPS):
+    """
+    Transcode a background video once into a cheap-to-seek mezzanine
+
+    The mezzanine is already scaled to the output width and frame rate, has
+    no audio and a one-second keyframe interval, so cutting a segment from it
+    is a stream copy and later scaling in the compositor is a no-op. The file
+    is reused until the source background is modified. Each use bumps its
+    access time, and the least recently used mezzanines in the folder are
+    deleted once they exceed MEZZANINE_MAX_BYTES.
+
+    Args:
+        background_path (str): Path to backgroundVideos/<name>.mp4
+        width (int): Target output width
+        fps (int): Target frame rate
+
+    Returns:
+        str: Path to the mezzanine file
+    """
+    if not os.path.isfile(background_path):
+        raise FileNotFoundError(f"Background video '{background_path}' not found.")
+
+    output_path = mezzanine_path(background_path, width)
+    with _ingest_locks_guard:
+        lock = _ingest_locks.setdefault(output_path, threading.Lock())
+
+    with lock:
+        try:
+            modified = os.path.getmtime(output_path)
+            if modified >= os.path.getmtime(background_path):
+                # Keep the modification time, which segments are checked against
+                os.utime(output_path, (time.time(), modified))
+                return output_path
+        except FileNotFoundError:
+            pass
+
+        cache_dir = os.path.dirname(output_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        print(f"📼 Ingesting background {background_path} at {width}px wide...")
+        _run_ffmpeg([
+            "-i", background_path,
+            "-an",
+            "-vf", f"scale={width}:-2,fps={fps},setsar=1",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+            "-g", str(fps), "-keyint_min", str(fps), "-sc_threshold", "0",
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+        ], output_path)
+        evict_mezzanines(cache_dir, keep=output_path)
+        return output_path
+
+
+class BackgroundSegmentCache:
+    """
+    Cache of the pre-cut segments of one background folder
+
+    Segments are keyed by (background, duration bucket, width) and stored as
+    stream-copied cuts of the background mezzanine in the folder's
+    .cache/segments. A mezzanine shorter than the bucket is looped, so a
+    segment always covers the clip it is overlaid on. The directory is the source of truth, so segments left
+    by earlier processes are reused and counted against the size budget, and
+    a segment deleted since it was cached is regenerated. Least recently used
+    segments (by access time, bumped on every hit) are deleted first.
+
+    Encode pool workers each have their own instance over the same
+    directory. Lookups and eviction hold an exclusive lock on the directory,
+    eviction re-reads it so the budget holds across processes, and segments
+    used in the last `in_use_seconds` are never evicted since another
+    process may be about to read them.
+    """
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, bucket_seconds=DURATION_BUCKET_SECONDS,
+                 in_use_seconds=IN_USE_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.bucket_seconds = bucket_seconds
+        self.in_use_seconds = in_use_seconds
+        self.entries = OrderedDict()  # path -> (last used, size), least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._locked():
+            self._scan()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold this instance's lock and the directory lock shared with other processes"""
+        with self.lock, _dir_locked(self.cache_dir):
+            yield
+
+    def _scan(self):
+        """Rebuild entries and total_bytes from the segments on disk"""
+        segments = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".mp4") or entry.name.endswith(".tmp.mp4"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            segments.append((stat.st_atime, entry.path, stat.st_size))
+        segments.sort()
+        self.entries = OrderedDict((path, (used, size)) for used, path, size in segments)
+        self.total_bytes = sum(size for _, size in self.entries.values())
+
+    def bucket_for(self, duration):
+        """Round a duration up to its cache bucket"""
+        return max(1, math.ceil(duration / self.bucket_seconds)) * self.bucket_seconds
+
+    def segment_path(self, background_path, bucket, width):
+        """Path of the cached segment for a key"""
+        name = os.path.splitext(os.path.basename(background_path))[0]
+        return os.path.join(self.cache_dir, f"{name}_{width}w_{bucket}s.mp4")
+
+    def _use(self, path, background_path, width):
+        """
+        Mark a cached segment as just used
+
+        Returns:
+            bool: False if the segment is missing or older than its background or mezzanine
+        """
+        try:
+            modified = os.path.getmtime(path)
+            mezzanine = mezzanine_path(background_path, width)
+            if modified < os.path.getmtime(background_path) or (
+                    os.path.exists(mezzanine) and modified < os.path.getmtime(mezzanine)):
+                return False
+            now = time.time()
+            os.utime(path, (now, modified))
+        except FileNotFoundError:
+            if path in self.entries:
+                self.total_bytes -= self.entries.pop(path)[1]
+            return False
+        if path in self.entries:
+            self.entries[path] = (now, self.entries[path][1])
+            self.entries.move_to_end(path)
+        return True
+
+    def get(self, background_path, duration, width=DEFAULT_WIDTH, fps=DEFAULT_FPS):
+        """
+        Return a background segment at least `duration` seconds long
+
+        Args:
+            background_path (str): Path to backgroundVideos/<name>.mp4
+            duration (float): Required length in seconds
+            width (int): Target output width
+
+        Returns:
+            str: Path to the pre-cut, pre-scaled segment
+        """
+        bucket = self.bucket_for(duration)
+        path = self.segment_path(background_path, bucket, width)
+
+        with self._locked():
+            if self._use(path, background_path, width):
+                self.hits += 1
+                return path
+        with self.lock:
+            key_lock = self.key_locks.setdefault(path, threading.Lock())
+
+        with key_lock:
+            with self._locked():
+                if self._use(path, background_path, width):
+                    self.hits += 1
+                    return path
+
+            mezzanine = ingest_background(background_path, width=width, fps=fps)
+            # The compositor overlays with shortest=1, so a short cut would truncate the slide
+            _run_ffmpeg(["-stream_loop", "-1", "-i", mezzanine, "-t", str(bucket), "-c", "copy"], path)
+
+            with self._locked():
+                self.misses += 1
+                # Other processes may have added or removed segments since the last scan
+                self._scan()
+                self._evict()
+            return path
+
+    def _evict(self):
+        """Delete least recently used segments until the cache fits its budget"""
+        in_use_since = time.time() - self.in_use_seconds
+        for path, (used, size) in list(self.entries.items()):
+            if self.total_bytes <= self.max_bytes or used >= in_use_since:
+                break
+            del self.entries[path]
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_segment_caches = {}
+_segment_caches_lock = threading.Lock()
+
+
+def get_segment_cache(background_path):
+    """Return the process-wide BackgroundSegmentCache for a background's folder"""
+    folder = os.path.dirname(os.path.abspath(background_path))
+    cache_dir = os.path.join(folder, CACHE_DIR_NAME, "segments")
+    with _segment_caches_lock:
+        if cache_dir not in _segment_caches:
+            _segment_caches[cache_dir] = BackgroundSegmentCache(cache_dir)
+        return _segment_caches[cache_dir]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass filter-graph compositor against the original
+two-pass moviepy path of video.generate_and_combine_videos.
+
+Slides that already match the profile's panel width skip scaling, so
+results depend on the width the project's slides were rendered at
+(SLIDE_WIDTH, 1920 by default) and on ENCODE_PROFILE. To measure smaller
+slides, render the project and run the benchmark with the same setting:
+
+Example:
+    python benchmarks/bench_compositor.py --project ASSETS/20250101_120000_pythagorea \
+        --character peter --background minecraft --runs 3
+    SLIDE_WIDTH=1080 ENCODE_PROFILE=standard python benchmarks/bench_compositor.py \
+        --project ASSETS/20250101_120000_pythagorea --character peter --background minecraft
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video import generate_and_combine_videos
+from encode_profiles import get_profile
+from StimStudy.media_format import SLIDE_FORMAT
+
+
+def cpu_seconds():
+    """User + system CPU time of this process and all reaped children (ffmpeg)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_engine(engine, args, scratch_dir):
+    """Run one engine once and return its wall-clock and CPU seconds"""
+    output_folder = os.path.join(scratch_dir, "character_clips")
+    final_output_path = os.path.join(scratch_dir, "final")
+    os.makedirs(output_folder, exist_ok=True)
+
+    start_cpu = cpu_seconds()
+    start_time = time.perf_counter()
+    final_path = generate_and_combine_videos(
+        audio_folder=os.path.join(args.project, "audio_clips"),
+        selected_character=args.character,
+        sprite_dir=args.sprite_dir,
+        selected_background=args.background,
+        background_folder=args.background_folder,
+        output_folder=output_folder,
+        slide_folder=os.path.join(args.project, "videos"),
+        final_output_path=final_output_path,
+        index=0,
+        title=f"bench_{engine}",
+        engine=engine,
+    )
+    wall = time.perf_counter() - start_time
+    cpu = cpu_seconds() - start_cpu
+
+    size = os.path.getsize(final_path) if final_path and os.path.exists(final_path) else 0
+    return {"wall_seconds": wall, "cpu_seconds": cpu, "output_bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark part compositing engines")
+    parser.add_argument("--project", required=True, help="ASSETS project directory with audio_clips/ and videos/")
+    parser.add_argument("--character", required=True, help="Character sprite directory name")
+    parser.add_argument("--background", required=True, help="Background video name (without .mp4)")
+    parser.add_argument("--sprite-dir", default="sprites")
+    parser.add_argument("--background-folder", default="backgroundVideos")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per engine (default: 3)")
+    parser.add_argument("--engines", nargs="+", default=["moviepy", "filtergraph"])
+    parser.add_argument("--json", dest="json_path", help="Write raw results to this JSON file")
+    args = parser.parse_args()
+
+    profile = get_profile()
+    print(f"Slide format {SLIDE_FORMAT}, encode profile {profile.name} ({profile.width}px panel)")
+
+    results = {}
+    for engine in args.engines:
+        runs = []
+        for run in range(args.runs):
+            scratch_dir = tempfile.mkdtemp(prefix=f"bench_{engine}_")
+            try:
+                runs.append(run_engine(engine, args, scratch_dir))
+            finally:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+            print(f"{engine} run {run + 1}/{args.runs}: "
+                  f"{runs[-1]['wall_seconds']:.2f}s wall, {runs[-1]['cpu_seconds']:.2f}s CPU")
+        results[engine] = runs
+
+    print("\n" + "=" * 70)
+    print(f"{'engine':<14}{'wall (min)':>14}{'wall (mean)':>14}{'CPU (mean)':>14}{'size (MB)':>14}")
+    print("-" * 70)
+    summary = {}
+    for engine, runs in results.items():
+        wall = [r["wall_seconds"] for r in runs]
+        cpu = [r["cpu_seconds"] for r in runs]
+        summary[engine] = {
+            "wall_min": min(wall),
+            "wall_mean": sum(wall) / len(wall),
+            "cpu_mean": sum(cpu) / len(cpu),
+        }
+        print(f"{engine:<14}{min(wall):>14.2f}{summary[engine]['wall_mean']:>14.2f}"
+              f"{summary[engine]['cpu_mean']:>14.2f}{runs[-1]['output_bytes'] / 1e6:>14.2f}")
+    print("=" * 70)
+
+    if "moviepy" in summary and "filtergraph" in summary:
+        baseline, candidate = summary["moviepy"], summary["filtergraph"]
+        print(f"Wall-clock saving: {(1 - candidate['wall_mean'] / baseline['wall_mean']) * 100:.1f}%")
+        print(f"CPU saving: {(1 - candidate['cpu_mean'] / baseline['cpu_mean']) * 100:.1f}%")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"slide_width": SLIDE_FORMAT.width, "profile": profile.name, "runs": results,
+                       "summary": summary}, f, indent=2)
+        print(f"Saved results to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
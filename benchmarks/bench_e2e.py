@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for StimStudy.master.generate_videos.
+
+Gemini and Fish Audio are replaced by the latency-injected fakes in
+fakes.py, and slides are rendered over HTTP by the fake render server, so
+the render client, the adaptive render scheduler and every thread pool run
+as they do in production. Each combination of --workers and
+--concurrent-topics is run on its own batch of topics and reported as
+topics/hour, mean per-stage time, and peak threads and RSS.
+
+Results are written as JSON to benchmarks/results/<time>_<commit>.json.
+--compare checks them against an earlier file and exits non-zero when
+throughput for any configuration dropped by more than --tolerance.
+
+Example:
+    python benchmarks/bench_e2e.py --topics 6 --workers 2 4 --concurrent-topics 1 2 4 --jitter 0.3
+    python benchmarks/bench_e2e.py --compare benchmarks/results/20261018_101500_f9e2b5b.json
+    python benchmarks/bench_e2e.py --compare OLD.json NEW.json
+    SLIDE_WIDTH=1080 python benchmarks/bench_e2e.py --topics 6
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import resource
+import threading
+import subprocess
+import contextlib
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The real clients are never called, but they are constructed at import time
+os.environ.setdefault("APIKEY", "fake")
+os.environ.setdefault("FISHAUDIO_API_KEY", "fake")
+
+from StimStudy import master
+from StimStudy.fake_render_server import start_fake_render_server
+from StimStudy.media_format import SLIDE_FORMAT
+from StimStudy.progress import TerminalView, TqdmHandler, get_dispatcher
+from StimStudy.render_scheduler import RenderScheduler
+from fakes import FakeLatencies, install_fakes
+
+STAGES = ("content_generation", "audio_generation", "video_rendering", "total")
+
+
+def rss_bytes():
+    """Current resident set size, or the peak so far where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ResourceSampler:
+    """Samples the thread count and RSS of this process on a background thread"""
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.stop = threading.Event()
+        self.start_rss = rss_bytes()
+        self.peak_rss = self.start_rss
+        self.peak_threads = threading.active_count()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def git_commit():
+    """Short hash of HEAD and whether the tree has uncommitted changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def run_config(args, workers, concurrent_topics, render_state, batch):
+    """Generate one batch of topics with the given concurrency and measure it"""
+    # A fresh scheduler per configuration so its adapted limit does not carry over
+    master.render_scheduler = RenderScheduler(
+        initial_limit=args.render_concurrency, max_limit=args.render_max_concurrency
+    )
+    with render_state.lock:
+        render_state.peak_in_flight = 0
+    render_before = render_state.stats()
+
+    # Every topic shares a long prefix and they start together, as a study plan's parts do,
+    # so they would collide if project directories were not unique per run
+    topics = [f"bench {batch} topic {i + 1}" for i in range(args.topics)]
+    with ResourceSampler() as sampler, contextlib.ExitStack() as quiet:
+        if not args.verbose:
+            quiet.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            quiet.enter_context(contextlib.redirect_stderr(io.StringIO()))
+        start = time.perf_counter()
+        results = master.generate_videos(
+            topics, "fake-voice", max_workers=workers, max_concurrent_topics=concurrent_topics,
+            slide_mode=args.slide_mode,
+        )
+        wall = time.perf_counter() - start
+
+    render_after = render_state.stats()
+    succeeded = [r for r in results if r["status"] == "success"]
+    scheduler_stats = master.render_scheduler.stats()
+    return {
+        "workers": workers,
+        "concurrent_topics": concurrent_topics,
+        "topics": len(topics),
+        "successful": len(succeeded),
+        "failed": len(topics) - len(succeeded),
+        "videos": sum(r["num_videos"] for r in succeeded),
+        "wall_seconds": wall,
+        "topics_per_hour": len(succeeded) / wall * 3600 if wall else 0.0,
+        "stage_seconds": {
+            stage: sum(r["processing_time"][stage] for r in succeeded) / len(succeeded) if succeeded else None
+            for stage in STAGES
+        },
+        "peak_threads": sampler.peak_threads,
+        "peak_rss_mb": sampler.peak_rss / 2 ** 20,
+        "rss_growth_mb": (sampler.peak_rss - sampler.start_rss) / 2 ** 20,
+        "render": {
+            "requests": render_after["requests"] - render_before["requests"],
+            "errors": render_after["errors"] - render_before["errors"],
+            "peak_in_flight": render_after["peak_in_flight"],
+        },
+        "scheduler": {
+            "limit": scheduler_stats["limit"],
+            "error_rate": scheduler_stats["error_rate"],
+            "wait_p95": scheduler_stats["wait_p95"],
+        },
+        "errors": sorted({r["error"] for r in results if r.get("error")})[:5],
+        "shared_project_dirs": len(results) - len({r["project_dir"] for r in results}),
+    }
+
+
+def print_runs(runs):
+    print("\n" + "=" * 96)
+    print(f"{'workers':>8}{'topics':>8}{'ok':>5}{'topics/h':>11}{'content':>10}{'audio':>9}{'render':>9}"
+          f"{'topic':>9}{'threads':>9}{'rss MB':>9}{'render err':>11}")
+    print("-" * 96)
+    for run in runs:
+        stages = {stage: seconds or 0.0 for stage, seconds in run["stage_seconds"].items()}
+        print(f"{run['workers']:>8}{run['concurrent_topics']:>8}{run['successful']:>5}"
+              f"{run['topics_per_hour']:>11.1f}{stages['content_generation']:>10.2f}"
+              f"{stages['audio_generation']:>9.2f}{stages['video_rendering']:>9.2f}{stages['total']:>9.2f}"
+              f"{run['peak_threads']:>9}{run['peak_rss_mb']:>9.1f}{run['render']['errors']:>11}")
+    print("=" * 96)
+    print("Stage columns are mean seconds per successful topic")
+
+
+def compare(baseline, current, tolerance):
+    """
+    Print throughput changes per configuration
+
+    Returns:
+        list: (workers, concurrent_topics) pairs that regressed by more than tolerance
+    """
+    def by_config(report):
+        return {(run["workers"], run["concurrent_topics"]): run for run in report["runs"]}
+
+    old_runs, new_runs = by_config(baseline), by_config(current)
+    print(f"\nComparing {baseline.get('commit')} -> {current.get('commit')}"
+          f"{' (uncommitted changes)' if current.get('dirty') else ''}")
+    print(f"{'workers':>8}{'topics':>8}{'before/h':>11}{'after/h':>11}{'change':>9}")
+    regressions = []
+    for config in sorted(old_runs.keys() & new_runs.keys()):
+        before = old_runs[config]["topics_per_hour"]
+        after = new_runs[config]["topics_per_hour"]
+        change = (after - before) / before if before else 0.0
+        regressed = change < -tolerance
+        if regressed:
+            regressions.append(config)
+        print(f"{config[0]:>8}{config[1]:>8}{before:>11.1f}{after:>11.1f}{change * 100:>8.1f}%"
+              f"{'  REGRESSION' if regressed else ''}")
+    missing = sorted(old_runs.keys() ^ new_runs.keys())
+    if missing:
+        print(f"Configurations in only one report: {missing}")
+    return regressions
+
+
+def load_report(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_videos throughput end to end")
+    parser.add_argument("--topics", type=int, default=4, help="Topics per configuration")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="max_workers values to sweep")
+    parser.add_argument("--concurrent-topics", type=int, nargs="+", default=[1, 2, 4],
+                        help="max_concurrent_topics values to sweep")
+    parser.add_argument("--slides", type=int, default=4)
+    parser.add_argument("--slide-mode", choices=master.SLIDE_MODES, default="sequential")
+    parser.add_argument("--script-latency", type=float, default=1.0)
+    parser.add_argument("--slide-latency", type=float, default=1.0)
+    parser.add_argument("--tts-latency", type=float, default=0.5)
+    parser.add_argument("--audio-seconds", type=float, default=10.0)
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Log-normal shape of every latency (0 for fixed latencies)")
+    parser.add_argument("--script-failure-rate", type=float, default=0.0)
+    parser.add_argument("--slide-failure-rate", type=float, default=0.0)
+    parser.add_argument("--tts-failure-rate", type=float, default=0.0)
+    parser.add_argument("--render-latency", type=float, default=0.05, help="Fixed render seconds per request")
+    parser.add_argument("--render-per-second", type=float, default=0.05,
+                        help="Render seconds per second of video")
+    parser.add_argument("--render-error-rate", type=float, default=0.0)
+    parser.add_argument("--render-capacity", type=int, default=None,
+                        help="Renders in flight before the fake server slows down")
+    parser.add_argument("--render-concurrency", type=int, default=4, help="Initial render scheduler limit")
+    parser.add_argument("--render-max-concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--results-dir", default=os.path.join(ROOT, "benchmarks", "results"))
+    parser.add_argument("--compare", nargs="+", metavar="REPORT",
+                        help="Baseline report to compare this run against, or two reports to compare")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Fractional topics/hour drop reported as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline report and optionally a second report")
+    if args.compare and len(args.compare) == 2:
+        regressions = compare(load_report(args.compare[0]), load_report(args.compare[1]), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    latencies = FakeLatencies(
+        script=args.script_latency,
+        slide=args.slide_latency,
+        tts=args.tts_latency,
+        slides=args.slides,
+        audio_seconds=args.audio_seconds,
+        jitter=args.jitter,
+        failure_rates={
+            "script": args.script_failure_rate,
+            "slide": args.slide_failure_rate,
+            "theme": args.script_failure_rate,
+            "tts": args.tts_failure_rate,
+        },
+        seed=args.seed,
+    )
+    install_fakes(master, latencies, render=False)
+
+    server, render_state = start_fake_render_server(
+        latency=args.render_latency,
+        seconds_per_second=args.render_per_second,
+        error_rate=args.render_error_rate,
+        capacity=args.render_capacity,
+    )
+    # The shared render client reads this on first use
+    os.environ["RENDER_API_URL"] = f"http://localhost:{server.server_port}/convert"
+
+    if not args.verbose:
+        dispatcher = get_dispatcher()
+        for handler in list(dispatcher.handlers):
+            if isinstance(handler, (TerminalView, TqdmHandler)):
+                dispatcher.remove_handler(handler)
+
+    configs = [(w, c) for w in args.workers for c in args.concurrent_topics]
+    runs = []
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        for batch, (workers, concurrent_topics) in enumerate(configs, start=1):
+            print(f"[{batch}/{len(configs)}] max_workers={workers} max_concurrent_topics={concurrent_topics}...",
+                  flush=True)
+            runs.append(run_config(args, workers, concurrent_topics, render_state, batch))
+    server.shutdown()
+
+    print_runs(runs)
+    # Regression check: concurrent topics with the same prefix must never share a project directory
+    shared = [run for run in runs if run["shared_project_dirs"]]
+    for run in shared:
+        print(f"❌ {run['shared_project_dirs']} topics shared a project directory "
+              f"(workers={run['workers']}, concurrent_topics={run['concurrent_topics']})")
+
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        # Set with SLIDE_WIDTH; reports are only comparable at the same slide size
+        "slide_width": SLIDE_FORMAT.width,
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("results_dir", "compare", "tolerance", "verbose")},
+        "runs": runs,
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    results_file = os.path.join(
+        args.results_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'unknown'}.json"
+    )
+    with open(results_file, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {results_file}")
+
+    if args.compare:
+        regressions = compare(load_report(args.compare[0]), report, args.tolerance)
+        sys.exit(1 if regressions or shared else 0)
+    if shared:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare encoding the parts of a study plan one after another in this
+process (the old /generateStudyPlanVideos loop) with the encode_pool
+process pool.
+
+Every part is built from the same ASSETS project, so the parts are equal
+in size and the pool should finish in about the time of one part when it
+has a process per part and enough cores.
+
+Example:
+    python benchmarks/bench_encode_pool.py --project ASSETS/20250101_120000_pythagorea \
+        --character peter --background minecraft --parts 6 --processes 6 --threads 4
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video import generate_and_combine_videos
+from encode_pool import EncodePool
+
+
+def make_parts(args, final_output_path):
+    return [
+        {
+            "audio_folder": os.path.join(args.project, "audio_clips"),
+            "selected_character": args.character,
+            "sprite_dir": args.sprite_dir,
+            "selected_background": args.background,
+            "background_folder": args.background_folder,
+            "slide_folder": os.path.join(args.project, "videos"),
+            "final_output_path": final_output_path,
+            "index": index,
+            "title": "bench_part",
+            "engine": args.engine,
+        }
+        for index in range(args.parts)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs process-pool part encoding")
+    parser.add_argument("--project", required=True, help="ASSETS project directory with audio_clips/ and videos/")
+    parser.add_argument("--character", required=True, help="Character sprite directory name")
+    parser.add_argument("--background", required=True, help="Background video name (without .mp4)")
+    parser.add_argument("--sprite-dir", default="sprites")
+    parser.add_argument("--background-folder", default="backgroundVideos")
+    parser.add_argument("--engine", choices=("filtergraph", "moviepy"), default="filtergraph")
+    parser.add_argument("--parts", type=int, default=6)
+    parser.add_argument("--processes", type=int, default=None, help="Pool processes (default: one per part)")
+    parser.add_argument("--threads", type=int, default=4, help="Encoder threads per pool process")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_encode_pool_")
+    try:
+        # Warm the background segment and sprite caches so neither run pays for them
+        parts = make_parts(args, os.path.join(scratch, "sequential"))
+        generate_and_combine_videos(**dict(parts[0], final_output_path=os.path.join(scratch, "warm")),
+                                    output_folder=os.path.join(scratch, "warm"))
+
+        start = time.perf_counter()
+        for part in parts:
+            output_folder = os.path.join(scratch, f"clips_{part['index']}")
+            os.makedirs(output_folder, exist_ok=True)
+            generate_and_combine_videos(**part, output_folder=output_folder)
+        sequential = time.perf_counter() - start
+
+        pool = EncodePool(args.processes or args.parts, args.threads, os.path.join(scratch, "workers"))
+        # Start the workers before timing, as the app's long-lived pool would be
+        pool.encode(make_parts(args, os.path.join(scratch, "warm"))[:1])
+        start = time.perf_counter()
+        results = pool.encode(make_parts(args, os.path.join(scratch, "pool")))
+        pooled = time.perf_counter() - start
+        pool.shutdown()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    longest = max(result["seconds"] for result in results)
+    print("\n" + "=" * 60)
+    print(f"{args.parts} parts, {args.processes or args.parts} processes x {args.threads} threads, "
+          f"{os.cpu_count()} cores")
+    print(f"Sequential in-process: {sequential:8.2f}s")
+    print(f"Process pool:          {pooled:8.2f}s  ({sequential / pooled:.2f}x)")
+    print(f"Longest single part:   {longest:8.2f}s  (pool overhead {pooled - longest:.2f}s)")
+    print(f"Workers used:          {len({result['pid'] for result in results})}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
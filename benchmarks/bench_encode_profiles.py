@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Encode time against file size for every profile in encode_profiles.py.
+
+Each profile builds the same ASSETS project with
+video.generate_and_combine_videos. The table reports wall-clock time,
+encode seconds per second of video (the figure choose_profile() compares
+against a latency budget), output size and bitrate.
+
+Example:
+    python benchmarks/bench_encode_profiles.py --project ASSETS/20250101_120000_pythagorea \
+        --character peter --background minecraft --runs 3 --threads 4
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video import generate_and_combine_videos
+from encode_profiles import PROFILES
+
+
+def run_profile(profile, args, scratch_dir):
+    """Build the project once with a profile and return its wall-clock seconds and output size"""
+    output_folder = os.path.join(scratch_dir, "clips")
+    os.makedirs(output_folder, exist_ok=True)
+    start = time.perf_counter()
+    final_path = generate_and_combine_videos(
+        audio_folder=os.path.join(args.project, "audio_clips"),
+        selected_character=args.character,
+        sprite_dir=args.sprite_dir,
+        selected_background=args.background,
+        background_folder=args.background_folder,
+        output_folder=output_folder,
+        slide_folder=os.path.join(args.project, "videos"),
+        final_output_path=os.path.join(scratch_dir, "final"),
+        index=0,
+        title=f"bench_{profile}",
+        engine=args.engine,
+        threads=args.threads,
+        profile=profile,
+    )
+    return time.perf_counter() - start, os.path.getsize(final_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark encode profiles")
+    parser.add_argument("--project", required=True, help="ASSETS project directory with audio_clips/ and videos/")
+    parser.add_argument("--character", required=True, help="Character sprite directory name")
+    parser.add_argument("--background", required=True, help="Background video name (without .mp4)")
+    parser.add_argument("--sprite-dir", default="sprites")
+    parser.add_argument("--background-folder", default="backgroundVideos")
+    parser.add_argument("--engine", choices=("filtergraph", "moviepy"), default="filtergraph")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--threads", type=int, default=None, help="Encoder threads (default: all cores)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per profile (default: 3)")
+    parser.add_argument("--json", dest="json_path", help="Write raw results to this JSON file")
+    args = parser.parse_args()
+
+    from mutagen.mp3 import MP3
+    audio_dir = os.path.join(args.project, "audio_clips")
+    content_seconds = sum(
+        MP3(os.path.join(audio_dir, f)).info.length for f in os.listdir(audio_dir) if f.endswith(".mp3")
+    )
+
+    # Warm the background segment and sprite caches so the first profile does not pay for them
+    for profile in args.profiles:
+        scratch_dir = tempfile.mkdtemp(prefix="bench_profile_warm_")
+        try:
+            run_profile(profile, args, scratch_dir)
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    results = {}
+    for profile in args.profiles:
+        runs = []
+        for run in range(args.runs):
+            scratch_dir = tempfile.mkdtemp(prefix=f"bench_profile_{profile}_")
+            try:
+                runs.append(run_profile(profile, args, scratch_dir))
+            finally:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+        wall = min(seconds for seconds, _ in runs)
+        size = runs[-1][1]
+        results[profile] = {
+            "wall_seconds": wall,
+            "seconds_per_second": wall / content_seconds,
+            "output_bytes": size,
+            "kbps": size * 8 / content_seconds / 1000,
+        }
+
+    print("\n" + "=" * 84)
+    print(f"{content_seconds:.1f}s of video, {args.engine} engine, "
+          f"{args.threads or 'all'} encoder threads, best of {args.runs}")
+    print(f"{'profile':<10}{'preset':<11}{'crf':>4}{'frame':>11}{'encode (s)':>12}{'s/s':>8}"
+          f"{'size (MB)':>12}{'kbit/s':>10}")
+    print("-" * 84)
+    for name, result in results.items():
+        profile = PROFILES[name]
+        frame = "x".join(map(str, profile.frame_size)) if profile.frame_size else f"{profile.width}w"
+        print(f"{name:<10}{profile.preset:<11}{profile.crf:>4}{frame:>11}{result['wall_seconds']:>12.2f}"
+              f"{result['seconds_per_second']:>8.2f}{result['output_bytes'] / 1e6:>12.2f}{result['kbps']:>10.0f}")
+    print("=" * 84)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"content_seconds": content_seconds, "results": results}, f, indent=2)
+        print(f"Saved results to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
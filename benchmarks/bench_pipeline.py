@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compare the staged and the per-slide pipelined topic runners in
+StimStudy.master using latency-injected fakes for Gemini, Fish Audio and
+the render server.
+
+Example:
+    python benchmarks/bench_pipeline.py --slides 4 --slide-latency 3 --tts-latency 1.5
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The real clients are never called, but they are constructed at import time
+os.environ.setdefault("APIKEY", "fake")
+os.environ.setdefault("FISHAUDIO_API_KEY", "fake")
+
+from StimStudy import master
+from fakes import FakeLatencies, install_fakes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark staged vs pipelined topic processing")
+    parser.add_argument("--slides", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--script-latency", type=float, default=1.5)
+    parser.add_argument("--slide-latency", type=float, default=3.0)
+    parser.add_argument("--tts-latency", type=float, default=1.5)
+    parser.add_argument("--render-per-second", type=float, default=0.2,
+                        help="Fake render seconds per second of audio")
+    parser.add_argument("--audio-seconds", type=float, default=10.0)
+    parser.add_argument("--slide-modes", nargs="+", default=["sequential"],
+                        choices=master.SLIDE_MODES, help="Slide HTML modes to compare")
+    args = parser.parse_args()
+
+    latencies = FakeLatencies(
+        script=args.script_latency,
+        slide=args.slide_latency,
+        tts=args.tts_latency,
+        render_per_second=args.render_per_second,
+        slides=args.slides,
+        audio_seconds=args.audio_seconds,
+    )
+    install_fakes(master, latencies)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        for slide_mode in args.slide_modes:
+            for name, pipelined in (("staged", False), ("pipelined", True)):
+                mode = f"{name}/{slide_mode}"
+                start = time.perf_counter()
+                result = master.process_topic("benchmark topic", "fake-voice", args.workers,
+                                              pipelined=pipelined, slide_mode=slide_mode)
+                wall = time.perf_counter() - start
+                if result["status"] != "success":
+                    raise SystemExit(f"{mode} run failed: {result['error']}")
+                results[mode] = dict(result["processing_time"], wall=wall)
+
+    print("\n" + "=" * 70)
+    print(f"{'mode':<22}{'content':>10}{'audio':>10}{'render':>10}{'end-to-end':>14}")
+    print("-" * 70)
+    for mode, times in results.items():
+        print(f"{mode:<22}{times['content_generation']:>10.2f}{times['audio_generation']:>10.2f}"
+              f"{times['video_rendering']:>10.2f}{times['wall']:>14.2f}")
+    print("=" * 70)
+    baseline = results[f"staged/{args.slide_modes[0]}"]["wall"]
+    for mode, times in results.items():
+        print(f"{mode}: {(1 - times['wall'] / baseline) * 100:.1f}% faster than staged/{args.slide_modes[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Exercise the pooled render client against the local fake render server.
+
+Compares a bare requests.post per slide with no timeout (the old behaviour)
+with the shared RenderClient, and reports throughput, TCP connections
+opened, peak concurrency seen by the server, failures and the slowest
+single render after injected 5xx errors and hung requests.
+
+Example:
+    python benchmarks/bench_render_client.py --slides 48 --threads 8 --error-rate 0.1 --hang-rate 0.05
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import concurrent.futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from StimStudy.fake_render_server import start_fake_render_server
+from StimStudy.render_client import RenderClient
+
+HTML = "<html><body><h1>Pythagorean Theorem</h1></body></html>"
+
+
+def bare_convert(api_url, output_path, duration):
+    payload = {"html": HTML, "duration": duration, "frameRate": 30,
+               "outputPath": os.path.abspath(output_path)}
+    response = requests.post(api_url, json=payload)
+    if response.status_code != 200 or not response.json().get("success"):
+        raise RuntimeError(f"Render failed: {response.status_code}")
+
+
+def run(mode, args):
+    server, state = start_fake_render_server(
+        latency=args.latency,
+        seconds_per_second=args.seconds_per_second,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+    )
+    api_url = f"http://localhost:{server.server_port}/convert"
+    client = RenderClient(api_url, pool_size=args.threads, backoff_factor=0.05,
+                          read_timeout=args.read_timeout, read_timeout_per_second=1.0)
+
+    def convert(output_path):
+        start = time.perf_counter()
+        if mode == "pooled":
+            client.convert(HTML, args.duration, output_path)
+        else:
+            bare_convert(api_url, output_path, args.duration)
+        return time.perf_counter() - start
+
+    failures = 0
+    slowest = 0.0
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
+            futures = [
+                executor.submit(convert, os.path.join(scratch, f"slide_{i}.mp4"))
+                for i in range(args.slides)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                if future.exception():
+                    failures += 1
+                else:
+                    slowest = max(slowest, future.result())
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    result = state.stats()
+    result.update({
+        "mode": mode,
+        "seconds": elapsed,
+        "slides_per_second": args.slides / elapsed,
+        "failures": failures,
+        "slowest": slowest,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pooled render client against a fake server")
+    parser.add_argument("--slides", type=int, default=48)
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent render slots")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds of video per slide")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--seconds-per-second", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--hang-rate", type=float, default=0.05)
+    parser.add_argument("--hang-seconds", type=float, default=10.0)
+    parser.add_argument("--read-timeout", type=float, default=1.0,
+                        help="Pooled client's base read timeout")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'seconds':>10}{'slides/s':>10}{'requests':>10}{'conns':>8}"
+          f"{'peak':>6}{'failed':>8}{'slowest':>10}")
+    print("-" * 72)
+    for mode in ("bare", "pooled"):
+        r = run(mode, args)
+        print(f"{r['mode']:<10}{r['seconds']:>10.2f}{r['slides_per_second']:>10.1f}{r['requests']:>10}"
+              f"{r['connections']:>8}{r['peak_in_flight']:>6}{r['failures']:>8}{r['slowest']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
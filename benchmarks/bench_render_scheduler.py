@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compare the old fixed render semaphore with the adaptive RenderScheduler.
+
+Several topics render against one fake render server that slows down past
+its capacity and answers 503 when overloaded. The first topic is large and
+submitted first, so first-come-first-served admission makes the small
+topics wait behind it. Reports per-topic completion time, failures, the
+limit the scheduler settled on, and queue wait times.
+
+Example:
+    python benchmarks/bench_render_scheduler.py --big-slides 24 --small-slides 4 --capacity 6
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+import concurrent.futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from StimStudy.fake_render_server import start_fake_render_server
+from StimStudy.render_client import RenderClient, RenderError
+from StimStudy.render_scheduler import RenderScheduler
+
+HTML = "<html><body><h1>Slide</h1></body></html>"
+
+
+class FixedLimit:
+    """The old behaviour: threading.Semaphore(4), first come first served"""
+    def __init__(self, limit):
+        self.semaphore = threading.Semaphore(limit)
+
+    @contextlib.contextmanager
+    def slot(self, topic=None, priority=0, cost=1.0):
+        with self.semaphore:
+            yield None
+
+
+def run(mode, args, topics):
+    server, state = start_fake_render_server(
+        latency=args.latency,
+        seconds_per_second=args.seconds_per_second,
+        capacity=args.capacity,
+        max_in_flight=args.max_in_flight,
+    )
+    client = RenderClient(f"http://localhost:{server.server_port}/convert", pool_size=32,
+                          max_retries=0)
+    scheduler = FixedLimit(4) if mode == "fixed" else RenderScheduler(initial_limit=4, max_limit=32)
+
+    def render(topic, output_path):
+        with scheduler.slot(topic, cost=args.duration) as ticket:
+            try:
+                client.convert(HTML, args.duration, output_path)
+                return True
+            except RenderError:
+                if ticket is not None:
+                    ticket.fail()
+                return False
+
+    def render_topic(topic, slides, scratch):
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(
+                lambda i: render(topic, os.path.join(scratch, f"{topic}_{i}.mp4")), range(slides)
+            ))
+        return time.perf_counter() - start, results.count(False)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(topics)) as executor:
+            futures = {}
+            for topic, slides in topics:
+                futures[topic] = executor.submit(render_topic, topic, slides, scratch)
+                time.sleep(0.01)
+            per_topic = {topic: future.result() for topic, future in futures.items()}
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    stats = scheduler.stats() if mode == "adaptive" else {}
+    return elapsed, per_topic, state.stats(), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fixed vs adaptive render admission")
+    parser.add_argument("--big-slides", type=int, default=24)
+    parser.add_argument("--small-slides", type=int, default=4)
+    parser.add_argument("--small-topics", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=8, help="Render threads per topic")
+    parser.add_argument("--duration", type=float, default=4.0, help="Seconds of video per slide")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--seconds-per-second", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=8, help="Fake server capacity")
+    parser.add_argument("--max-in-flight", type=int, default=12, help="Fake server 503 threshold")
+    args = parser.parse_args()
+
+    topics = [("big", args.big_slides)] + [(f"small{i + 1}", args.small_slides) for i in range(args.small_topics)]
+
+    for mode in ("fixed", "adaptive"):
+        elapsed, per_topic, server_stats, stats = run(mode, args, topics)
+        print(f"\n{mode}: {elapsed:.2f}s total, server peak {server_stats['peak_in_flight']} in flight, "
+              f"{server_stats['errors']} overload errors")
+        for topic, (seconds, failed) in per_topic.items():
+            print(f"  {topic:<8} done after {seconds:6.2f}s  failed {failed}")
+        if stats:
+            print(f"  settled limit {stats['limit']} ({stats['increases']} increases, {stats['decreases']} decreases), "
+                  f"wait mean {stats['wait_mean']:.2f}s p95 {stats['wait_p95']:.2f}s, "
+                  f"peak queue {stats['peak_queue_depth']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compare time to first token for the buffered and streamed study plan and
+chat endpoints, using the local fake model (FAKE_MODEL=1) so no API key or
+network is needed.
+
+Example:
+    python benchmarks/bench_streaming.py --tokens-per-second 40 --first-token-latency 0.4
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def timed(client, path, body):
+    """Return (seconds to first body chunk, seconds to last chunk) for one POST"""
+    start = time.perf_counter()
+    response = client.post(path, json=body, buffered=False)
+    first = None
+    for chunk in response.response:
+        if chunk and first is None:
+            first = time.perf_counter() - start
+    response.close()
+    return first or 0.0, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed vs buffered model responses")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    args = parser.parse_args()
+
+    os.environ["FAKE_MODEL"] = "1"
+    os.environ["FAKE_MODEL_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_MODEL_FIRST_TOKEN_LATENCY"] = str(args.first_token_latency)
+    # The real clients are never called, but StimStudy constructs them at import time
+    os.environ.setdefault("APIKEY", "fake")
+    os.environ.setdefault("FISHAUDIO_API_KEY", "fake")
+    os.chdir(ROOT)
+
+    import app as app_module
+    client = app_module.app.test_client()
+    session_id = client.post("/chat/start", json={}).get_json()["session_id"]
+
+    # The field that varies per run, so the prompt cache never answers
+    cases = [
+        ("createStudyPlan", {"prompt": "linear algebra"}, "prompt"),
+        ("refineStudyPlan", {"studyPlan": "[]", "refinement": "add a part on eigenvalues"}, "refinement"),
+        ("chat/message", {"session_id": session_id, "message": "What is an eigenvector?"}, "message"),
+    ]
+
+    results = []
+    for path, payload, field in cases:
+        for suffix, mode in (("", "buffered"), ("/stream", "streamed")):
+            body = dict(payload, **{field: f"{payload[field]} ({mode})"})
+            results.append((path, mode) + timed(client, f"/{path}{suffix}", body))
+
+    print(f"\n{'endpoint':<22}{'mode':<10}{'first byte':>12}{'complete':>12}")
+    print("-" * 56)
+    for path, mode, first, total in results:
+        print(f"{path:<22}{mode:<10}{first:>12.3f}{total:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Exercise the shared TTS client against the local fake Fish Audio server.
+
+Compares one fresh fish_audio_sdk.Session per clip (the old behaviour) with
+the pooled, rate-limited TTSClient, and reports throughput, TCP connections
+opened, peak concurrency seen by the server and retries after injected
+429/5xx responses.
+
+Example:
+    python benchmarks/bench_tts_client.py --clips 64 --threads 16 --error-rate 0.1
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import concurrent.futures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fish_audio_sdk import Session, TTSRequest
+from StimStudy.fake_tts_server import start_fake_tts_server
+from StimStudy.tts_client import TTSClient
+from StimStudy.mp3_duration import MP3DurationCounter
+
+SCRIPT = "Yo, what up, mathletes? Ever heard of the Pythagorean Theorem? Bet. " * 2
+
+
+def synthesize(stream, output_file):
+    counter = MP3DurationCounter()
+    with open(output_file, "wb") as f:
+        for chunk in stream(TTSRequest(text=SCRIPT)):
+            f.write(chunk)
+            counter.feed(chunk)
+    return counter.duration
+
+
+def run(mode, args):
+    server, state = start_fake_tts_server(latency=args.latency, error_rate=args.error_rate)
+    base_url = f"http://localhost:{server.server_port}"
+    client = TTSClient("fake", base_url=base_url, max_concurrency=args.max_concurrency,
+                       rate_per_second=args.rate, burst=args.burst, backoff_base=0.05)
+
+    def fresh_session_stream(request):
+        return Session("fake", base_url=base_url).tts(request)
+
+    stream = client.stream if mode == "pooled" else fresh_session_stream
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
+            futures = [
+                executor.submit(synthesize, stream, os.path.join(scratch, f"clip_{i}.mp3"))
+                for i in range(args.clips)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                if future.exception():
+                    failures += 1
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    result = state.stats()
+    result.update({
+        "mode": mode,
+        "seconds": elapsed,
+        "clips_per_second": args.clips / elapsed,
+        "failures": failures,
+        "retries": client.stats()["retries"] if mode == "pooled" else 0,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pooled TTS client against a fake server")
+    parser.add_argument("--clips", type=int, default=48)
+    parser.add_argument("--threads", type=int, default=16, help="Caller threads (topics x workers)")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=50.0, help="Token bucket rate (requests/second)")
+    parser.add_argument("--burst", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'seconds':>10}{'clips/s':>10}{'requests':>10}{'conns':>8}"
+          f"{'peak':>6}{'retries':>9}{'failed':>8}")
+    print("-" * 71)
+    for mode in ("fresh", "pooled"):
+        r = run(mode, args)
+        print(f"{r['mode']:<10}{r['seconds']:>10.2f}{r['clips_per_second']:>10.1f}{r['requests']:>10}"
+              f"{r['connections']:>8}{r['peak_in_flight']:>6}{r['retries']:>9}{r['failures']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Latency-injected stand-ins for the external services used by StimStudy.master.
+
+install_fakes() swaps the Gemini, Fish Audio and render-server calls that
+master.py imported for local fakes that only sleep and write placeholder
+files, so pipeline scheduling can be measured without network access.
+Latencies can be jittered (log-normal around the configured median) and
+each fake can fail at a configured rate, like the real services do.
+"""
+
+import os
+import json
+import math
+import time
+import random
+
+SILENT_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes(413)
+
+
+class FakeServiceError(Exception):
+    """Injected failure from a fake service"""
+
+
+class FakeLatencies:
+    """
+    Seconds spent in each fake service call
+
+    Each latency is the median of a log-normal distribution with shape
+    `jitter` (0 gives fixed latencies). failure_rates maps "script",
+    "slide", "theme" and "tts" to the fraction of calls that raise.
+    """
+    def __init__(self, script=1.5, slide=3.0, tts=1.0, render_per_second=0.2,
+                 slides=4, audio_seconds=10.0, jitter=0.0, failure_rates=None, seed=None):
+        self.script = script
+        self.slide = slide
+        self.tts = tts
+        self.render_per_second = render_per_second
+        self.slides = slides
+        self.audio_seconds = audio_seconds
+        self.jitter = jitter
+        self.failure_rates = failure_rates or {}
+        self.random = random.Random(seed)
+
+    def sample(self, median):
+        """One latency draw around median seconds"""
+        if not self.jitter or median <= 0:
+            return median
+        return self.random.lognormvariate(math.log(median), self.jitter)
+
+    def call(self, service, median):
+        """Sleep like one call to a service, raising FakeServiceError at its failure rate"""
+        time.sleep(self.sample(median))
+        if self.random.random() < self.failure_rates.get(service, 0.0):
+            raise FakeServiceError(f"Injected {service} failure")
+
+
+def make_fakes(latencies):
+    """Build fake replacements for master's external calls"""
+    def create_script_and_slides(prompt):
+        latencies.call("script", latencies.script)
+        return json.dumps([
+            {"script": f"{prompt} part {i + 1}", "visual_description": f"Slide {i + 1} about {prompt}"}
+            for i in range(latencies.slides)
+        ])
+
+    def create_slide(script, visual_description, previous_slides):
+        latencies.call("slide", latencies.slide)
+        return f"```html\n<html><body><h1>{visual_description}</h1></body></html>\n```"
+
+    def create_theme(slides):
+        latencies.call("theme", latencies.script)
+        return "<style>body { background: #111; color: #fff; }</style>"
+
+    def create_slide_with_style(script, visual_description, style_context):
+        return create_slide(script, visual_description, style_context)
+
+    def synthesize_to_file(text, output_file, reference_id=None):
+        latencies.call("tts", latencies.tts)
+        with open(output_file, "wb") as f:
+            f.write(SILENT_FRAME * 8)
+        return latencies.audio_seconds
+
+    def process_html_file(html_file_path, audio_durations=None, output_videos_dir=None, duration=None):
+        if duration is None:
+            duration = audio_durations[0]["duration_seconds"] if audio_durations else 5
+        time.sleep(latencies.sample(latencies.render_per_second * duration))
+        name = os.path.splitext(os.path.basename(html_file_path))[0]
+        with open(os.path.join(output_videos_dir, f"{name}.mp4"), "wb") as f:
+            f.write(b"\0")
+        return True
+
+    return {
+        "create_script_and_slides": create_script_and_slides,
+        "create_slide": create_slide,
+        "create_theme": create_theme,
+        "create_slide_with_style": create_slide_with_style,
+        "synthesize_to_file": synthesize_to_file,
+        "process_html_file": process_html_file,
+    }
+
+
+def install_fakes(master, latencies, render=True):
+    """
+    Patch the fakes into the master module; returns the originals
+
+    With render=False the real process_html_file is kept, so renders go over
+    HTTP to whatever RENDER_API_URL points at (e.g. the fake render server).
+    """
+    fakes = make_fakes(latencies)
+    if not render:
+        del fakes["process_html_file"]
+    originals = {name: getattr(master, name) for name in fakes}
+    for name, fake in fakes.items():
+        setattr(master, name, fake)
+    return originals
@@ -1,5 +1,16 @@
 import os
+import json
+import hashlib
+import copy
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
+from google.generativeai import caching
+from chat_store import SessionStore, SessionConflictError, make_backend_from_env, new_record
+from StimStudy.tracing import span
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -8,11 +19,198 @@ load_dotenv()
 # Configure the Google Generative AI API
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+CHAT_MODEL = "gemini-2.0-flash"
+
+
+def make_model(system_instruction=None):
+    """Create a chat model (FAKE_MODEL=1 swaps in a local token emitter, see fake_model.py)"""
+    if os.getenv("FAKE_MODEL"):
+        from fake_model import FakeChatModel
+        return FakeChatModel.from_env(system_instruction=system_instruction)
+    return genai.GenerativeModel(model_name=CHAT_MODEL, system_instruction=system_instruction)
+
+
 # Create a chat model
-model = genai.GenerativeModel(model_name="gemini-2.0-flash")
+model = make_model()
+
+# One model per distinct study plan, with the plan as its system instruction.
+# Sessions on the same plan share it, and it is only built on a session's first message.
+plan_models = OrderedDict()  # plan key -> (model, expires_at or None)
+plan_models_lock = threading.Lock()
+MAX_PLAN_MODELS = int(os.getenv("CHAT_MAX_PLAN_MODELS", "128"))
+
+# A plain system instruction is sent, and billed, with every turn. Plans at
+# least this many (estimated) tokens long are stored once as a Gemini context
+# cache instead; Gemini rejects caches below a per-model minimum, so typical
+# study plans stay below this and keep the plain system instruction
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CHAT_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CONTEXT_CACHE_TTL", "3600"))
+# Models are replaced this long before their context cache expires
+CONTEXT_CACHE_REFRESH_SECONDS = 60
+
+
+def plan_key(study_plan):
+    """Stable hash of a study plan, whatever order its keys arrive in"""
+    payload = json.dumps(study_plan, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_plan_model(system_instruction):
+    """
+    Create the model for one study plan, backed by a context cache when the plan is large enough
+
+    Returns:
+        tuple: (model, expires_at), where expires_at is the time.monotonic() after
+               which the model must be replaced, or None if it has no context cache
+    """
+    if os.getenv("FAKE_MODEL") or estimate_tokens(system_instruction) < CONTEXT_CACHE_MIN_TOKENS:
+        return make_model(system_instruction), None
+    try:
+        cached_content = caching.CachedContent.create(
+            model=f"models/{CHAT_MODEL}",
+            display_name="study plan",
+            system_instruction=system_instruction,
+            ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS),
+        )
+    except Exception as e:
+        print(f"⚠️ Could not cache the study plan, sending it with every turn: {e}")
+        return make_model(system_instruction), None
+    expires_at = time.monotonic() + CONTEXT_CACHE_TTL_SECONDS - CONTEXT_CACHE_REFRESH_SECONDS
+    return genai.GenerativeModel.from_cached_content(cached_content), expires_at
+
+
+def model_for_plan(study_plan):
+    """Return the shared model that carries this study plan as its system instruction or context cache"""
+    if not study_plan:
+        return model
 
-# Initialize chat sessions dictionary to store conversation history
-chat_sessions = {}
+    key = plan_key(study_plan)
+    with plan_models_lock:
+        entry = plan_models.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+            plan_models.move_to_end(key)
+            return entry[0]
+
+    system_instruction = (
+        f"The user is currently studying the following study plan: {study_plan} "
+        "When responding be very concise and to the point, 2 sentences max."
+    )
+    entry = make_plan_model(system_instruction)
+    with plan_models_lock:
+        current = plan_models.get(key)
+        if current is not None and (current[1] is None or current[1] > time.monotonic()):
+            entry = current
+        plan_models[key] = entry
+        plan_models.move_to_end(key)
+        # Evicted context caches are left to expire on their TTL, since a stream may still be using them
+        while len(plan_models) > MAX_PLAN_MODELS:
+            plan_models.popitem(last=False)
+    return entry[0]
+
+# Session records (plain history, summary, study plan) live in a bounded,
+# optionally SQLite-backed store instead of a dict of live ChatSession objects
+session_store = SessionStore(make_backend_from_env())
+
+# Once a session's history passes this many (estimated) tokens, older turns
+# are folded into a summary and only the most recent messages are kept verbatim
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "4000"))
+KEEP_RECENT_MESSAGES = int(os.getenv("CHAT_KEEP_RECENT_MESSAGES", "6"))
+
+# Longest a streamed reply keeps its session claimed (see stream_chat_message)
+STREAM_LEASE_SECONDS = float(os.getenv("CHAT_STREAM_LEASE_SECONDS", "120"))
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def build_history(record):
+    """Turn a session record into the history list start_chat expects"""
+    history = []
+    if record["summary"]:
+        history.append({"role": "user", "parts": [f"Summary of our conversation so far: {record['summary']}"]})
+        history.append({"role": "model", "parts": ["Understood."]})
+    for turn in record["history"]:
+        history.append({"role": turn["role"], "parts": [turn["text"]]})
+    return history
+
+
+def compact_history(record):
+    """
+    Summarize older turns once the history exceeds HISTORY_TOKEN_BUDGET
+
+    The most recent KEEP_RECENT_MESSAGES messages are kept as they are; the
+    rest, together with any earlier summary, are replaced by a new summary.
+
+    Returns:
+        bool: Whether the history was compacted
+    """
+    history = record["history"]
+    used = estimate_tokens(record["summary"]) + sum(estimate_tokens(turn["text"]) for turn in history)
+    if used <= HISTORY_TOKEN_BUDGET or len(history) <= KEEP_RECENT_MESSAGES:
+        return False
+
+    # Keep user/model pairs together
+    keep = KEEP_RECENT_MESSAGES - (KEEP_RECENT_MESSAGES % 2)
+    older = history[:len(history) - keep]
+    transcript = "\n".join(f"{turn['role']}: {turn['text']}" for turn in older)
+    prompt = (
+        "Summarize this tutoring conversation in at most 150 words. Keep the topics covered, "
+        "what the student struggled with and any facts they will need later.\n\n"
+        f"Earlier summary: {record['summary'] or 'none'}\n\nConversation:\n{transcript}"
+    )
+    record["summary"] = model.generate_content(prompt).text
+    record["history"] = history[len(older):]
+    return True
+
+
+def record_turn(record, message, reply):
+    """Append a user message and the model's reply"""
+    record["history"].append({"role": "user", "text": message})
+    record["history"].append({"role": "model", "text": reply})
+
+
+# Compaction runs after a turn is saved, off the request path and outside the session lock
+compaction_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHAT_COMPACTION_WORKERS", "2")), thread_name_prefix="chat-compaction"
+)
+compacting = set()
+compacting_lock = threading.Lock()
+
+
+def compact_session(session_id):
+    """
+    Compact a saved session's history, best effort
+
+    The summary is generated from a snapshot without holding the session
+    lock, then applied only if the session still starts with the turns that
+    were summarized. Any failure is logged and the raw history is kept.
+    """
+    try:
+        snapshot = session_store.load(session_id)
+        compacted = copy.deepcopy(snapshot)
+        if not compact_history(compacted):
+            return
+        folded = snapshot["history"][:len(snapshot["history"]) - len(compacted["history"])]
+        with session_store.session(session_id) as record:
+            if record["summary"] == snapshot["summary"] and record["history"][:len(folded)] == folded:
+                record["summary"] = compacted["summary"]
+                record["history"] = record["history"][len(folded):]
+    except Exception as e:
+        print(f"⚠️ Could not compact chat session {session_id}, keeping its full history: {e}")
+    finally:
+        with compacting_lock:
+            compacting.discard(session_id)
+
+
+def schedule_compaction(session_id):
+    """Compact a session in the background unless it is already being compacted"""
+    with compacting_lock:
+        if session_id in compacting:
+            return
+        compacting.add(session_id)
+    compaction_executor.submit(compact_session, session_id)
 
 
 def start_new_chat(study_plan=None):
@@ -23,21 +221,16 @@ def start_new_chat(study_plan=None):
         study_plan (dict, optional): The study plan to contextualize the chat
 
     Returns:
-        tuple: (session_id, chat_instance)
+        str: The new session's ID
     """
-    session_id = str(len(chat_sessions) + 1)  # Simple ID generation
-    chat = model.start_chat(history=[])
-
-    # If a study plan is provided, send an initial system message
-    if study_plan:
-        # Create a system message that provides context about the study plan
-        context_message = f"The user is currently studying the following study plan: {study_plan} When responding be very concise and to the point, 2 sentences max."
-        chat.send_message(context_message)
+    # No model call here: the study plan is attached to a shared per-plan model
+    # (see model_for_plan) the first time the session sends a message
+    record = new_record(study_plan)
 
     # Store the chat session
-    chat_sessions[session_id] = chat
+    session_store.create(record)
 
-    return session_id
+    return record["id"]
 
 
 def send_chat_message(session_id, message):
@@ -53,17 +246,63 @@ def send_chat_message(session_id, message):
 
     Raises:
         ValueError: If the session_id is invalid
+        SessionConflictError: If another worker answered this session at the same time, or a
+                              streamed reply on it is in progress
     """
-    if session_id not in chat_sessions:
-        raise ValueError(f"Invalid session ID: {session_id}")
+    with session_store.session(session_id) as record:
+        # Rebuild the chat from the stored (possibly summarized) history
+        chat = model_for_plan(record["study_plan"]).start_chat(history=build_history(record))
+        with span("chat_send_message", job=session_id):
+            response = chat.send_message(message)
+        record_turn(record, message, response.text)
+    schedule_compaction(session_id)
 
-    # Get the chat session
-    chat = chat_sessions[session_id]
+    return response.text
 
-    # Send the message to the model
-    response = chat.send_message(message)
 
-    return response.text
+def stream_chat_message(session_id, message):
+    """
+    Send a message to an existing chat session and stream the reply
+
+    The session is claimed before anything is sent, so an invalid ID or a
+    conflicting turn fails immediately instead of partway through a
+    response. The claim is a lease of CHAT_STREAM_LEASE_SECONDS rather than
+    the session lock: other turns on the session fail fast with
+    SessionConflictError while the reply streams, and a stalled client
+    blocks them for at most the lease. The turn is saved once the reply
+    completes; a failed or abandoned stream releases the session unchanged.
+
+    Args:
+        session_id (str): The ID of the chat session
+        message (str): The message to send
+
+    Returns:
+        generator: Text chunks of the response as the model produces them
+
+    Raises:
+        ValueError: If the session_id is invalid
+        SessionConflictError: If another turn on the session is in progress
+    """
+    record = session_store.claim(session_id, STREAM_LEASE_SECONDS)
+
+    def chunks():
+        completed = False
+        try:
+            chat = model_for_plan(record["study_plan"]).start_chat(history=build_history(record))
+            parts = []
+            with span("chat_send_message_stream", job=session_id):
+                for chunk in chat.send_message(message, stream=True):
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield chunk.text
+            record_turn(record, message, "".join(parts))
+            completed = True
+        finally:
+            session_store.release(record)
+        if completed:
+            schedule_compaction(session_id)
+
+    return chunks()
 
 
 def get_chat_session(session_id):
@@ -74,12 +313,10 @@ def get_chat_session(session_id):
         session_id (str): The ID of the chat session
 
     Returns:
-        object: The chat session object
+        object: A chat session object rebuilt from the stored history
 
     Raises:
         ValueError: If the session_id is invalid
     """
-    if session_id not in chat_sessions:
-        raise ValueError(f"Invalid session ID: {session_id}")
-
-    return chat_sessions[session_id]
+    record = session_store.load(session_id)
+    return model_for_plan(record["study_plan"]).start_chat(history=build_history(record))
@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import contextlib
+import weakref
+from collections import OrderedDict
+
+
+class SessionConflictError(Exception):
+    """Raised when another worker updated a session between our load and save"""
+
+
+def new_record(study_plan=None):
+    """A fresh chat session record; history holds plain {"role", "text"} turns"""
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "created_at": now,
+        "updated_at": now,
+        "study_plan": study_plan,
+        "summary": "",
+        "history": [],
+        "version": 0,
+        "lease_until": None,
+    }
+
+
+class MemorySessionBackend:
+    """
+    Sessions kept in this process, bounded by count and idle time
+
+    At most max_sessions records are kept, least recently used first out,
+    and a session idle for longer than ttl seconds is dropped on access.
+    Records are stored serialized so callers never share mutable state.
+    """
+    def __init__(self, max_sessions=1000, ttl=86400):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.records = OrderedDict()  # id -> (last_access, version, json)
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def load(self, session_id):
+        with self.lock:
+            entry = self.records.get(session_id)
+            if entry is None:
+                return None
+            last_access, version, data = entry
+            if time.time() - last_access > self.ttl:
+                del self.records[session_id]
+                return None
+            self.records[session_id] = (time.time(), version, data)
+            self.records.move_to_end(session_id)
+            return json.loads(data)
+
+    def save(self, record, expected_version):
+        with self.lock:
+            entry = self.records.get(record["id"])
+            current_version = entry[1] if entry else None
+            if current_version != expected_version:
+                raise SessionConflictError(f"Session {record['id']} was modified concurrently")
+            self.records[record["id"]] = (time.time(), record["version"], json.dumps(record))
+            self.records.move_to_end(record["id"])
+            while len(self.records) > self.max_sessions:
+                self.records.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id):
+        with self.lock:
+            self.records.pop(session_id, None)
+
+    def count(self):
+        with self.lock:
+            return len(self.records)
+
+
+class SQLiteSessionBackend:
+    """
+    Sessions in a SQLite file, shared by every app worker on the host
+
+    Each thread gets its own connection; WAL mode lets readers proceed while
+    another worker writes. Saves are compare-and-swap on the record version,
+    so two workers answering the same session at once cannot silently drop a
+    turn. Sessions idle for longer than ttl seconds are pruned, and the least
+    recently active are removed beyond max_sessions.
+    """
+    def __init__(self, path="chat_sessions.db", max_sessions=100000, ttl=86400):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                " id TEXT PRIMARY KEY, version INTEGER NOT NULL,"
+                " updated_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS chat_sessions_updated ON chat_sessions (updated_at)")
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT data FROM chat_sessions WHERE id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, record, expected_version):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            if expected_version is None:
+                try:
+                    conn.execute(
+                        "INSERT INTO chat_sessions (id, version, updated_at, data) VALUES (?, ?, ?, ?)",
+                        (record["id"], record["version"], now, json.dumps(record)),
+                    )
+                except sqlite3.IntegrityError as e:
+                    raise SessionConflictError(f"Session {record['id']} already exists") from e
+                self._prune(conn, now)
+            else:
+                cursor = conn.execute(
+                    "UPDATE chat_sessions SET version = ?, updated_at = ?, data = ? WHERE id = ? AND version = ?",
+                    (record["version"], now, json.dumps(record), record["id"], expected_version),
+                )
+                if cursor.rowcount == 0:
+                    raise SessionConflictError(f"Session {record['id']} was modified concurrently")
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM chat_sessions WHERE id IN ("
+            " SELECT id FROM chat_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def delete(self, session_id):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+
+
+class SessionStore:
+    """
+    Chat session records behind a pluggable backend, with one lock per session
+
+    Turns on the same session are serialized in this process so history is
+    never interleaved; different sessions proceed in parallel. Across
+    processes the backend's versioned save detects the rare conflicting turn.
+
+    A turn that outlives the lock, such as a streamed reply, claims the
+    session instead: a lease is saved on the record, and until it is released
+    or expires every other turn on the session fails fast with
+    SessionConflictError rather than waiting behind the stream.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.locks = weakref.WeakValueDictionary()
+        self.locks_lock = threading.Lock()
+
+    def _lock_for(self, session_id):
+        with self.locks_lock:
+            lock = self.locks.get(session_id)
+            if lock is None:
+                lock = threading.Lock()
+                self.locks[session_id] = lock
+            return lock
+
+    def create(self, record):
+        self.backend.save(record, expected_version=None)
+        return record
+
+    def exists(self, session_id):
+        return self.backend.load(session_id) is not None
+
+    def load(self, session_id):
+        """
+        Raises:
+            ValueError: If the session does not exist or has expired
+        """
+        record = self.backend.load(session_id)
+        if record is None:
+            raise ValueError(f"Invalid session ID: {session_id}")
+        return record
+
+    @contextlib.contextmanager
+    def session(self, session_id):
+        """
+        Lock, load and yield a session record; it is saved when the block exits cleanly
+
+        Raises:
+            ValueError: If the session does not exist or has expired
+            SessionConflictError: If another worker saved the session meanwhile
+        """
+        lock = self._lock_for(session_id)
+        with lock:
+            record = self.load(session_id)
+            self._check_lease(record)
+            yield record
+            self._save(record)
+
+    def claim(self, session_id, lease_seconds):
+        """
+        Reserve a session for a turn that is saved later with release()
+
+        The lease only bounds how long a stalled turn can block the session;
+        once it expires other turns proceed, and the stalled turn's release()
+        raises SessionConflictError if one of them saved.
+
+        Returns:
+            dict: The session record, to pass to release()
+
+        Raises:
+            ValueError: If the session does not exist or has expired
+            SessionConflictError: If another turn holds or just changed the session
+        """
+        with self._lock_for(session_id):
+            record = self.load(session_id)
+            self._check_lease(record)
+            record["lease_until"] = time.time() + lease_seconds
+            self._save(record)
+        return record
+
+    def release(self, record):
+        """
+        Save a claimed record, with whatever changes were made to it, and end its lease
+
+        Raises:
+            SessionConflictError: If the lease expired and another turn saved the session
+        """
+        with self._lock_for(record["id"]):
+            record["lease_until"] = None
+            self._save(record)
+
+    @staticmethod
+    def _check_lease(record):
+        if (record.get("lease_until") or 0) > time.time():
+            raise SessionConflictError(f"Session {record['id']} is answering another message")
+
+    def _save(self, record):
+        expected_version = record["version"]
+        record["version"] = expected_version + 1
+        record["updated_at"] = time.time()
+        self.backend.save(record, expected_version)
+
+    def delete(self, session_id):
+        self.backend.delete(session_id)
+
+
+def make_backend_from_env():
+    """Build the backend named by CHAT_SESSION_BACKEND ("memory" or "sqlite")"""
+    ttl = int(os.getenv("CHAT_SESSION_TTL", "86400"))
+    if os.getenv("CHAT_SESSION_BACKEND", "memory") == "sqlite":
+        return SQLiteSessionBackend(
+            path=os.getenv("CHAT_SESSION_DB", "chat_sessions.db"),
+            max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "100000")),
+            ttl=ttl,
+        )
+    return MemorySessionBackend(max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "1000")), ttl=ttl)
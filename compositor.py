@@ -0,0 +1,347 @@
+import os
+import re
+import threading
+import subprocess
+from moviepy.config import get_setting
+
+# Layout of a study-plan part: the rendered slide on top, the background
+# clip with the character sprite underneath, both scaled to a common width.
+DEFAULT_WIDTH = 1920
+DEFAULT_FPS = 30
+SPRITE_HEIGHT = 300
+SPRITE_X = 150
+
+# Keyframe spacing of every encode, so HLS packaging can cut segments on
+# keyframes with a stream copy (see delivery.py)
+KEYFRAME_SECONDS = 2
+
+
+def delivery_args(fps=DEFAULT_FPS):
+    """
+    Output flags shared by every final encode
+
+    The moov atom goes to the front of the file so playback can start
+    before the download finishes, and keyframes land every
+    KEYFRAME_SECONDS so segments and seeks line up with them.
+    """
+    return [
+        "-movflags", "+faststart",
+        "-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_SECONDS})",
+        "-g", str(fps * KEYFRAME_SECONDS),
+    ]
+
+
+def ffmpeg_binary():
+    """Return the ffmpeg executable moviepy is configured to use"""
+    return get_setting("FFMPEG_BINARY")
+
+
+def _split_stream_fields(description):
+    """Split an `ffmpeg -i` stream description on commas that are not inside parentheses"""
+    return [field.strip() for field in re.split(r",(?![^(]*\))", description)]
+
+
+def _parse_stream_info(stderr):
+    info = None
+    audio = None
+    for line in stderr.splitlines():
+        if info is None and " Video: " in line:
+            fields = _split_stream_fields(line.split(" Video: ", 1)[1])
+            info = {"codec": fields[0].split()[0], "pix_fmt": None, "width": None, "height": None,
+                    "sar": None, "fps": None}
+            if len(fields) > 1:
+                info["pix_fmt"] = fields[1].split("(")[0]
+            for field in fields[1:]:
+                size = re.match(r"(\d+)x(\d+)(?: \[SAR (\d+):(\d+))?", field)
+                if size and info["width"] is None:
+                    info["width"], info["height"] = int(size.group(1)), int(size.group(2))
+                    if size.group(3):
+                        info["sar"] = (int(size.group(3)), int(size.group(4)))
+                elif field.endswith(" fps"):
+                    try:
+                        info["fps"] = float(field[:-4])
+                    except ValueError:
+                        pass
+        elif audio is None and " Audio: " in line:
+            fields = _split_stream_fields(line.split(" Audio: ", 1)[1])
+            audio = {"codec": fields[0].split()[0],
+                     "sample_rate": int(fields[1].split()[0]) if len(fields) > 1 and fields[1].endswith("Hz") else None,
+                     "channels": fields[2] if len(fields) > 2 else None}
+    if info is not None:
+        info["audio"] = audio
+    return info
+
+
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+
+def probe_video(path):
+    """
+    Read the format of a file's first video and audio streams from `ffmpeg -i`
+
+    Results are cached until the file's size or modification time changes.
+
+    Returns:
+        dict: codec, pix_fmt, width, height, sar ((num, den) or None), fps and
+              audio (dict of codec, sample_rate, channels, or None); None when
+              the file has no readable video stream
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _probe_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+
+    process = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", path],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    info = _parse_stream_info(process.stderr.decode("utf-8", errors="replace"))
+    with _probe_lock:
+        _probe_cache[key] = info
+    return info
+
+
+def fits_panel(info, width, fps=DEFAULT_FPS):
+    """
+    Whether a probed video can be stacked as a panel without scaling
+
+    True when it is already `width` pixels wide with square pixels, at the
+    output frame rate and in yuv420p, so scale/fps/setsar would be no-ops.
+    """
+    return (
+        info is not None
+        and info["width"] == width
+        and info["fps"] is not None and abs(info["fps"] - fps) < 0.01
+        and info["sar"] in (None, (1, 1))
+        and info["pix_fmt"] == "yuv420p"
+    )
+
+
+def stream_signature(info):
+    """Everything two files must share to be concatenated by stream copy"""
+    audio = info.get("audio") or {}
+    return (info["codec"], info["pix_fmt"], info["width"], info["height"], info["sar"] or (1, 1),
+            round(info["fps"] or 0, 3), audio.get("codec"), audio.get("sample_rate"), audio.get("channels"))
+
+
+def build_filter_graph(segments, width=DEFAULT_WIDTH, fps=DEFAULT_FPS, frame_filter=None):
+    """
+    Build the ffmpeg input arguments and filter graph for a whole part
+
+    Every segment contributes four inputs (slide video, background video,
+    sprite image, narration audio). Sprites come from the sprite library and
+    are already resized with premultiplied alpha. Each segment is composited as
+    slide-over-character and all segments are concatenated with their audio,
+    so the part is decoded and encoded exactly once.
+
+    Args:
+        segments (list): Dicts with slide_path, background_path, sprite_path,
+                         audio_path and duration (seconds) keys; optional
+                         slide_fits/background_fits flags (see fits_panel)
+                         skip scaling that input
+        width (int): Output width shared by the slide and character panels
+        fps (int): Output frame rate
+        frame_filter (str, optional): Filter applied to the concatenated video,
+                                      e.g. an EncodeProfile's letterbox
+
+    Returns:
+        tuple: (input_args, filter_complex)
+    """
+    input_args = []
+    filters = []
+    concat_inputs = []
+
+    for i, segment in enumerate(segments):
+        duration = f"{segment['duration']:.3f}"
+        base = i * 4
+
+        input_args += ["-t", duration, "-i", segment["slide_path"]]
+        input_args += ["-t", duration, "-i", segment["background_path"]]
+        input_args += ["-loop", "1", "-framerate", str(fps), "-t", duration, "-i", segment["sprite_path"]]
+        input_args += ["-i", segment["audio_path"]]
+
+        slide_scale = "" if segment.get("slide_fits") else f"scale={width}:-2,fps={fps},setsar=1,"
+        filters.append(
+            f"[{base}:v]{slide_scale}"
+            f"tpad=stop_mode=clone:stop_duration={duration}[slide{i}]"
+        )
+        if segment.get("background_fits"):
+            filters.append(f"[{base + 1}:v]null[bg{i}]")
+        else:
+            filters.append(f"[{base + 1}:v]scale={width}:-2,fps={fps},setsar=1[bg{i}]")
+        filters.append(
+            f"[bg{i}][{base + 2}:v]overlay={SPRITE_X}:main_h-overlay_h:"
+            f"alpha=premultiplied:shortest=1[char{i}]"
+        )
+        filters.append(
+            f"[slide{i}][char{i}]vstack=inputs=2,trim=duration={duration},"
+            f"setpts=PTS-STARTPTS,format=yuv420p[v{i}]"
+        )
+        filters.append(
+            f"[{base + 3}:a]atrim=duration={duration},asetpts=PTS-STARTPTS,"
+            f"aresample=44100,aformat=channel_layouts=stereo[a{i}]"
+        )
+        concat_inputs.append(f"[v{i}][a{i}]")
+
+    if frame_filter:
+        filters.append(f"{''.join(concat_inputs)}concat=n={len(segments)}:v=1:a=1[catv][outa]")
+        filters.append(f"[catv]{frame_filter}[outv]")
+    else:
+        filters.append(f"{''.join(concat_inputs)}concat=n={len(segments)}:v=1:a=1[outv][outa]")
+
+    return input_args, ";".join(filters)
+
+
+def build_command(segments, output_path, width=DEFAULT_WIDTH, fps=DEFAULT_FPS,
+                  codec="libx264", audio_codec="aac", threads=None, profile=None):
+    """
+    Build the full ffmpeg command line that renders a part in one pass
+
+    threads caps the encoder. An EncodeProfile sets the panel width, preset,
+    CRF, output frame and audio bitrate, and caps the threads.
+    """
+    encoder_args = []
+    frame_filter = None
+    if profile is not None:
+        width = profile.width
+        threads = profile.encoder_threads(threads)
+        frame_filter = profile.frame_filter()
+        encoder_args = profile.video_args() + profile.audio_args()
+    input_args, filter_complex = build_filter_graph(segments, width=width, fps=fps, frame_filter=frame_filter)
+    thread_args = ["-threads", str(threads)] if threads else []
+    return [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        *input_args,
+        "-filter_complex", filter_complex,
+        "-map", "[outv]", "-map", "[outa]",
+        "-r", str(fps), "-c:v", codec, "-pix_fmt", "yuv420p",
+        "-c:a", audio_codec,
+        *encoder_args,
+        *delivery_args(fps),
+        *thread_args,
+        output_path,
+    ]
+
+
+def compose_part(segments, output_path, width=DEFAULT_WIDTH, fps=DEFAULT_FPS,
+                 codec="libx264", audio_codec="aac", threads=None, profile=None):
+    """
+    Composite background + sprite + slide + audio for a part in a single ffmpeg pass
+
+    Args:
+        segments (list): Segment dicts, see build_filter_graph
+        output_path (str): Path of the final part video
+        threads (int, optional): Encoder threads; defaults to ffmpeg's choice (all cores)
+        profile (EncodeProfile, optional): Encoder settings, see encode_profiles.py
+
+    Returns:
+        str: The output path
+    """
+    if not segments:
+        raise ValueError("No segments to compose.")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Inputs already in the panel format (canonical slides, background mezzanine cuts) skip scaling
+    panel_width = profile.width if profile is not None else width
+    segments = [
+        dict(segment,
+             slide_fits=fits_panel(probe_video(segment["slide_path"]), panel_width, fps),
+             background_fits=fits_panel(probe_video(segment["background_path"]), panel_width, fps))
+        for segment in segments
+    ]
+
+    command = build_command(segments, output_path, width=width, fps=fps,
+                            codec=codec, audio_codec=audio_codec, threads=threads, profile=profile)
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        stderr = process.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to compose {output_path}: {stderr[-2000:]}")
+
+    return output_path
+
+
+def _run(command, output_path):
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        stderr = process.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to write {output_path}: {stderr[-2000:]}")
+    return output_path
+
+
+def join_segments(paths, output_path, fps=DEFAULT_FPS, codec="libx264", audio_codec="aac",
+                  threads=None, profile=None):
+    """
+    Concatenate encoded segments into one video
+
+    When every segment has the same codecs, geometry, frame rate and audio
+    format (see stream_signature) they are joined with the concat demuxer
+    and a stream copy, so nothing is decoded. Otherwise they are scaled to
+    the first segment's size and transcoded with the profile's settings.
+
+    Args:
+        paths (list): Segment files in playback order
+        output_path (str): Path of the joined video
+        threads (int, optional): Encoder threads for the fallback transcode
+        profile (EncodeProfile, optional): Encoder settings for the fallback transcode
+
+    Returns:
+        bool: True if the segments were stream-copied, False if they were transcoded
+    """
+    if not paths:
+        raise ValueError("No segments to join.")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    infos = [probe_video(path) for path in paths]
+    if all(infos) and len({stream_signature(info) for info in infos}) == 1:
+        list_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.concat.txt"
+        with open(list_path, "w") as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        try:
+            _run([
+                ffmpeg_binary(), "-y", "-loglevel", "error",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-map", "0", "-c", "copy", "-movflags", "+faststart",
+                output_path,
+            ], output_path)
+        finally:
+            os.remove(list_path)
+        return True
+
+    reference = next((info for info in infos if info), None)
+    if reference is None:
+        raise RuntimeError(f"No readable video stream in segments for {output_path}")
+    width, height = reference["width"], reference["height"]
+    input_args = []
+    filters = []
+    for i, path in enumerate(paths):
+        input_args += ["-i", path]
+        filters.append(
+            f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={fps},setsar=1,format=yuv420p[v{i}]"
+        )
+        filters.append(f"[{i}:a]aresample=44100,aformat=channel_layouts=stereo[a{i}]")
+    filters.append(f"{''.join(f'[v{i}][a{i}]' for i in range(len(paths)))}"
+                   f"concat=n={len(paths)}:v=1:a=1[outv][outa]")
+    encoder_args = profile.video_args() + profile.audio_args() if profile is not None else []
+    threads = threads or (profile.threads if profile is not None else None)
+    _run([
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        *input_args,
+        "-filter_complex", ";".join(filters),
+        "-map", "[outv]", "-map", "[outa]",
+        "-r", str(fps), "-c:v", codec, "-pix_fmt", "yuv420p",
+        "-c:a", audio_codec,
+        *encoder_args,
+        *delivery_args(fps),
+        *(["-threads", str(threads)] if threads else []),
+        output_path,
+    ], output_path)
+    return False
@@ -0,0 +1,67 @@
+import os
+import shutil
+import subprocess
+from compositor import ffmpeg_binary, KEYFRAME_SECONDS
+
+PLAYLIST_NAME = "index.m3u8"
+
+MIMETYPES = {
+    ".mp4": "video/mp4",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+}
+
+
+def hls_dir_for(video_path):
+    """Directory the HLS rendition of a video is written to: <name>_hls/ next to it"""
+    return f"{os.path.splitext(video_path)[0]}_hls"
+
+
+def package_hls(video_path, segment_seconds=KEYFRAME_SECONDS):
+    """
+    Package an MP4 as a VOD HLS playlist with fragmented-MP4 segments
+
+    The streams are copied, not re-encoded. Encodes from compositor.py have a
+    keyframe every KEYFRAME_SECONDS, so every segment starts on one and a
+    player can begin (or seek) after fetching one short segment. The
+    rendition is written to a temporary directory and renamed into place, so
+    clients never see a half-written playlist.
+
+    Args:
+        video_path (str): The MP4 to package
+        segment_seconds (int): Target segment duration
+
+    Returns:
+        str: Path of the playlist (<name>_hls/index.m3u8)
+    """
+    output_dir = hls_dir_for(video_path)
+    tmp_dir = f"{output_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    command = [
+        ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_flags", "independent_segments",
+        "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", os.path.join(tmp_dir, "segment_%04d.m4s"),
+        os.path.join(tmp_dir, PLAYLIST_NAME),
+    ]
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        stderr = process.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to package {video_path} as HLS: {stderr[-2000:]}")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return os.path.join(output_dir, PLAYLIST_NAME)
+
+
+def mimetype_for(path):
+    return MIMETYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
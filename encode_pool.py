@@ -0,0 +1,128 @@
+"""
+Process pool that encodes the parts of a study plan concurrently.
+
+Compositing and libx264 encoding are CPU-bound, and in the Flask process
+the moviepy engine runs under the GIL with one part after another. Parts
+are instead sent to ENCODE_PROCESSES worker processes, each limited to
+ENCODE_THREADS encoder threads so that processes x threads stays within
+the machine's cores. Every worker gets its own scratch directory under
+ENCODE_SCRATCH_DIR for intermediate clips and temporary audio. The worker
+side lives in encode_worker.py, which has no app-level side effects.
+"""
+
+import os
+import tempfile
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from encode_worker import init_worker, encode_part
+from sprites import get_sprite_library
+from StimStudy.tracing import record_span
+
+DEFAULT_THREADS = 4
+
+
+def encode_settings():
+    """
+    Pool size from the environment
+
+    Returns:
+        tuple: (processes, threads per process); by default enough processes of
+               DEFAULT_THREADS threads each to fill the CPU count
+    """
+    cores = os.cpu_count() or 1
+    threads = max(1, int(os.getenv("ENCODE_THREADS", str(min(DEFAULT_THREADS, cores)))))
+    processes = max(1, int(os.getenv("ENCODE_PROCESSES", str(max(1, cores // threads)))))
+    return processes, threads
+
+
+class EncodePool:
+    """
+    Worker processes shared by every job in the app
+
+    Jobs submitted at the same time share the same processes, so the number
+    of concurrent encodes never exceeds the pool size however many jobs run.
+    Workers are started with "spawn" because the app process has threads.
+    """
+    def __init__(self, processes, threads, scratch_root):
+        self.processes = processes
+        self.threads = threads
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(scratch_root, threads),
+        )
+
+    def encode(self, parts, on_done=None):
+        """
+        Encode parts concurrently
+
+        Args:
+            parts (list): Keyword arguments for generate_and_combine_videos, one dict per
+                          part, each with an "index"; output_folder and threads are set
+                          by the worker
+            on_done (callable, optional): Called with each part's result as it finishes
+
+        Returns:
+            list: Result dicts (index, path, seconds, pid, spans) in part order
+
+        Raises:
+            Exception: The first part failure; parts not yet started are cancelled
+        """
+        # Build any missing premultiplied sprites here once, so workers only read them
+        for sprite_dir, character in {(part["sprite_dir"], part["selected_character"]) for part in parts}:
+            get_sprite_library(sprite_dir).sprites(character)
+
+        futures = [self.executor.submit(encode_part, part) for part in parts]
+        results = []
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                # Stages traced inside the worker are recorded here, where /metrics is served
+                for stage_span in result["spans"]:
+                    record_span(**stage_span)
+                record_span("encode_part", result["seconds"], job=parts[0].get("job_id"),
+                            part=result["index"], pid=result["pid"])
+                results.append(result)
+                if on_done:
+                    on_done(result)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        return sorted(results, key=lambda result: result["index"])
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_encode_pool():
+    """Return the process-wide EncodePool, configured from the environment on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            processes, threads = encode_settings()
+            scratch_root = os.getenv("ENCODE_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "stimstudy_encode"))
+            _pool = EncodePool(processes, threads, scratch_root)
+            print(f"🧵 Encode pool: {processes} processes x {threads} encoder threads")
+        return _pool
+
+
+def encode_parts(parts, on_done=None):
+    """Encode parts on the shared pool, replacing the pool if a worker process died"""
+    global _pool
+    pool = get_encode_pool()
+    try:
+        return pool.encode(parts, on_done=on_done)
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown()
+        raise
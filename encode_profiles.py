@@ -0,0 +1,136 @@
+"""
+Named encode settings for final study-plan parts.
+
+A profile fixes the x264 preset and CRF, the panel width the compositor
+scales to, an optional output frame (letterboxed to fit, e.g. 1080x1920
+for vertical players), the audio bitrate and the encoder thread count.
+choose_profile() picks the best-looking profile expected to finish within
+a job's latency budget, using encode speeds learned from recent encodes.
+"""
+
+import os
+import threading
+from compositor import DEFAULT_WIDTH
+from StimStudy.media_format import SLIDE_FORMAT
+
+# Weight of the newest measurement in each profile's learned encode speed
+SPEED_SMOOTHING = 0.3
+
+
+class EncodeProfile:
+    """
+    One set of encoder settings
+
+    seconds_per_second is the expected encode time per second of output,
+    used to fit a latency budget until real encodes have been measured.
+    threads is the most encoder threads the profile is worth: slower presets
+    parallelize well, while a fast preset gains little from more threads and
+    would only crowd out the other pool workers.
+    """
+    def __init__(self, name, preset, crf, width, frame_size=None, audio_bitrate="128k", threads=None,
+                 seconds_per_second=1.0):
+        self.name = name
+        self.preset = preset
+        self.crf = crf
+        self.width = width
+        self.frame_size = frame_size
+        self.audio_bitrate = audio_bitrate
+        self.threads = threads
+        self.seconds_per_second = seconds_per_second
+
+    def encoder_threads(self, threads=None):
+        """Encoder threads to use, at most `threads` (e.g. a pool worker's share of the cores)"""
+        if threads and self.threads:
+            return min(threads, self.threads)
+        return threads or self.threads
+
+    def video_args(self):
+        return ["-preset", self.preset, "-crf", str(self.crf)]
+
+    def audio_args(self):
+        return ["-b:a", self.audio_bitrate]
+
+    def frame_filter(self):
+        """ffmpeg filter that letterboxes the composite into frame_size, or None to keep its size"""
+        if not self.frame_size:
+            return None
+        width, height = self.frame_size
+        return (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+
+    def __repr__(self):
+        return f"EncodeProfile({self.name!r})"
+
+
+# Ordered from best quality to fastest. Speeds are single-core defaults from
+# benchmarks/bench_encode_profiles.py; record_encode() learns the real ones.
+# Slides are rendered once, at the canonical slide width, before a profile is
+# chosen. "archive" never downscales: it keeps the full 1920 width, or the
+# slides' own width when they are rendered wider. "standard" and "preview"
+# composite at their output frame's width, scaling the slides down to it.
+PROFILES = {
+    "archive": EncodeProfile("archive", preset="slow", crf=18, width=max(DEFAULT_WIDTH, SLIDE_FORMAT.width),
+                             audio_bitrate="192k", threads=8, seconds_per_second=6.5),
+    "standard": EncodeProfile("standard", preset="veryfast", crf=23, width=1080, frame_size=(1080, 1920),
+                              audio_bitrate="128k", threads=4, seconds_per_second=1.5),
+    "preview": EncodeProfile("preview", preset="ultrafast", crf=30, width=720, frame_size=(720, 1280),
+                             audio_bitrate="96k", threads=2, seconds_per_second=0.55),
+}
+
+DEFAULT_PROFILE = os.getenv("ENCODE_PROFILE", "standard")
+
+_speeds = {}
+_speeds_lock = threading.Lock()
+
+
+def get_profile(profile=None):
+    """
+    Resolve a profile name (or profile) to an EncodeProfile; None gives ENCODE_PROFILE
+
+    Raises:
+        ValueError: If the name is not one of PROFILES
+    """
+    if isinstance(profile, EncodeProfile):
+        return profile
+    name = profile or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encode profile: {name} (expected one of {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def estimate_encode_seconds(profile, content_seconds):
+    """Expected encode time for content_seconds of output"""
+    profile = get_profile(profile)
+    with _speeds_lock:
+        speed = _speeds.get(profile.name, profile.seconds_per_second)
+    return speed * content_seconds
+
+
+def record_encode(profile, content_seconds, encode_seconds):
+    """Feed a finished encode into the profile's learned speed"""
+    if content_seconds <= 0:
+        return
+    profile = get_profile(profile)
+    speed = encode_seconds / content_seconds
+    with _speeds_lock:
+        previous = _speeds.get(profile.name, profile.seconds_per_second)
+        _speeds[profile.name] = previous + SPEED_SMOOTHING * (speed - previous)
+
+
+def choose_profile(budget_seconds=None, content_seconds=0.0):
+    """
+    Pick the highest-quality profile expected to encode within a latency budget
+
+    Args:
+        budget_seconds (float, optional): Seconds the encode may take; None uses ENCODE_PROFILE
+        content_seconds (float): Duration of the video to encode
+
+    Returns:
+        EncodeProfile: The first profile in PROFILES order that fits, or the fastest
+    """
+    if budget_seconds is None:
+        return get_profile()
+    for profile in PROFILES.values():
+        if estimate_encode_seconds(profile, content_seconds) <= budget_seconds:
+            return profile
+    return list(PROFILES.values())[-1]
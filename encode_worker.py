@@ -0,0 +1,47 @@
+"""
+Entry points that run inside encode_pool's worker processes.
+
+Workers are started with "spawn", so they import this module (and
+whatever it imports) fresh. It deliberately imports only the encoding
+code and nothing with app-level side effects: no Flask app, job manager,
+progress handlers or sprite preload.
+"""
+
+import os
+import time
+import atexit
+import shutil
+import tempfile
+from video import generate_and_combine_videos
+from StimStudy.tracing import collect_spans
+
+# Set in each worker process by init_worker
+_worker_scratch = None
+_worker_threads = None
+
+
+def init_worker(scratch_root, threads):
+    global _worker_scratch, _worker_threads
+    os.makedirs(scratch_root, exist_ok=True)
+    _worker_scratch = tempfile.mkdtemp(prefix=f"worker_{os.getpid()}_", dir=scratch_root)
+    _worker_threads = threads
+    atexit.register(shutil.rmtree, _worker_scratch, ignore_errors=True)
+
+
+def encode_part(part):
+    """
+    Build one part in a worker, with its intermediate files in the worker's scratch directory
+
+    The spans traced while encoding (compose_part, write_videofile, ...) are
+    returned under "spans" for the parent to record, since the worker's own
+    metrics are never scraped.
+    """
+    scratch = tempfile.mkdtemp(prefix=f"part_{part['index']}_", dir=_worker_scratch)
+    start = time.perf_counter()
+    try:
+        with collect_spans() as spans:
+            path = generate_and_combine_videos(**part, output_folder=scratch, threads=_worker_threads)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {"index": part["index"], "path": path, "seconds": time.perf_counter() - start, "pid": os.getpid(),
+            "spans": spans}
@@ -0,0 +1,141 @@
+"""
+Local stand-ins for the Gemini clients that emit tokens at a controlled rate.
+
+FakeGenAIClient mimics google.genai.Client (client.models.generate_content
+and generate_content_stream) and FakeChatModel mimics
+google.generativeai.GenerativeModel.start_chat, so app.py and chat.py can
+run without network access. Set FAKE_MODEL=1 to use them, with
+FAKE_MODEL_TOKENS_PER_SECOND and FAKE_MODEL_FIRST_TOKEN_LATENCY controlling
+the speed.
+"""
+
+import os
+import re
+import json
+import time
+
+SAMPLE_STUDY_PLAN = [
+    {
+        "subject": "Theory",
+        "title": f"Sample topic - Part {part}",
+        "outline": "A short overview of the key ideas covered in this part.",
+        "proposed_length": 45,
+        "depth_of_information": "Beginner",
+    }
+    for part in (1, 2, 3)
+]
+
+
+def default_reply(prompt):
+    """A JSON study plan for study plan prompts, a short answer otherwise"""
+    if "JSON" in prompt:
+        return json.dumps(SAMPLE_STUDY_PLAN, indent=2)
+    return "That is a great question. Focus on the core idea first, then work through one example step by step."
+
+
+def tokenize(text):
+    """Split text into word-sized tokens that concatenate back to the original"""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """The client.models surface of google.genai used by app.py"""
+    def __init__(self, tokens_per_second=50.0, first_token_latency=0.3, reply=default_reply):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency
+        self.reply = reply
+        self.calls = 0
+
+    def stream_tokens(self, prompt):
+        self.calls += 1
+        time.sleep(self.first_token_latency)
+        for index, token in enumerate(tokenize(self.reply(prompt))):
+            if index and self.tokens_per_second:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield token
+
+    def generate_content(self, model, contents, config=None):
+        return FakeResponse("".join(self.stream_tokens(str(contents))))
+
+    def generate_content_stream(self, model, contents, config=None):
+        for token in self.stream_tokens(str(contents)):
+            yield FakeResponse(token)
+
+
+class FakeGenAIClient:
+    def __init__(self, tokens_per_second=50.0, first_token_latency=0.3, reply=default_reply):
+        self.models = FakeModels(tokens_per_second, first_token_latency, reply)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            tokens_per_second=float(os.getenv("FAKE_MODEL_TOKENS_PER_SECOND", "50")),
+            first_token_latency=float(os.getenv("FAKE_MODEL_FIRST_TOKEN_LATENCY", "0.3")),
+        )
+
+
+class FakeStreamResponse:
+    """Iterable of chunks whose .text is the full reply once consumed, like a streamed SDK response"""
+    def __init__(self, tokens, on_complete):
+        self.tokens = tokens
+        self.on_complete = on_complete
+        self.chunks = []
+
+    def __iter__(self):
+        for token in self.tokens:
+            self.chunks.append(token)
+            yield FakeResponse(token)
+        self.on_complete(self.text)
+
+    def resolve(self):
+        for _ in self:
+            pass
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+
+class FakeChat:
+    """A google.generativeai ChatSession that keeps history like the real one"""
+    def __init__(self, models, history=None):
+        self.models = models
+        self.history = list(history or [])
+
+    def send_message(self, content, stream=False):
+        self.history.append({"role": "user", "parts": [content]})
+
+        def record(text):
+            self.history.append({"role": "model", "parts": [text]})
+
+        response = FakeStreamResponse(self.models.stream_tokens(content), record)
+        if not stream:
+            response.resolve()
+        return response
+
+
+class FakeChatModel:
+    """The google.generativeai.GenerativeModel surface used by chat.py"""
+    def __init__(self, tokens_per_second=50.0, first_token_latency=0.3, reply=default_reply,
+                 system_instruction=None):
+        self.models = FakeModels(tokens_per_second, first_token_latency, reply)
+        self.system_instruction = system_instruction
+
+    @classmethod
+    def from_env(cls, system_instruction=None):
+        return cls(
+            tokens_per_second=float(os.getenv("FAKE_MODEL_TOKENS_PER_SECOND", "50")),
+            first_token_latency=float(os.getenv("FAKE_MODEL_FIRST_TOKEN_LATENCY", "0.3")),
+            system_instruction=system_instruction,
+        )
+
+    def start_chat(self, history=None):
+        return FakeChat(self.models, history)
+
+    def generate_content(self, contents):
+        return self.models.generate_content(None, contents)
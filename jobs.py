@@ -0,0 +1,107 @@
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker"""
+
+
+class JobManager:
+    """
+    Runs long jobs on a bounded background executor
+
+    Jobs are submitted from a request handler and return immediately with an
+    ID; status, progress and results are read back with get(). Finished jobs
+    are kept for `retention_seconds` so clients can collect their results.
+    """
+    def __init__(self, max_workers=2, max_pending=16, retention_seconds=3600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue a job
+
+        The job function is called as fn(job_id, *args, progress=callback, **kwargs)
+        where callback(progress, message) updates the job's progress.
+
+        Returns:
+            dict: A snapshot of the queued job
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued
+        """
+        with self.lock:
+            self._prune()
+            pending = sum(1 for job in self.jobs.values() if job["status"] == QUEUED)
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs already queued, try again later")
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "status": QUEUED,
+                "progress": 0,
+                "message": "Queued",
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            snapshot = dict(self.jobs[job_id])
+
+        self.executor.submit(self._run, job_id, fn, args, kwargs)
+        return snapshot
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._set(job_id, status=RUNNING, started_at=time.time(), message="Running")
+        try:
+            result = fn(job_id, *args, progress=lambda progress, message: self.update(job_id, progress, message), **kwargs)
+            self._set(job_id, status=SUCCEEDED, result=result, progress=100,
+                      message="Completed", finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            self._set(job_id, status=FAILED, error=str(e), message="Failed", finished_at=time.time())
+
+    def _set(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def update(self, job_id, progress, message):
+        """Record progress (0-100) and a status message for a running job"""
+        self._set(job_id, progress=progress, message=message)
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown or expired"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def count(self, status):
+        """Number of known jobs with a status (QUEUED, RUNNING, ...)"""
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job["status"] == status)
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -0,0 +1,157 @@
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class PromptCacheError(Exception):
+    """A request waiting on an identical in-flight model call did not get its result"""
+
+
+class _InFlight:
+    """A model call that concurrent identical requests wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PromptCache:
+    """
+    In-memory cache of model responses keyed on the model and a normalized prompt
+
+    Entries expire after `ttl` seconds and at most `max_entries` are kept,
+    least recently used first out. Concurrent misses for the same key are
+    collapsed into one model call (single-flight): the first caller computes
+    and every other caller waits up to `wait_timeout` seconds for its result.
+    Failures are never cached; the first caller gets the model's exception
+    and every waiter a PromptCacheError chained to it.
+    """
+    def __init__(self, ttl=3600, max_entries=256, wait_timeout=120):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(prompt):
+        """Collapse and strip whitespace so trivially different prompts share an entry"""
+        return re.sub(r"\s+", " ", prompt).strip()
+
+    @classmethod
+    def make_key(cls, model, prompt):
+        payload = f"{model}\0{cls.normalize(prompt)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, model, prompt, compute):
+        """
+        Return the cached response for (model, prompt), calling compute() on a miss
+
+        Args:
+            model (str): Model name, part of the key
+            prompt (str): The full prompt sent to the model
+            compute (callable): Called with no arguments to produce the response
+
+        Returns:
+            The cached or freshly computed response
+
+        Raises:
+            PromptCacheError: If this call waited on an identical one that failed or
+                              did not finish within wait_timeout seconds
+        """
+        key = self.make_key(model, prompt)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+
+            call = self.in_flight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self.in_flight[key] = _InFlight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                raise PromptCacheError(
+                    f"Timed out after {self.wait_timeout}s waiting for an identical {model} request"
+                )
+            if call.error is not None:
+                # A fresh exception per waiter, so threads never share one traceback
+                raise PromptCacheError(f"Identical {model} request failed: {call.error}") from call.error
+            return call.value
+
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        else:
+            with self.lock:
+                self._store(key, call.value)
+            return call.value
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            call.done.set()
+
+    def get(self, model, prompt):
+        """Return the cached response for (model, prompt), or None"""
+        key = self.make_key(model, prompt)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            value = entry[1]
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, model, prompt, value):
+        """Store a response produced outside get_or_compute, e.g. by a streamed call"""
+        key = self.make_key(model, prompt)
+        with self.lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, model, prompt):
+        with self.lock:
+            self.entries.pop(self.make_key(model, prompt), None)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self.entries),
+                "in_flight": len(self.in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,196 @@
+import os
+import fcntl
+import random
+import threading
+import contextlib
+import numpy as np
+from PIL import Image
+from compositor import SPRITE_HEIGHT
+
+SPRITE_EXTENSIONS = (".png", ".jpg")
+CACHE_DIR_NAME = ".cache"
+LOCK_FILE_NAME = ".lock"
+
+
+class Sprite:
+    """A character sprite pre-resized to the render height with premultiplied alpha"""
+    def __init__(self, source_path, rgb, alpha, premultiplied_path):
+        self.source_path = source_path
+        self.rgb = rgb  # HxWx3 uint8, already multiplied by alpha
+        self.alpha = alpha  # HxWx1 float32 in [0, 1]
+        self.premultiplied_path = premultiplied_path  # RGBA PNG for ffmpeg (alpha=premultiplied)
+        self.height, self.width = rgb.shape[:2]
+
+    @property
+    def name(self):
+        return os.path.basename(self.source_path)
+
+    def composite_onto(self, frame, x, y):
+        """
+        Blend the sprite onto a video frame at (x, y)
+
+        With premultiplied colour the blend is a single multiply-add:
+        out = sprite + frame * (1 - alpha).
+        """
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, frame_w), min(y + self.height, frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+
+        sx, sy = x0 - x, y0 - y
+        rgb = self.rgb[sy:sy + (y1 - y0), sx:sx + (x1 - x0)]
+        alpha = self.alpha[sy:sy + (y1 - y0), sx:sx + (x1 - x0)]
+
+        out = frame.copy()
+        region = out[y0:y1, x0:x1]
+        out[y0:y1, x0:x1] = (rgb + region * (1.0 - alpha)).astype(np.uint8)
+        return out
+
+
+def is_stale(source_path, cached_path):
+    """True if a cached copy is missing or older than its source"""
+    try:
+        return os.path.getmtime(source_path) > os.path.getmtime(cached_path)
+    except FileNotFoundError:
+        return True
+
+
+@contextlib.contextmanager
+def _cache_locked(cache_dir):
+    """Hold the cache directory lock shared with encode workers in other processes"""
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, LOCK_FILE_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_sprite(source_path, height, cache_dir):
+    """
+    Decode, Lanczos-resize and premultiply a sprite image
+
+    The premultiplied copy is built once under the cache directory lock:
+    the app process builds it at startup and spawned encode workers read it
+    back instead of resizing the source again.
+    """
+    # ffmpeg cannot read our in-memory arrays, so keep a premultiplied copy on disk
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    premultiplied_path = os.path.join(cache_dir, f"{name}_h{height}.png")
+
+    with _cache_locked(cache_dir):
+        if not is_stale(source_path, premultiplied_path):
+            premultiplied = np.asarray(Image.open(premultiplied_path).convert("RGBA"))
+            rgb = np.ascontiguousarray(premultiplied[:, :, :3])
+            alpha = premultiplied[:, :, 3:4].astype(np.float32) / 255.0
+            return Sprite(source_path, rgb, alpha, premultiplied_path)
+
+        image = Image.open(source_path).convert("RGBA")
+        width = max(1, round(image.width * height / image.height))
+        image = image.resize((width, height), Image.LANCZOS)
+
+        rgba = np.asarray(image, dtype=np.float32)
+        alpha = rgba[:, :, 3:4] / 255.0
+        rgb = np.rint(rgba[:, :, :3] * alpha).astype(np.uint8)
+
+        premultiplied = np.concatenate([rgb, rgba[:, :, 3:4].astype(np.uint8)], axis=2)
+        # ffmpeg in other processes may be reading the previous copy, so replace it atomically
+        tmp_path = f"{premultiplied_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        Image.fromarray(premultiplied, "RGBA").save(tmp_path, format="PNG")
+        os.replace(tmp_path, premultiplied_path)
+
+    return Sprite(source_path, rgb, alpha, premultiplied_path)
+
+
+class SpriteLibrary:
+    """
+    In-memory cache of the sprites/<character>/ library
+
+    Every sprite is decoded and resized once and shared by all requests. A
+    character directory is rescanned only when its mtime changes, so files
+    added later are picked up without listing the directory on every clip.
+    """
+    def __init__(self, sprite_dir, height=SPRITE_HEIGHT):
+        self.sprite_dir = sprite_dir
+        self.height = height
+        self.characters = {}  # character -> (dir mtime, {file name: Sprite})
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Load every character in the sprite directory"""
+        if not os.path.isdir(self.sprite_dir):
+            return self
+        for character in sorted(os.listdir(self.sprite_dir)):
+            if not character.startswith(".") and os.path.isdir(os.path.join(self.sprite_dir, character)):
+                self.sprites(character)
+        return self
+
+    def sprites(self, character):
+        """Return the cached sprites for a character, reloading changed directories"""
+        character_dir = os.path.join(self.sprite_dir, character)
+        try:
+            mtime = os.stat(character_dir).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Character directory '{character_dir}' not found.")
+
+        with self.lock:
+            cached = self.characters.get(character)
+            if cached and cached[0] == mtime:
+                return list(cached[1].values())
+
+            loaded = dict(cached[1]) if cached else {}
+            file_names = sorted(
+                file for file in os.listdir(character_dir) if file.endswith(SPRITE_EXTENSIONS)
+            )
+            cache_dir = os.path.join(self.sprite_dir, CACHE_DIR_NAME, character)
+            sprites = {}
+            for file_name in file_names:
+                source_path = os.path.join(character_dir, file_name)
+                sprite = loaded.get(file_name)
+                if sprite is None or is_stale(source_path, sprite.premultiplied_path):
+                    sprite = load_sprite(source_path, self.height, cache_dir)
+                sprites[file_name] = sprite
+
+            self.characters[character] = (mtime, sprites)
+            return list(sprites.values())
+
+    def choose(self, character, exclude=None):
+        """
+        Pick a random sprite for a character, avoiding the last one used
+
+        Args:
+            character (str): Character directory name
+            exclude (Sprite, optional): Sprite used for the previous clip
+
+        Returns:
+            Sprite: The chosen sprite
+        """
+        sprites = self.sprites(character)
+        if not sprites:
+            raise FileNotFoundError(
+                f"No image found in character directory '{os.path.join(self.sprite_dir, character)}'."
+            )
+
+        available = [
+            sprite for sprite in sprites
+            if exclude is None or sprite.source_path != exclude.source_path
+        ]
+        if not available:
+            raise ValueError("No available images left after excluding the last used one.")
+
+        return random.choice(available)
+
+
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+
+def get_sprite_library(sprite_dir):
+    """Return the process-wide SpriteLibrary for a sprite directory"""
+    key = os.path.abspath(sprite_dir)
+    with _libraries_lock:
+        if key not in _libraries:
+            _libraries[key] = SpriteLibrary(sprite_dir)
+        return _libraries[key]
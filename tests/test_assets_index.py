@@ -0,0 +1,56 @@
+import json
+import os
+import multiprocessing
+from StimStudy.assets_index import INDEX_FILE, AssetsIndex
+
+
+def register_many(assets_dir, worker, count):
+    index = AssetsIndex(assets_dir).load()
+    for i in range(count):
+        project_dir = os.path.join(assets_dir, f"20250101_120000_{worker}_{i}")
+        os.makedirs(project_dir)
+        index.register(project_dir, f"topic {worker} {i}")
+
+
+def test_register_and_lookup(tmp_path):
+    index = AssetsIndex(str(tmp_path)).load()
+    project_dir = str(tmp_path / "20250101_120000_0123abcd_what_is_dna")
+    os.makedirs(project_dir)
+    index.register(project_dir, "What is DNA")
+
+    record = AssetsIndex(str(tmp_path)).load().lookup("what  is DNA")
+    assert record["project_dir"] == project_dir
+    assert index.artifact_path(record, "videos") == os.path.join(project_dir, "videos")
+    assert index.lookup("What is RNA") is None
+
+
+def test_existing_projects_are_indexed_on_first_load(tmp_path):
+    os.makedirs(tmp_path / "20240101_090000_photosynthesis")
+    index = AssetsIndex(str(tmp_path)).load()
+    assert index.lookup("Photosynthesis")["project_id"] == "20240101_090000_photosynthesis"
+    assert os.path.exists(tmp_path / INDEX_FILE)
+
+
+def test_lookup_miss_rescans_for_unregistered_projects(tmp_path):
+    index = AssetsIndex(str(tmp_path)).load()
+    assert index.lookup("Photosynthesis") is None
+    # Copied in by hand rather than created through register()
+    os.makedirs(tmp_path / "20240101_090000_photosynthesis")
+
+    assert index.lookup("Photosynthesis")["project_id"] == "20240101_090000_photosynthesis"
+    with open(tmp_path / INDEX_FILE) as f:
+        assert "20240101_090000_photosynthesis" in json.load(f)["projects"]
+
+
+def test_concurrent_processes_keep_every_registration(tmp_path):
+    AssetsIndex(str(tmp_path)).load()
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=register_many, args=(str(tmp_path), worker, 20)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    with open(tmp_path / INDEX_FILE) as f:
+        assert len(json.load(f)["projects"]) == 80
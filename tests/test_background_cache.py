@@ -0,0 +1,53 @@
+import os
+import subprocess
+import time
+import pytest
+from moviepy.editor import VideoFileClip
+from compositor import ffmpeg_binary
+from background_cache import BackgroundSegmentCache, evict_mezzanines, mezzanine_path
+
+WIDTH = 320
+
+
+def make_background(path, seconds):
+    subprocess.run([ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", "testsrc=size=320x180:rate=30", "-t", str(seconds), "-pix_fmt", "yuv420p", path],
+                   check=True)
+    return path
+
+
+def duration(path):
+    with VideoFileClip(path) as clip:
+        return clip.duration
+
+
+def test_short_background_is_looped_to_the_bucket(tmp_path):
+    background = make_background(str(tmp_path / "short.mp4"), 2)
+    cache = BackgroundSegmentCache(str(tmp_path / ".cache" / "segments"), bucket_seconds=5)
+    segment = cache.get(background, 4, width=WIDTH)
+    assert duration(segment) == pytest.approx(5, abs=0.2)
+
+
+def write_mezzanine(cache_dir, name, size, used):
+    path = os.path.join(cache_dir, f"{name}_{WIDTH}w.mp4")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (used, used))
+    return path
+
+
+def test_least_recently_used_mezzanines_are_evicted(tmp_path):
+    cache_dir = str(tmp_path)
+    now = time.time()
+    oldest = write_mezzanine(cache_dir, "oldest", 100, now - 3000)
+    older = write_mezzanine(cache_dir, "older", 100, now - 2000)
+    recent = write_mezzanine(cache_dir, "recent", 100, now - 10)
+
+    assert evict_mezzanines(cache_dir, max_bytes=150, keep=oldest, in_use_seconds=600) == 1
+    # The kept file and the one in use survive even though they are over budget
+    assert [os.path.exists(path) for path in (oldest, older, recent)] == [True, False, True]
+
+
+def test_mezzanine_path_is_in_the_folder_cache(tmp_path):
+    background = str(tmp_path / "minecraft.mp4")
+    assert mezzanine_path(background, WIDTH) == str(tmp_path / ".cache" / f"minecraft_{WIDTH}w.mp4")
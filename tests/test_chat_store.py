@@ -0,0 +1,52 @@
+import time
+import pytest
+from chat_store import MemorySessionBackend, SessionConflictError, SessionStore, new_record
+
+
+@pytest.fixture
+def store():
+    return SessionStore(MemorySessionBackend())
+
+
+def test_session_saves_changes(store):
+    record = store.create(new_record())
+    with store.session(record["id"]) as session:
+        session["history"].append({"role": "user", "text": "hi"})
+    saved = store.load(record["id"])
+    assert saved["history"] == [{"role": "user", "text": "hi"}]
+    assert saved["version"] == 1
+
+
+def test_unknown_session(store):
+    with pytest.raises(ValueError):
+        store.claim("missing", 10)
+
+
+def test_claim_blocks_other_turns_until_release(store):
+    session_id = store.create(new_record())["id"]
+    record = store.claim(session_id, 10)
+    with pytest.raises(SessionConflictError):
+        store.claim(session_id, 10)
+    with pytest.raises(SessionConflictError):
+        with store.session(session_id):
+            pass
+
+    record["history"].append({"role": "model", "text": "streamed"})
+    store.release(record)
+    saved = store.load(session_id)
+    assert saved["history"] == [{"role": "model", "text": "streamed"}]
+    assert saved["lease_until"] is None
+    with store.session(session_id):
+        pass
+
+
+def test_expired_lease_lets_other_turns_in(store):
+    session_id = store.create(new_record())["id"]
+    stalled = store.claim(session_id, 0.05)
+    time.sleep(0.1)
+    with store.session(session_id) as record:
+        record["history"].append({"role": "user", "text": "next"})
+    # The stalled turn cannot overwrite the turn saved after its lease expired
+    with pytest.raises(SessionConflictError):
+        store.release(stalled)
+    assert store.load(session_id)["history"] == [{"role": "user", "text": "next"}]
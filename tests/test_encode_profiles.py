@@ -0,0 +1,27 @@
+from compositor import DEFAULT_WIDTH
+from encode_profiles import PROFILES, choose_profile, get_profile
+
+
+def test_archive_never_downscales():
+    assert PROFILES["archive"].width >= DEFAULT_WIDTH
+    assert PROFILES["archive"].frame_filter() is None
+
+
+def test_every_profile_sets_its_threads():
+    for profile in PROFILES.values():
+        assert profile.threads
+    # Faster presets are worth fewer threads
+    assert PROFILES["preview"].threads < PROFILES["standard"].threads <= PROFILES["archive"].threads
+
+
+def test_encoder_threads_never_exceed_the_callers_share():
+    preview = get_profile("preview")
+    assert preview.encoder_threads() == preview.threads
+    assert preview.encoder_threads(16) == preview.threads
+    assert preview.encoder_threads(1) == 1
+
+
+def test_choose_profile_fits_the_budget():
+    assert choose_profile(10_000, 10).name == "archive"
+    assert choose_profile(20, 10).name == "standard"
+    assert choose_profile(1, 10).name == "preview"
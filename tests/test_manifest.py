@@ -0,0 +1,113 @@
+import json
+import os
+import pytest
+from StimStudy.checkpoint import MANIFEST_FILE, ProjectCheckpoint
+from StimStudy.manifest import ProjectManifest, SlideRecord, load_project_manifest
+
+SLIDES = [
+    {"script": "Cells are the unit of life.", "visual_description": "A cell diagram"},
+    {"script": "DNA carries genes.", "visual_description": "A double helix"},
+]
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    for folder in ("slides", "audio_clips", "videos"):
+        (tmp_path / folder).mkdir()
+    return str(tmp_path)
+
+
+def write(project_dir, name, content):
+    path = os.path.join(project_dir, name)
+    with open(path, "w") as f:
+        f.write(content)
+    return path
+
+
+def test_slide_record_round_trip():
+    record = SlideRecord(2, "script", "visual", html="slides/slide_2.html", audio="audio_clips/slide_2.mp3",
+                         duration_seconds=3.5, video="videos/slide_2.mp4", error=None)
+    copy = SlideRecord.from_dict(json.loads(json.dumps(record.to_dict())))
+    assert copy.to_dict() == record.to_dict()
+
+
+def test_manifest_round_trip(project_dir):
+    write(project_dir, "output.json", json.dumps(SLIDES))
+    write(project_dir, "audio_clips/slide_1.mp3", "mp3")
+    manifest = ProjectManifest(project_dir)
+    manifest.set_script("Biology", SLIDES, artifact="output.json", inputs={"topic": "Biology"})
+    manifest.update_slide(1, artifact="audio_clips/slide_1.mp3", inputs={"script": SLIDES[0]["script"]},
+                          audio="audio_clips/slide_1.mp3", duration_seconds=2.5)
+
+    reloaded = load_project_manifest(project_dir)
+    assert reloaded.topic == "Biology"
+    assert reloaded.script_entries() == SLIDES
+    assert [record.to_dict() for record in reloaded.ordered_slides()] == \
+        [record.to_dict() for record in manifest.ordered_slides()]
+    assert reloaded.slide(1).duration_seconds == 2.5
+    assert reloaded.full_path(reloaded.slide(1).audio) == os.path.join(project_dir, "audio_clips/slide_1.mp3")
+    assert reloaded.slide(2).audio is None
+    assert reloaded.is_fresh("output.json", {"topic": "Biology"})
+    assert reloaded.is_fresh("audio_clips/slide_1.mp3", {"script": SLIDES[0]["script"]})
+
+
+def test_changed_script_drops_slide_artifacts(project_dir):
+    manifest = ProjectManifest(project_dir)
+    manifest.set_script("Biology", SLIDES)
+    manifest.update_slide(1, html="slides/slide_1.html")
+    manifest.update_slide(2, html="slides/slide_2.html")
+
+    changed = [SLIDES[0], dict(SLIDES[1], script="RNA copies genes.")]
+    manifest.set_script("Biology", changed)
+    assert manifest.slide(1).html == "slides/slide_1.html"
+    assert manifest.slide(2).html is None
+    assert manifest.slide(2).script == "RNA copies genes."
+
+
+def test_update_slide_rejects_unknown_fields(project_dir):
+    manifest = ProjectManifest(project_dir)
+    manifest.set_script("Biology", SLIDES)
+    with pytest.raises(AttributeError):
+        manifest.update_slide(1, colour="red")
+
+
+def test_no_manifest(project_dir):
+    assert load_project_manifest(project_dir) is None
+    assert ProjectManifest(project_dir).slides == {}
+
+
+def test_unreadable_manifest_is_ignored(project_dir):
+    write(project_dir, MANIFEST_FILE, "{not json")
+    manifest = ProjectManifest(project_dir)
+    assert manifest.slides == {}
+    assert manifest.artifacts == {}
+
+
+def test_migrates_legacy_checkpoint(project_dir):
+    # A manifest.json written before slides were tracked only has artifact hashes
+    write(project_dir, "output.json", json.dumps(SLIDES))
+    write(project_dir, "slides/slide_1.html", "<html></html>")
+    checkpoint = ProjectCheckpoint(project_dir)
+    checkpoint.record("output.json", {"topic": "Biology"})
+    checkpoint.record("slides/slide_1.html", {"script": SLIDES[0]["script"]})
+    with open(os.path.join(project_dir, MANIFEST_FILE)) as f:
+        assert set(json.load(f)) == {"artifacts"}
+
+    assert load_project_manifest(project_dir) is None
+    manifest = ProjectManifest(project_dir)
+    assert manifest.topic is None
+    assert manifest.slides == {}
+    # The checkpointed artifacts are still fresh, so nothing is regenerated
+    assert manifest.is_fresh("output.json", {"topic": "Biology"})
+    assert manifest.is_fresh("slides/slide_1.html", {"script": SLIDES[0]["script"]})
+
+    # This is what generate_script does when it reuses a legacy output.json
+    manifest.set_script("Biology", SLIDES)
+    manifest.update_slide(1, html="slides/slide_1.html")
+
+    migrated = load_project_manifest(project_dir)
+    assert migrated.topic == "Biology"
+    assert migrated.script_entries() == SLIDES
+    assert migrated.slide(1).html == "slides/slide_1.html"
+    assert set(migrated.artifacts) == {"output.json", "slides/slide_1.html"}
+    assert migrated.is_fresh("slides/slide_1.html", {"script": SLIDES[0]["script"]})
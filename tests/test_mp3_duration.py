@@ -0,0 +1,114 @@
+import pytest
+from StimStudy.mp3_duration import MP3DurationCounter, parse_frame_header
+
+# MPEG 1 Layer III, 128 kbps, 44.1 kHz, stereo, no padding: 417-byte frames of 1152 samples
+CBR_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+FRAME_SECONDS = 1152 / 44100
+
+
+def frame(payload=b""):
+    body = payload.ljust(FRAME_LENGTH - 4, b"\x00")
+    return CBR_HEADER + body
+
+
+def xing_frame(tag=b"Xing"):
+    # The tag follows the 32 bytes of side information of an MPEG 1 stereo frame
+    return frame(b"\x00" * 32 + tag)
+
+
+def vbri_frame():
+    # VBRI sits at a fixed 36 bytes from the start of the frame
+    return frame(b"\x00" * 32 + b"VBRI")
+
+
+def id3_tag(size):
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x04\x00\x00" + syncsafe + b"\x00" * size
+
+
+def count(data, chunk_size=None):
+    counter = MP3DurationCounter()
+    chunk_size = chunk_size or len(data) or 1
+    for start in range(0, len(data), chunk_size):
+        counter.feed(data[start:start + chunk_size])
+    return counter
+
+
+def test_parse_frame_header():
+    assert parse_frame_header(CBR_HEADER) == (FRAME_LENGTH, 1152, 44100, 3, False)
+    # Padded frames are one byte longer
+    assert parse_frame_header(b"\xff\xfb\x92\x00")[0] == FRAME_LENGTH + 1
+
+
+@pytest.mark.parametrize("header", [
+    b"\x00\xfb\x90\x00",  # no frame sync
+    b"\xff\xeb\x90\x00",  # reserved MPEG version
+    b"\xff\xf9\x90\x00",  # reserved layer
+    b"\xff\xfb\x00\x00",  # free-format bitrate
+    b"\xff\xfb\xf0\x00",  # bad bitrate index
+    b"\xff\xfb\x9c\x00",  # reserved sample rate
+])
+def test_parse_frame_header_rejects_invalid(header):
+    assert parse_frame_header(header) is None
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 416, 4096])
+def test_cbr_duration_is_independent_of_chunking(chunk_size):
+    counter = count(frame() * 50, chunk_size)
+    assert counter.frames == 50
+    assert counter.duration == pytest.approx(50 * FRAME_SECONDS)
+    assert counter.bytes_seen == 50 * FRAME_LENGTH
+
+
+@pytest.mark.parametrize("header_frame", [xing_frame(b"Xing"), xing_frame(b"Info"), vbri_frame()])
+@pytest.mark.parametrize("chunk_size", [None, 3, 40])
+def test_vbr_header_frame_is_not_counted(header_frame, chunk_size):
+    counter = count(header_frame + frame() * 10, chunk_size)
+    assert counter.frames == 10
+    assert counter.duration == pytest.approx(10 * FRAME_SECONDS)
+
+
+def test_xing_tag_after_the_first_frame_is_audio():
+    counter = count(frame() + xing_frame() + frame())
+    assert counter.frames == 3
+
+
+@pytest.mark.parametrize("chunk_size", [None, 5, 100])
+def test_id3v2_tag_is_skipped(chunk_size):
+    # The tag body looks like frames, so it must be skipped rather than scanned
+    data = id3_tag(3 * FRAME_LENGTH)
+    data = data[:10] + frame() * 3 + frame() * 4
+    counter = count(data, chunk_size)
+    assert counter.frames == 4
+
+
+def test_empty_stream():
+    counter = count(b"")
+    assert counter.frames == 0
+    assert counter.duration == 0.0
+
+
+def test_truncated_stream_counts_frames_whose_header_arrived():
+    counter = count((frame() * 5)[:-100], chunk_size=64)
+    assert counter.frames == 5
+    assert counter.duration == pytest.approx(5 * FRAME_SECONDS)
+
+
+def test_stream_cut_inside_a_header():
+    counter = count(frame() * 5 + CBR_HEADER[:2])
+    assert counter.frames == 5
+
+
+def test_garbage_has_no_duration():
+    garbage = bytes(range(256)) * 8 + b"\xff" * 64 + b"\x00" * 100
+    counter = count(garbage, chunk_size=33)
+    assert counter.frames == 0
+    assert counter.duration == 0.0
+
+
+def test_resyncs_after_garbage():
+    garbage = b"\x12\xff\x00\xff\x34" * 20
+    counter = count(garbage + frame() * 6, chunk_size=50)
+    assert counter.frames == 6
+    assert counter.duration == pytest.approx(6 * FRAME_SECONDS)
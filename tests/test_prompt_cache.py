@@ -0,0 +1,132 @@
+import threading
+import time
+import pytest
+from prompt_cache import PromptCache, PromptCacheError
+
+MODEL = "gemini-2.0-flash"
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def run_concurrently(cache, prompt, compute, callers):
+    """Call get_or_compute from `callers` threads at once; return each thread's value or exception"""
+    outcomes = [None] * callers
+
+    def call(index):
+        try:
+            outcomes[index] = cache.get_or_compute(MODEL, prompt, compute)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_normalize_collapses_whitespace_only():
+    assert PromptCache.normalize("  Learn \n\t topic  1 ") == "Learn topic 1"
+    assert PromptCache.normalize("Learn DNA") != PromptCache.normalize("learn dna")
+
+
+def test_hit_after_miss():
+    cache = PromptCache()
+    calls = []
+    compute = lambda: calls.append(1) or "plan"
+    assert cache.get_or_compute(MODEL, "Learn  topic", compute) == "plan"
+    assert cache.get_or_compute(MODEL, "Learn topic ", compute) == "plan"
+    assert len(calls) == 1
+    assert cache.get_or_compute("other-model", "Learn topic", compute) == "plan"
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_concurrent_misses_share_one_call():
+    cache = PromptCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "plan"
+
+    threads, outcomes = run_concurrently(cache, "Learn topic", compute, callers=8)
+    # Everyone but the leader is waiting on the leader's call before it returns
+    wait_until(lambda: cache.stats()["coalesced"] == 7)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert outcomes == ["plan"] * 8
+    assert len(calls) == 1
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get_or_compute(MODEL, "Learn topic", lambda: pytest.fail("recomputed")) == "plan"
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    cache = PromptCache()
+    release = threading.Event()
+    error = RuntimeError("model unavailable")
+
+    def compute():
+        release.wait(5)
+        raise error
+
+    threads, outcomes = run_concurrently(cache, "Learn topic", compute, callers=5)
+    wait_until(lambda: cache.stats()["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert sum(outcome is error for outcome in outcomes) == 1
+    waiter_errors = [outcome for outcome in outcomes if outcome is not error]
+    assert all(isinstance(outcome, PromptCacheError) and outcome.__cause__ is error for outcome in waiter_errors)
+    assert len({id(outcome) for outcome in waiter_errors}) == 4
+    stats = cache.stats()
+    assert (stats["entries"], stats["in_flight"]) == (0, 0)
+    # The next request tries again
+    assert cache.get_or_compute(MODEL, "Learn topic", lambda: "plan") == "plan"
+
+
+def test_waiter_times_out():
+    cache = PromptCache(wait_timeout=0.05)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        return "plan"
+
+    threads, outcomes = run_concurrently(cache, "Learn topic", compute, callers=2)
+    wait_until(lambda: any(isinstance(outcome, PromptCacheError) for outcome in outcomes))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    # The leader still finishes and caches its result for later requests
+    assert "plan" in outcomes
+    assert cache.get(MODEL, "Learn topic") == "plan"
+
+
+def test_expired_entries_are_recomputed():
+    cache = PromptCache(ttl=0)
+    values = iter(["first", "second"])
+    assert cache.get_or_compute(MODEL, "Learn topic", lambda: next(values)) == "first"
+    assert cache.get_or_compute(MODEL, "Learn topic", lambda: next(values)) == "second"
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PromptCache(max_entries=2)
+    cache.put(MODEL, "a", 1)
+    cache.put(MODEL, "b", 2)
+    assert cache.get(MODEL, "a") == 1
+    cache.put(MODEL, "c", 3)
+    assert cache.get(MODEL, "b") is None
+    assert (cache.get(MODEL, "a"), cache.get(MODEL, "c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
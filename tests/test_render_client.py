@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from StimStudy.render_client import RenderClient, RenderError
+
+
+class ScriptedServer:
+    """Answers each POST with the next (status, body, delay) in a script"""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                server.requests += 1
+                status, body, delay = server.responses.pop(0) if server.responses else (503, "busy", 0)
+                time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body.encode())
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("localhost", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://localhost:{self.httpd.server_port}/convert"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(*responses):
+        servers.append(ScriptedServer(responses))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def client_for(server, **options):
+    options = dict(dict(backoff_factor=0.01, read_timeout=2.0, read_timeout_per_second=0.0), **options)
+    return RenderClient(api_url=server.url, **options)
+
+
+def test_success(serve, tmp_path):
+    output = tmp_path / "slide_1.mp4"
+    output.write_bytes(b"video")
+    server = serve((200, json.dumps({"success": True}), 0))
+    assert client_for(server).convert("<html></html>", 1.0, str(output)) == {"success": True}
+
+
+def test_non_json_body_is_a_render_error(serve, tmp_path):
+    server = serve((200, "<html>Bad gateway</html>", 0))
+    with pytest.raises(RenderError, match="invalid JSON"):
+        client_for(server).convert("<html></html>", 1.0, str(tmp_path / "slide_1.mp4"))
+
+
+def test_bad_gateway_is_retried(serve, tmp_path):
+    output = tmp_path / "slide_1.mp4"
+    output.write_bytes(b"video")
+    server = serve((503, "busy", 0), (200, json.dumps({"success": True}), 0))
+    assert client_for(server).convert("<html></html>", 1.0, str(output))["success"]
+    assert server.requests == 2
+
+
+def test_retries_are_bounded(serve, tmp_path):
+    server = serve()
+    with pytest.raises(RenderError, match="503"):
+        client_for(server, max_retries=2).convert("<html></html>", 1.0, str(tmp_path / "slide_1.mp4"))
+    assert server.requests == 3
+
+
+def test_read_timeout_is_not_retried(serve, tmp_path):
+    server = serve((200, json.dumps({"success": True}), 2.0))
+    start = time.monotonic()
+    with pytest.raises(RenderError):
+        client_for(server, read_timeout=0.3).convert("<html></html>", 1.0, str(tmp_path / "slide_1.mp4"))
+    assert time.monotonic() - start < 1.0
+    assert server.requests == 1
+
+
+def test_attempts_share_one_time_budget(serve, tmp_path):
+    # Each 503 takes 0.4s; a 1s budget leaves room for three attempts, not max_retries + 1
+    server = serve(*[(503, "busy", 0.4)] * 10)
+    start = time.monotonic()
+    with pytest.raises(RenderError):
+        client_for(server, read_timeout=1.0, max_retries=9).convert("<html></html>", 1.0,
+                                                                    str(tmp_path / "slide_1.mp4"))
+    assert time.monotonic() - start < 1.5
+    assert server.requests <= 3
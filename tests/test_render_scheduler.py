@@ -0,0 +1,125 @@
+import types
+import pytest
+from StimStudy import render_scheduler as render_scheduler_module
+from StimStudy.render_scheduler import RenderScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(render_scheduler_module, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def render(scheduler, clock, seconds=1.0, failed=False):
+    ticket = scheduler.acquire("topic")
+    clock.now += seconds
+    if failed:
+        ticket.fail()
+    scheduler.release(ticket)
+
+
+def test_initial_limit_is_clamped():
+    assert RenderScheduler(initial_limit=50, max_limit=16).limit == 16
+    assert RenderScheduler(initial_limit=0, min_limit=2).limit == 2
+    assert RenderScheduler(min_limit=4, max_limit=2).max_limit == 4
+
+
+def test_success_increases_additively(clock):
+    scheduler = RenderScheduler(initial_limit=2, max_limit=16)
+    render(scheduler, clock)
+    assert scheduler.limit == pytest.approx(2.5)
+    render(scheduler, clock)
+    assert scheduler.limit == pytest.approx(2.9)
+    assert scheduler.increases == 2
+
+
+def test_increase_stops_at_max_limit(clock):
+    scheduler = RenderScheduler(initial_limit=2, max_limit=4)
+    for _ in range(100):
+        render(scheduler, clock)
+    assert scheduler.limit == 4
+    assert scheduler.current_limit == 4
+    assert scheduler.increases < 100
+
+
+def test_failure_decreases_multiplicatively(clock):
+    scheduler = RenderScheduler(initial_limit=8, decrease_factor=0.5)
+    render(scheduler, clock, failed=True)
+    assert scheduler.limit == 4
+    assert scheduler.errors == 1
+    assert scheduler.decreases == 1
+
+
+def test_decrease_stops_at_min_limit(clock):
+    scheduler = RenderScheduler(initial_limit=8, min_limit=2, decrease_factor=0.5)
+    for _ in range(20):
+        render(scheduler, clock, failed=True)
+    assert scheduler.limit == 2
+    assert scheduler.current_limit == 2
+
+
+def test_exception_in_slot_counts_as_failure(clock):
+    scheduler = RenderScheduler(initial_limit=8, decrease_factor=0.5)
+    with pytest.raises(RuntimeError):
+        with scheduler.slot("topic"):
+            clock.now += 1
+            raise RuntimeError("render server down")
+    assert scheduler.limit == 4
+    assert scheduler.in_flight == 0
+
+
+def test_slowdown_decreases(clock):
+    scheduler = RenderScheduler(initial_limit=4, max_limit=16, latency_tolerance=2.0, decrease_factor=0.5)
+    for _ in range(5):
+        render(scheduler, clock, seconds=1.0)
+    limit = scheduler.limit
+    # Smoothed latency: 0.8 * 1s + 0.2 * 10s = 2.8s, past twice the 1s baseline
+    render(scheduler, clock, seconds=10.0)
+    assert scheduler.decreases == 1
+    assert scheduler.limit == pytest.approx(limit * 0.5)
+
+
+def test_slowdown_within_tolerance_still_increases(clock):
+    scheduler = RenderScheduler(initial_limit=4, latency_tolerance=2.0)
+    for _ in range(5):
+        render(scheduler, clock, seconds=1.0)
+    # 0.8 * 1s + 0.2 * 5s = 1.8s stays within twice the baseline
+    render(scheduler, clock, seconds=5.0)
+    assert scheduler.decreases == 0
+    assert scheduler.increases == 6
+
+
+def test_latency_is_normalized_by_cost(clock):
+    scheduler = RenderScheduler(initial_limit=4, latency_tolerance=2.0)
+    render(scheduler, clock, seconds=1.0)
+    # Ten times the video in ten times the time is not a slowdown
+    ticket = scheduler.acquire("topic", cost=10.0)
+    clock.now += 10.0
+    scheduler.release(ticket)
+    assert scheduler.decreases == 0
+
+
+def test_burst_of_failures_backs_off_once(clock):
+    scheduler = RenderScheduler(initial_limit=4, decrease_factor=0.5)
+    tickets = [scheduler.acquire("topic") for _ in range(4)]
+    clock.now += 1
+    for ticket in tickets:
+        ticket.fail()
+        scheduler.release(ticket)
+    assert scheduler.errors == 4
+    assert scheduler.decreases == 1
+    assert scheduler.limit == 2
+
+    # A render that started after the cut can cut again
+    render(scheduler, clock, failed=True)
+    assert scheduler.decreases == 2
+    assert scheduler.limit == 1
@@ -0,0 +1,37 @@
+import os
+import numpy as np
+from PIL import Image
+from sprites import CACHE_DIR_NAME, SpriteLibrary, load_sprite
+
+
+def make_library(tmp_path):
+    character_dir = tmp_path / "peter"
+    character_dir.mkdir()
+    pixels = np.zeros((40, 20, 4), dtype=np.uint8)
+    pixels[:, :, 0] = 200
+    pixels[:, :, 3] = np.linspace(0, 255, 20, dtype=np.uint8)
+    Image.fromarray(pixels, "RGBA").save(character_dir / "1.png")
+    return SpriteLibrary(str(tmp_path), height=80)
+
+
+def test_cached_copy_matches_a_fresh_build(tmp_path):
+    library = make_library(tmp_path)
+    [sprite] = library.sprites("peter")
+    assert os.path.exists(sprite.premultiplied_path)
+
+    cache_dir = os.path.join(str(tmp_path), CACHE_DIR_NAME, "peter")
+    cached = load_sprite(sprite.source_path, 80, cache_dir)
+    assert np.array_equal(cached.rgb, sprite.rgb)
+    assert np.allclose(cached.alpha, sprite.alpha)
+
+
+def test_missing_cache_file_is_rebuilt(tmp_path):
+    library = make_library(tmp_path)
+    [sprite] = library.sprites("peter")
+    os.remove(sprite.premultiplied_path)
+    # A new file in the character directory makes the library check its sprites again
+    Image.new("RGBA", (10, 10)).save(tmp_path / "peter" / "2.png")
+
+    sprites = library.sprites("peter")
+    assert len(sprites) == 2
+    assert all(os.path.exists(sprite.premultiplied_path) for sprite in sprites)
@@ -0,0 +1,69 @@
+import os
+import threading
+from StimStudy.tts_cache import TTSCache
+
+
+def clip(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"\xff" * size)
+    return str(path)
+
+
+def test_hit_copies_clip_and_duration(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"))
+    cache.put("a", clip(tmp_path, "a.mp3", 100), 1.5)
+    output = str(tmp_path / "out.mp3")
+    assert cache.fetch("a", output) == 1.5
+    assert os.path.getsize(output) == 100
+    assert cache.fetch("b", output) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_clip_removed_by_another_process_is_a_miss(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"))
+    cache.put("a", clip(tmp_path, "a.mp3", 100), 1.5)
+    os.remove(cache.path_for("a"))
+    assert cache.fetch("a", str(tmp_path / "out.mp3")) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["total_bytes"] == 0
+
+
+def test_fetch_during_eviction_never_fails(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"), max_bytes=250)
+    for key in "abc":
+        cache.put(key, clip(tmp_path, f"{key}.mp3", 100), 1.0)
+    errors = []
+
+    def fetch():
+        for _ in range(200):
+            try:
+                cache.fetch("a", str(tmp_path / f"out_{threading.get_ident()}.mp3"))
+            except Exception as e:
+                errors.append(e)
+
+    def put():
+        for i in range(200):
+            cache.put(f"n{i}", clip(tmp_path, "n.mp3", 100), 1.0)
+            cache.put("a", clip(tmp_path, "a2.mp3", 100), 1.0)
+
+    threads = [threading.Thread(target=fetch), threading.Thread(target=put)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_lru_order_survives_restart(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache = TTSCache(cache_dir, max_bytes=250)
+    cache.put("old", clip(tmp_path, "old.mp3", 100), 1.0)
+    cache.put("new", clip(tmp_path, "new.mp3", 100), 1.0)
+    # A hit makes the older clip the most recently used one
+    assert cache.fetch("old", str(tmp_path / "out.mp3")) == 1.0
+
+    restarted = TTSCache(cache_dir, max_bytes=250)
+    assert list(restarted.entries) == ["new", "old"]
+    restarted.put("third", clip(tmp_path, "third.mp3", 100), 1.0)
+    assert restarted.fetch("new", str(tmp_path / "out.mp3")) is None
+    assert restarted.fetch("old", str(tmp_path / "out.mp3")) == 1.0
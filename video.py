@@ -1,13 +1,57 @@
 import os
-import random
+import re
+import json
+import time
 from moviepy.editor import (
     VideoFileClip,
     AudioFileClip,
-    CompositeVideoClip,
-    ImageClip,
     clips_array,
-    concatenate_videoclips,
 )
+from compositor import compose_part, join_segments, delivery_args, DEFAULT_FPS, SPRITE_X
+from delivery import package_hls
+from background_cache import get_segment_cache
+from sprites import get_sprite_library
+from encode_profiles import choose_profile, get_profile, record_encode
+from StimStudy.manifest import load_project_manifest
+from StimStudy.tracing import span
+
+
+def scan_slides(audio_folder, slide_folder):
+    """
+    Slides of a project without a manifest, found by listing its folders
+
+    Durations come from audio_clips/audio_durations.json when it exists,
+    otherwise from the MP3 itself.
+
+    Returns:
+        list: (name, slide_path, audio_path, duration) for every slide_N.mp4
+              with a matching slide_N.mp3, in slide order
+    """
+    durations = {}
+    durations_file = os.path.join(audio_folder, "audio_durations.json")
+    if os.path.exists(durations_file):
+        with open(durations_file, "r") as f:
+            durations = {
+                entry["filename"]: entry["duration_seconds"] for entry in json.load(f)
+            }
+
+    slide_files = sorted(
+        [f for f in os.listdir(slide_folder) if f.endswith(".mp4")],
+        key=lambda f: [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", f)],
+    )
+    slides = []
+    for slide_file in slide_files:
+        name = os.path.splitext(slide_file)[0]
+        audio_path = os.path.join(audio_folder, f"{name}.mp3")
+        if not os.path.exists(audio_path):
+            print(f"⚠️ Missing audio for slide: {audio_path}")
+            continue
+        duration = durations.get(f"{name}.mp3")
+        if duration is None:
+            from mutagen.mp3 import MP3
+            duration = MP3(audio_path).info.length
+        slides.append((name, os.path.join(slide_folder, slide_file), audio_path, duration))
+    return slides
 
 
 def generate_and_combine_videos(
@@ -21,7 +65,37 @@ def generate_and_combine_videos(
     final_output_path,
     index,
     title,
+    engine="filtergraph",
+    hls=None,
+    job_id=None,
+    threads=None,
+    profile=None,
+    latency_budget=None,
+    project_dir=None,
 ):
+    """
+    Build the final `{index}_{title}.mp4` for one study-plan part
+
+    engine="filtergraph" composites every slide in a single ffmpeg pass;
+    engine="moviepy" keeps the original two-pass path (character clips are
+    written to output_folder first, then decoded again and stacked slide by
+    slide; the stacked segments are joined by stream copy).
+    With hls=True (default: the HLS_OUTPUT env var) the part is also
+    packaged as HLS/fMP4 next to the MP4. Encodes are traced under job_id
+    and use at most `threads` encoder threads, or fewer if the profile
+    caps them (default: the profile's count, else all cores).
+    Intermediate files, including moviepy's temporary audio, go to
+    output_folder.
+
+    profile names an encode profile (see encode_profiles.py); without one,
+    latency_budget (seconds) picks the best profile expected to finish in
+    time, and otherwise ENCODE_PROFILE is used.
+
+    Slides, narration and durations are read from project_dir's manifest
+    when it has one; otherwise audio_folder and slide_folder are scanned.
+    """
+    if hls is None:
+        hls = bool(os.getenv("HLS_OUTPUT"))
     # Resolve background video
     background_video_path = os.path.join(
         background_folder, f"{selected_background}.mp4"
@@ -32,91 +106,85 @@ def generate_and_combine_videos(
             f"Background video '{background_video_path}' not found."
         )
 
-    # Resolve character sprite directory and image
-    character_dir = os.path.join(sprite_dir, selected_character)
-    if not os.path.isdir(character_dir):
-        raise FileNotFoundError(f"Character directory '{character_dir}' not found.")
+    segment_cache = get_segment_cache(background_video_path)
 
-    def get_character_image(character_dir, lastUsed):
-        image_files = [
-            file
-            for file in os.listdir(character_dir)
-            if file.endswith(".png") or file.endswith(".jpg")
-        ]
-        if not image_files:
-            raise FileNotFoundError(
-                f"No image found in character directory '{character_dir}'."
-            )
+    # Resolve character sprites from the shared pre-scaled library
+    sprite_library = get_sprite_library(sprite_dir)
+    sprite_library.sprites(selected_character)
 
-        # Filter out the last used sprite
-        available_images = [file for file in image_files if file != lastUsed]
-        if not available_images:
-            raise ValueError(
-                "No available images left after excluding the last used one."
-            )
+    # (name, slide video, narration, duration) for every slide that has been rendered and narrated
+    manifest = load_project_manifest(project_dir) if project_dir else None
+    if manifest is not None:
+        slides = [
+            (f"slide_{record.number}", manifest.full_path(record.video), manifest.full_path(record.audio),
+             record.duration_seconds)
+            for record in manifest.ordered_slides()
+            if record.video and record.audio and record.duration_seconds is not None
+        ]
+    else:
+        slides = scan_slides(audio_folder, slide_folder)
 
-        sprite_path = os.path.join(character_dir, random.choice(available_images))
-        return sprite_path
+    # Pick encoder settings, fitting the latency budget to this part's length
+    content_seconds = sum(duration for *_, duration in slides)
+    if profile is None and latency_budget is not None:
+        profile = choose_profile(latency_budget, content_seconds)
+    profile = get_profile(profile)
+    threads = profile.encoder_threads(threads)
+    print(f"🎛️ Encode profile: {profile.name} ({content_seconds:.1f}s of video)")
 
     def generateAllCharacterVideos():
         print("🎬 Generating character videos...")
-        audio_files = sorted(
-            [f for f in os.listdir(audio_folder) if f.endswith(".mp3")]
-        )
-
-        lastUsed = ""
-        for audio_file in audio_files:
-            audio_name = os.path.splitext(audio_file)[0]
-            audio_path = os.path.join(audio_folder, audio_file)
+        character_videos = []
+        lastUsed = None
+        for audio_name, _, audio_path, _ in slides:
             audio_clip = AudioFileClip(audio_path)
 
-            bg_clip = VideoFileClip(background_video_path).subclip(
+            bg_segment_path = segment_cache.get(background_video_path, audio_clip.duration,
+                                                width=profile.width)
+            bg_clip = VideoFileClip(bg_segment_path).subclip(
                 0, audio_clip.duration
             )
             output_name = os.path.join(output_folder, f"{audio_name}_video.mp4")
 
-            sprite_path = get_character_image(character_dir, lastUsed)
-            createCharacterVideo(audio_clip, sprite_path, bg_clip, output_name)
-            lastUsed = sprite_path
+            sprite = sprite_library.choose(selected_character, exclude=lastUsed)
+            with span("write_videofile", job=job_id, part=index, slide=audio_name):
+                createCharacterVideo(audio_clip, sprite, bg_clip, output_name)
+            character_videos.append(output_name)
+            lastUsed = sprite
 
         print("✅ Character videos generated.\n")
+        return character_videos
 
-    def createCharacterVideo(audio_clip, character_img_path, bg_clip, output_path):
-        character_clip = ImageClip(character_img_path)
-        character_clip = (
-            character_clip.set_duration(audio_clip.duration)
-            .set_position((150, "bottom"))
-            .resize(height=300)
+    def createCharacterVideo(audio_clip, sprite, bg_clip, output_path):
+        # Sprite is already resized and premultiplied, so blending is one multiply-add per pixel
+        final_video = bg_clip.fl_image(
+            lambda frame: sprite.composite_onto(frame, SPRITE_X, frame.shape[0] - sprite.height)
         )
-
-        final_video = CompositeVideoClip([bg_clip, character_clip])
         final_video = final_video.set_audio(audio_clip)
 
-        final_video.write_videofile(output_path, codec="libx264", audio_codec="aac")
-
-    def combineSlidesWithSlides():
-        print("🎞️ Combining slides with character videos...")
-        final_clips = []
-
-        slide_files = sorted(
-            [f for f in os.listdir(slide_folder) if f.endswith(".mp4")]
+        final_video.write_videofile(
+            output_path, codec="libx264", audio_codec="aac", threads=threads,
+            preset=profile.preset, audio_bitrate=profile.audio_bitrate,
+            temp_audiofile=f"{os.path.splitext(output_path)[0]}_audio.m4a",
         )
-        for i, slide_file in enumerate(slide_files, 1):
-            slide_path = os.path.join(slide_folder, slide_file)
-            character_video_path = os.path.join(output_folder, f"slide_{i}_video.mp4")
-            audio_path = os.path.join(audio_folder, f"slide_{i}.mp3")
 
-            if not os.path.exists(character_video_path):
-                print(f"⚠️ Missing character video: {character_video_path}")
-                continue
+    def combineSlidesWithSlides(character_videos):
+        print("🎞️ Combining slides with character videos...")
+        segment_paths = []
+        frame_filter = profile.frame_filter()
 
+        for (name, slide_path, audio_path, _), character_video_path in zip(slides, character_videos):
             slide_clip = VideoFileClip(slide_path)
             character_clip = VideoFileClip(character_video_path)
             audio_clip = AudioFileClip(audio_path)
 
-            width = max(slide_clip.w, character_clip.w)
-            slide_clip = slide_clip.resize(width=width)
-            character_clip = character_clip.resize(width=width)
+            # Slides rendered in the canonical format and the character clips
+            # are already panel-wide, so only other sizes are resized frame by frame
+            width = profile.width
+            if slide_clip.w != width:
+                slide_clip = slide_clip.resize(width=width)
+            if character_clip.w != width:
+                character_clip = character_clip.resize(width=width)
 
             slide_clip = slide_clip.subclip(0, audio_clip.duration)
             character_clip = character_clip.subclip(0, audio_clip.duration)
@@ -124,20 +192,71 @@ def generate_and_combine_videos(
             combined = clips_array([[slide_clip], [character_clip]])
             combined = combined.set_audio(audio_clip)
 
-            final_clips.append(combined)
+            # Every segment is encoded with the same settings so they can be joined by stream copy
+            segment_path = os.path.join(output_folder, f"{name}_segment.mp4")
+            with span("write_videofile", job=job_id, part=index, slide=name):
+                combined.write_videofile(
+                    segment_path, fps=DEFAULT_FPS, codec="libx264", audio_codec="aac",
+                    preset=profile.preset, audio_bitrate=profile.audio_bitrate,
+                    ffmpeg_params=["-crf", str(profile.crf)]
+                    + (["-vf", frame_filter] if frame_filter else [])
+                    + delivery_args(),
+                    threads=threads,
+                    temp_audiofile=os.path.join(output_folder, f"{name}_segment_audio.m4a"),
+                )
+            segment_paths.append(segment_path)
 
-        if final_clips:
-            os.makedirs(final_output_path, exist_ok=True)
+        if segment_paths:
             final_video_path = os.path.join(
                 final_output_path, f"{index}_{title}.mp4"
             )
-            final_video = concatenate_videoclips(final_clips, method="compose")
-            final_video.write_videofile(
-                final_video_path, codec="libx264", audio_codec="aac"
-            )
+            with span("join_segments", job=job_id, part=index) as trace:
+                copied = join_segments(segment_paths, final_video_path, threads=threads, profile=profile)
+                trace.attributes["stream_copy"] = copied
+            print(f"{'⚡ Stream-copied' if copied else '🔁 Transcoded'} {len(segment_paths)} segments")
             print(f"✅ Final video saved at: {final_video_path}")
+            return final_video_path
         else:
             print("⚠️ No combined clips were created.")
+            return None
+
+    def composeWithFilterGraph():
+        print("🎞️ Compositing slides, background and character in one pass...")
+        segments = []
+        lastUsed = None
+        for _, slide_path, audio_path, duration in slides:
+            sprite = sprite_library.choose(selected_character, exclude=lastUsed)
+            segments.append({
+                "slide_path": slide_path,
+                "background_path": segment_cache.get(background_video_path, duration, width=profile.width),
+                "sprite_path": sprite.premultiplied_path,
+                "audio_path": audio_path,
+                "duration": duration,
+            })
+            lastUsed = sprite
+
+        if not segments:
+            print("⚠️ No combined clips were created.")
+            return None
+
+        final_video_path = os.path.join(final_output_path, f"{index}_{title}.mp4")
+        with span("compose_part", job=job_id, part=index):
+            compose_part(segments, final_video_path, threads=threads, profile=profile)
+        print(f"✅ Final video saved at: {final_video_path}")
+        return final_video_path
+
+    encode_start = time.perf_counter()
+    if engine == "filtergraph":
+        final_video_path = composeWithFilterGraph()
+    elif engine == "moviepy":
+        final_video_path = combineSlidesWithSlides(generateAllCharacterVideos())
+    else:
+        raise ValueError(f"Unknown compositing engine: {engine}")
+    if final_video_path:
+        record_encode(profile, content_seconds, time.perf_counter() - encode_start)
 
-    generateAllCharacterVideos()
-    combineSlidesWithSlides()
+    if hls and final_video_path:
+        with span("package_hls", job=job_id, part=index):
+            playlist = package_hls(final_video_path)
+        print(f"📺 HLS playlist saved at: {playlist}")
+    return final_video_path